@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""In-process stub of Report Portal API for benchmarks.
+
+Responds to launch, item and log requests with generated ids after configurable latency,
+and counts requests by kind. Request bodies are read, but not parsed, only file parts of log requests are counted.
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from typing import Any, Dict
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Handler of requests to the stub."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are sent in one segment, otherwise delayed ACK adds tens of ms to each response.
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    server: "FakeReportPortal"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        """Do not log requests."""
+
+    def do_POST(self) -> None:  # noqa: N802
+        """Start launch or item, or log messages."""
+        if self.path.endswith("/log"):
+            self._respond(kind="log", response={"responses": [{"id": "log"}]})
+        elif "/launch" in self.path:
+            self._respond(kind="start_launch", response={"id": f"launch{next(self.server.ids)}"})
+        else:
+            self._respond(kind="start_item", response={"id": f"item{next(self.server.ids)}"})
+
+    def do_PUT(self) -> None:  # noqa: N802
+        """Finish launch or item."""
+        self._respond(kind="finish_launch" if "/launch" in self.path else "finish_item", response={"msg": "ok"})
+
+    def do_GET(self) -> None:  # noqa: N802
+        """Get items, there are none."""
+        self._respond(kind="get", response={"page": {"totalPages": 1}, "content": []})
+
+    def _respond(self, kind: str, response: Dict[str, Any]) -> None:
+        """Count the request and respond after the latency.
+
+        Args:
+            kind: kind of the request.
+            response: JSON response.
+        """
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        with self.server.lock:
+            self.server.requests[kind] += 1
+            self.server.bytes_received += len(body)
+            if kind == "log":
+                self.server.attachments += body.count(b'; filename="')
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        body = json.dumps(response).encode("utf-8")
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeReportPortal(ThreadingHTTPServer):
+    """Report Portal stub serving requests in background threads of the current process."""
+
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0) -> None:
+        """Initialization, the stub listens on a free local port.
+
+        Args:
+            latency: delay of each response in seconds.
+        """
+        super(FakeReportPortal, self).__init__(("127.0.0.1", 0), _Handler)
+        self.latency = latency
+        self.ids = count()
+        self.lock = threading.Lock()
+        self.requests: Counter = Counter()
+        self.bytes_received = 0
+        self.attachments = 0
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def endpoint(self) -> str:
+        """Gets endpoint of the stub.
+
+        Returns:
+            Endpoint URL.
+        """
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self) -> "FakeReportPortal":
+        """Start serving requests.
+
+        Returns:
+            The stub.
+        """
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Stop serving requests."""
+        self.shutdown()
+        self.server_close()
+
+    def reset(self) -> None:
+        """Reset counters of requests."""
+        with self.lock:
+            self.requests = Counter()
+            self.bytes_received = 0
+            self.attachments = 0
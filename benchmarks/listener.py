@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the listener with synthetic Robot Framework events and a fake Report Portal.
+
+Events of a synthetic execution are passed straight to the listener callbacks, without Robot Framework.
+Each scenario is run in a separate process, so max resident set size is reported for the scenario only,
+and requests are served by the stub in the benchmark process. Results can be appended to a JSON lines file,
+each run is then compared with the previous result of the same scenario.
+
+Usage:
+    python benchmarks/listener.py --scenario tests --scenario logging --async --results results.jsonl
+"""
+
+import json
+import os
+import resource
+import sys
+import time
+from argparse import ArgumentParser
+from multiprocessing import get_context
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, Iterator, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from robot.version import VERSION as ROBOT_VERSION  # noqa: E402
+
+from fake_server import FakeReportPortal  # noqa: E402
+from results import find_previous, get_revision  # noqa: E402
+
+# Start and end time of all synthetic events.
+START_TIME = "20180101 00:00:00.000"
+END_TIME = "20180101 00:00:01.000"
+
+# Parameters of synthetic executions: number of tests, keywords in each test,
+# depth of nesting of each keyword and number of messages logged on each level of nesting.
+SCENARIOS: Dict[str, Dict[str, int]] = {
+    "tests": {"tests": 10000, "keywords": 3, "depth": 1, "messages": 2},
+    "nesting": {"tests": 1000, "keywords": 1, "depth": 30, "messages": 1},
+    "logging": {"tests": 1000, "keywords": 1, "depth": 1, "messages": 200}
+}
+
+
+def generate_events(tests: int, keywords: int, depth: int, messages: int) -> Iterator[Tuple[str, tuple]]:
+    """Generates events of a synthetic execution of one suite.
+
+    Args:
+        tests: number of tests.
+        keywords: number of keywords in each test.
+        depth: depth of nesting of each keyword.
+        messages: number of messages logged on each level of nesting.
+    Returns:
+        Iterator over names of listener callbacks and their arguments.
+    """
+    suite = {"id": "s1", "longname": "Benchmark", "doc": "", "metadata": {}, "source": "", "suites": [],
+             "tests": [f"Test {num}" for num in range(tests)], "totaltests": tests, "starttime": START_TIME}
+    yield "start_suite", ("Benchmark", suite)
+    for test_num in range(tests):
+        name = f"Test {test_num}"
+        yield "start_test", (name, {"id": f"s1-t{test_num + 1}", "longname": f"Benchmark.{name}", "doc": "",
+                                    "tags": ["benchmark"], "starttime": START_TIME, "critical": "yes",
+                                    "template": ""})
+        for keyword_num in range(keywords):
+            for level in range(depth):
+                yield "start_keyword", (f"BuiltIn.Keyword {keyword_num}.{level}", {
+                    "kwname": f"Keyword {keyword_num}.{level}", "libname": "BuiltIn", "doc": "", "tags": [],
+                    "args": [f"argument {level}"], "assign": [], "starttime": START_TIME, "type": "Keyword"})
+                for message_num in range(messages):
+                    yield "log_message", ({"message": f"Message {message_num} of keyword {keyword_num}.{level}",
+                                           "level": "INFO", "timestamp": START_TIME, "html": "no"},)
+            for level in reversed(range(depth)):
+                yield "end_keyword", (f"BuiltIn.Keyword {keyword_num}.{level}", {
+                    "type": "Keyword", "status": "PASS", "starttime": START_TIME, "endtime": END_TIME,
+                    "message": ""})
+        yield "end_test", (name, {"status": "PASS", "message": "", "tags": ["benchmark"], "starttime": START_TIME,
+                                  "endtime": END_TIME})
+    yield "end_suite", ("Benchmark", dict(suite, endtime=END_TIME, status="PASS", statistics="", message=""))
+
+
+def _run(endpoint: str, params: Dict[str, int], variables: Dict[str, Any]) -> Dict[str, float]:
+    """Passes events of a synthetic execution to the listener.
+
+    Args:
+        endpoint: Report Portal endpoint.
+        params: parameters of the synthetic execution, see generate_events.
+        variables: additional variables of the listener.
+    Returns:
+        Number of events, time of passing events to the listener, total time including sending
+        of the remaining requests, in seconds, and max resident set size in megabytes.
+    """
+    from reportportal_listener import reportportal_listener
+    from reportportal_listener.variables import preset_variables
+
+    with TemporaryDirectory() as output_dir:
+        preset_variables(RP_ENDPOINT=endpoint, RP_UUID="benchmark", RP_PROJECT="benchmark", RP_LAUNCH="Benchmark",
+                         OUTPUT_DIR=output_dir, **variables)
+        listener = reportportal_listener()
+        events = 0
+        start = time.perf_counter()
+        for callback, args in generate_events(**params):
+            getattr(listener, callback)(*args)
+            events += 1
+        events_time = time.perf_counter() - start
+        listener.close()
+        total_time = time.perf_counter() - start
+
+    return {"events": events, "events_time": events_time, "total_time": total_time,
+            "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+def main(args: List[str] = None) -> None:
+    """Runs the benchmark.
+
+    Args:
+        args: command line arguments.
+    """
+    parser = ArgumentParser(description="Benchmark of the listener with synthetic events and fake Report Portal.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run, can be repeated, all scenarios are run by default")
+    parser.add_argument("--tests", type=int, help="override number of tests of scenarios")
+    parser.add_argument("--latency", type=float, default=0.0, help="delay of each response of Report Portal in ms")
+    parser.add_argument("--async", dest="async_mode", action="store_true", help="set RP_ASYNC")
+    parser.add_argument("--stream", action="store_true", help="set RP_STREAM_TESTS")
+    parser.add_argument("--variable", action="append", default=[], metavar="NAME:VALUE",
+                        help="additional variable of the listener, can be repeated")
+    parser.add_argument("--results", help="JSON lines file to append results to and compare them with")
+    options = parser.parse_args(args)
+
+    variables: Dict[str, Any] = dict(variable.split(":", 1) for variable in options.variable)
+    if options.async_mode:
+        variables["RP_ASYNC"] = True
+    if options.stream:
+        variables["RP_STREAM_TESTS"] = True
+
+    context = get_context("spawn")
+    with FakeReportPortal(latency=options.latency / 1000) as server:
+        for scenario in options.scenario or sorted(SCENARIOS):
+            params = dict(SCENARIOS[scenario])
+            if options.tests:
+                params["tests"] = options.tests
+            server.reset()
+            with context.Pool(processes=1) as pool:
+                measured = pool.apply(_run, (server.endpoint, params, variables))
+            requests = sum(server.requests.values())
+
+            key = {"scenario": scenario, "params": params, "variables": variables, "latency": options.latency}
+            result = dict(key, revision=get_revision(), python=sys.version.split()[0], robot=ROBOT_VERSION,
+                          time=time.strftime("%Y-%m-%dT%H:%M:%S"), events=measured["events"],
+                          events_per_second=round(measured["events"] / measured["events_time"]),
+                          total_time=round(measured["total_time"], 3), max_rss=round(measured["max_rss"], 1),
+                          requests=requests, requests_per_test=round(requests / params["tests"], 2),
+                          requests_by_kind=dict(server.requests), bytes_received=server.bytes_received)
+            print(f"{scenario:>8}: {result['events']} events, {result['events_per_second']} events/s, "
+                  f"total {result['total_time']} s, max RSS {result['max_rss']} MB, "
+                  f"{result['requests_per_test']} requests per test")
+
+            if options.results:
+                previous = find_previous(path=options.results, key=key)
+                if previous is not None:
+                    print(f"{'':>8}  previous ({previous['revision']}): {previous['events_per_second']} events/s "
+                          f"({result['events_per_second'] / previous['events_per_second'] - 1:+.1%}), "
+                          f"total {previous['total_time']} s, max RSS {previous['max_rss']} MB, "
+                          f"{previous['requests_per_test']} requests per test")
+                with open(options.results, "a", encoding="utf-8") as results:
+                    results.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
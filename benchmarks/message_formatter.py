@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of formatting of large log messages by MessageFormatter.
+
+The corpus imitates large messages of real executions: dumped HTTP bodies and page sources,
+results of SQL queries, HTML tables and links logged by libraries, messages with details and screenshots.
+HTML messages with unterminated tags check that tag patterns do not backtrack.
+Each message is formatted several times and the best time is reported. Results can be appended
+to a JSON lines file, each run is then compared with the previous result of the same corpus.
+
+Usage:
+    python benchmarks/message_formatter.py --size 4 --results results.jsonl
+"""
+
+import json
+import os
+import sys
+import time
+from argparse import ArgumentParser
+from tempfile import TemporaryDirectory
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from reportportal_listener.message import MessageFormatter  # noqa: E402
+
+from results import find_previous, get_revision  # noqa: E402
+
+SCREENSHOT_NAME = "selenium-screenshot-1.png"
+
+
+def _repeat(text: str, size: int) -> str:
+    """Repeats the text up to the size.
+
+    Args:
+        text: text to repeat.
+        size: size in characters.
+    Returns:
+        Repeated text.
+    """
+    return (text * (size // len(text) + 1))[:size]
+
+
+def generate_corpus(size: int) -> Dict[str, Tuple[str, bool]]:
+    """Generates large messages of typical kinds.
+
+    Args:
+        size: approximate size of each message in characters.
+    Returns:
+        Messages with their html flags by kind.
+    """
+    record = '{"id": 1024, "name": "Item <b>1024</b>", "tags": ["a", "b"], "price": 10.5, "active": true}'
+    row = "(1024, 'Item 1024', datetime.datetime(2018, 1, 1, 0, 0), Decimal('10.50'), None)"
+    page = '<div class="item"><a href="/items/1024">Item 1024</a><p>Description &amp; price</p></div>\n'
+    cells = '<tr><td>1024</td><td>Item 1024</td><td><a href="http://example.com/items/1024">link</a></td></tr>'
+    details = "<details><summary>Response</summary><p>"
+    return {
+        "http_body": (f"Response body: [{_repeat(record + ', ', size)}]", False),
+        "sql_result": (f"Query result: [{_repeat(row + ', ', size)}]", False),
+        "page_source": (f"<html><body>{_repeat(page, size)}</body></html>", False),
+        "html_table": (f"<table><tr><th>Id</th><th>Name</th><th>Link</th></tr>{_repeat(cells, size)}</table>", True),
+        "details": (f"{details}{_repeat(record, size)}</p></details>", False),
+        "nested_details": (f"{details}{_repeat(details + record + '</p></details>', size)}</p>", False),
+        "unterminated": (f"<a{_repeat('b', size)}", True),
+        "unclosed_tags": (f"<p>{_repeat('Value < limit <b ', size)}", True),
+        "screenshot": (f'</td></tr><tr><td colspan="3"><a href="{SCREENSHOT_NAME}">'
+                       f'<img src="{SCREENSHOT_NAME}" width="800px"></a>{_repeat(" ", size)}', True)
+    }
+
+
+def _run(corpus: Dict[str, Tuple[str, bool]], repeats: int) -> Dict[str, float]:
+    """Formats each message of the corpus.
+
+    Args:
+        corpus: messages with their html flags by kind.
+        repeats: number of times each message is formatted.
+    Returns:
+        Best time of formatting of each message in seconds by kind.
+    """
+    times = {}
+    with TemporaryDirectory() as output_dir:
+        with open(os.path.join(output_dir, SCREENSHOT_NAME), "wb") as screenshot:
+            screenshot.write(b"\x89PNG")
+        for kind, (text, html) in corpus.items():
+            best = float("inf")
+            for _ in range(repeats):
+                message = {"message": text, "level": "INFO", "timestamp": "2018-01-01T00:00:00.000"}
+                start = time.perf_counter()
+                MessageFormatter.format_message(message=message, keyword_name="Benchmark", output_dir=output_dir,
+                                                html=html)
+                best = min(best, time.perf_counter() - start)
+            times[kind] = best
+    return times
+
+
+def main(args: List[str] = None) -> None:
+    """Runs the benchmark.
+
+    Args:
+        args: command line arguments.
+    """
+    parser = ArgumentParser(description="Benchmark of formatting of large log messages.")
+    parser.add_argument("--size", type=float, default=4, help="size of each message in millions of characters")
+    parser.add_argument("--repeats", type=int, default=5, help="number of times each message is formatted")
+    parser.add_argument("--results", help="JSON lines file to append results to and compare them with")
+    options = parser.parse_args(args)
+
+    size = int(options.size * 1000000)
+    times = _run(corpus=generate_corpus(size=size), repeats=options.repeats)
+    key = {"benchmark": "message_formatter", "size": size}
+    previous = find_previous(path=options.results, key=key) if options.results else None
+    for kind, seconds in times.items():
+        line = f"{kind:>14}: {seconds * 1000:9.2f} ms, {size / seconds / 1000000:8.1f} M chars/s"
+        if previous is not None and kind in previous["times"]:
+            line += f", previous ({previous['revision']}): {previous['times'][kind] * 1000:.2f} ms"
+        print(line)
+
+    if options.results:
+        result = dict(key, revision=get_revision(), python=sys.version.split()[0],
+                      time=time.strftime("%Y-%m-%dT%H:%M:%S"), times=times)
+        with open(options.results, "a", encoding="utf-8") as results:
+            results.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of memory footprint of models of suites, tests, keywords and their messages.
+
+Models of a synthetic suite are built with the models of the current tree and with model.py
+of the given revision, by default of the first revision, which keeps messages as dictionaries.
+Memory allocated for the models is traced with tracemalloc, the part of it taken by texts of messages
+is reported separately, as it does not depend on the models. Results can be appended to a JSON lines file,
+each run is then compared with the previous result of the same parameters.
+
+Usage:
+    python benchmarks/model_memory.py --tests 50000 --keywords 3 --messages 5 --results results.jsonl
+"""
+
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from types import ModuleType
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from reportportal_listener import model  # noqa: E402
+
+from results import find_previous, get_revision  # noqa: E402
+
+# Start and end time of all synthetic models.
+START_TIME = "20180101 00:00:00.000"
+END_TIME = "20180101 00:00:01.000"
+# The same time in milliseconds.
+START_TIME_MS = 1514764800000
+
+
+def load_model(revision: str) -> ModuleType:
+    """Loads model.py of the revision.
+
+    Args:
+        revision: git revision.
+    Returns:
+        Module with the models of the revision.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    source = subprocess.check_output(["git", "show", f"{revision}:reportportal_listener/model.py"], cwd=root)
+    module = ModuleType(f"model_{revision}")
+    exec(compile(source, f"{revision}:reportportal_listener/model.py", "exec"), module.__dict__)
+    return module
+
+
+def build_suite(models: ModuleType, tests: int, keywords: int, messages: int) -> Any:
+    """Builds models of a synthetic suite, as the listener builds them during the execution.
+
+    Messages are added as the listener of the revision keeps them: captured messages for Messages storage,
+    otherwise dictionaries prepared for Report Portal.
+
+    Args:
+        models: module with the models.
+        tests: number of tests.
+        keywords: number of keywords in each test.
+        messages: number of messages of each keyword.
+    Returns:
+        Suite model.
+    """
+    columnar = hasattr(models, "Messages")
+    suite = models.Suite(attributes={"id": "s1", "longname": "Benchmark", "doc": "", "metadata": {}, "source": "",
+                                     "suites": [], "tests": ["Test"], "totaltests": tests, "starttime": START_TIME})
+    for test_num in range(tests):
+        name = f"Test {test_num}"
+        test = models.Test(name=name, attributes={"id": f"s1-t{test_num + 1}", "longname": f"Benchmark.{name}",
+                                                  "doc": "", "tags": ["benchmark"], "starttime": START_TIME,
+                                                  "critical": "yes", "template": ""})
+        for keyword_num in range(keywords):
+            keyword = models.Keyword(name=f"BuiltIn.Keyword {keyword_num}", parent=test, attributes={
+                "kwname": f"Keyword {keyword_num}", "libname": "BuiltIn", "doc": "", "tags": [],
+                "args": [f"argument {keyword_num}"], "assign": [], "starttime": START_TIME, "type": "Keyword"})
+            for message_num in range(messages):
+                text = f"Message {message_num} of keyword {keyword_num} of test {test_num}"
+                if columnar:
+                    keyword.messages.append({"message": text, "level": "INFO", "timestamp": START_TIME_MS,
+                                             "keyword": keyword.name, "html": "no"})
+                else:
+                    keyword.messages.append({"time": str(START_TIME_MS), "message": text, "level": "INFO",
+                                             "attachment": None})
+            keyword.update(attributes={"status": "PASS", "endtime": END_TIME})
+            test.steps.append(keyword)
+        test.update(attributes={"status": "PASS", "tags": ["benchmark"], "endtime": END_TIME})
+        suite.tests.append(test)
+    return suite
+
+
+def measure(models: ModuleType, tests: int, keywords: int, messages: int) -> Dict[str, float]:
+    """Measures memory allocated for models of a synthetic suite.
+
+    Args:
+        models: module with the models.
+        tests: number of tests.
+        keywords: number of keywords in each test.
+        messages: number of messages of each keyword.
+    Returns:
+        Allocated memory and memory of texts of messages in megabytes, time of building in seconds.
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    suite = build_suite(models=models, tests=tests, keywords=keywords, messages=messages)
+    build_time = time.perf_counter() - start
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    texts = sum(sys.getsizeof(message["message"]) for test in suite.tests for keyword in test.steps
+                for message in keyword.messages)
+    del suite
+    gc.collect()
+    return {"memory": round(allocated / 1048576, 1), "texts": round(texts / 1048576, 1),
+            "build_time": round(build_time, 2)}
+
+
+def main(args: List[str] = None) -> None:
+    """Runs the benchmark.
+
+    Args:
+        args: command line arguments.
+    """
+    parser = ArgumentParser(description="Benchmark of memory footprint of models of suites, tests and keywords.")
+    parser.add_argument("--tests", type=int, default=50000, help="number of tests")
+    parser.add_argument("--keywords", type=int, default=3, help="number of keywords in each test")
+    parser.add_argument("--messages", type=int, default=5, help="number of messages of each keyword")
+    parser.add_argument("--revision", help="git revision to compare models with, the first revision by default")
+    parser.add_argument("--results", help="JSON lines file to append results to and compare them with")
+    options = parser.parse_args(args)
+
+    revision = options.revision or subprocess.check_output(
+        ["git", "rev-list", "--max-parents=0", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__))
+    ).decode().split()[0][:7]
+    params = {"tests": options.tests, "keywords": options.keywords, "messages": options.messages}
+    footprints = {revision: measure(models=load_model(revision=revision), **params),
+                  "current": measure(models=model, **params)}
+    for name, footprint in footprints.items():
+        print(f"{name:>8}: {footprint['memory']} MB, of which texts of messages {footprint['texts']} MB, "
+              f"built in {footprint['build_time']} s")
+    saved = footprints[revision]["memory"] - footprints["current"]["memory"]
+    print(f"{'':>8}  current models take {saved:.1f} MB "
+          f"({saved / footprints[revision]['memory']:.0%}) less than models of {revision}")
+
+    key = {"benchmark": "model_memory", "params": params}
+    if options.results:
+        previous = find_previous(path=options.results, key=key)
+        if previous is not None:
+            print(f"{'':>8}  previous ({previous['revision']}): {previous['memory']} MB")
+        result = dict(key, revision=get_revision(), python=sys.version.split()[0],
+                      time=time.strftime("%Y-%m-%dT%H:%M:%S"), memory=footprints["current"]["memory"],
+                      compared_with={revision: footprints[revision]})
+        with open(options.results, "a", encoding="utf-8") as results:
+            results.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of adding Report Portal links to output file.
+
+Compares loading output file with ExecutionResult, visiting and saving it
+with streaming rewrite by OutputFileModifier. Output file is generated and each approach is run
+in a separate process, so max resident set size of the process is reported for the approach only.
+
+Usage:
+    python benchmarks/output_file.py --tests 30000 --messages 3
+"""
+
+import os
+import resource
+import shutil
+import sys
+import time
+from argparse import ArgumentParser
+from multiprocessing import get_context
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from typing import Dict, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robot.result import ExecutionResult, Result, TestSuite  # noqa: E402
+
+from reportportal_listener import report_modifier  # noqa: E402
+from reportportal_listener.service import RobotService  # noqa: E402
+
+SUITE_NAME = "Benchmark"
+
+
+def generate_output(path: str, tests: int, messages: int) -> None:
+    """Writes synthetic output file.
+
+    Args:
+        path: path to output file.
+        tests: number of tests.
+        messages: number of log messages in each test.
+    """
+    suite = TestSuite(name=SUITE_NAME, starttime="20180101 00:00:00.000", endtime="20180101 00:00:01.000")
+    for test_num in range(tests):
+        test = suite.tests.create(name=f"Test {test_num}", doc=f"Documentation of test {test_num}", status="PASS",
+                                  starttime="20180101 00:00:00.000", endtime="20180101 00:00:01.000")
+        for message_num in range(messages):
+            keyword = test.keywords.create(kwname="Log", libname="BuiltIn", args=[f"message {message_num}"],
+                                           status="PASS", starttime="20180101 00:00:00.000",
+                                           endtime="20180101 00:00:00.001")
+            keyword.messages.create(message=f"message {message_num}", level="INFO",
+                                    timestamp="20180101 00:00:00.000")
+    Result(root_suite=suite).save(path)
+
+
+def _prepare_service(tests: int) -> None:
+    """Makes links available without Report Portal.
+
+    Args:
+        tests: number of tests.
+    """
+    RobotService.rp = SimpleNamespace(endpoint="http://reportportal.local", project="benchmark", launch_id="launch")
+    uri_parts: Dict[str, str] = {f"{SUITE_NAME}.Test {num}": f"/test{num}" for num in range(tests)}
+    uri_parts[SUITE_NAME] = "/suite"
+    report_modifier.RobotFrameworkReportModifier._get_rp_uri_parts = lambda self: uri_parts
+
+
+def _run(approach: str, path: str, tests: int) -> Tuple[float, int]:
+    """Adds links to output file with the given approach.
+
+    Args:
+        approach: "visitor" - ExecutionResult with RobotFrameworkReportModifier, "streaming" - OutputFileModifier.
+        path: path to output file.
+        tests: number of tests.
+    Returns:
+        Duration in seconds and max resident set size of the process in megabytes.
+    """
+    _prepare_service(tests=tests)
+    start = time.perf_counter()
+    if approach == "visitor":
+        result = ExecutionResult(path)
+        result.visit(report_modifier.RobotFrameworkReportModifier(robot_service=RobotService))
+        result.save()
+    else:
+        report_modifier.OutputFileModifier(robot_service=RobotService).modify(path=path)
+    return time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+
+
+def main() -> None:
+    """Runs the benchmark."""
+    parser = ArgumentParser(description="Benchmark of adding Report Portal links to output file.")
+    parser.add_argument("--tests", type=int, default=30000, help="number of tests in output file")
+    parser.add_argument("--messages", type=int, default=3, help="number of log messages in each test")
+    options = parser.parse_args()
+
+    context = get_context("spawn")
+    with TemporaryDirectory() as directory:
+        source = os.path.join(directory, "source.xml")
+        with context.Pool(processes=1) as pool:
+            pool.apply(generate_output, (source, options.tests, options.messages))
+        print(f"output file: {os.path.getsize(source) // 1024} KB, {options.tests} tests")
+        for approach in ("visitor", "streaming"):
+            path = os.path.join(directory, f"{approach}.xml")
+            shutil.copy(source, path)
+            with context.Pool(processes=1) as pool:
+                duration, max_rss = pool.apply(_run, (approach, path, options.tests))
+            print(f"{approach:>10}: {duration:.2f} s, max RSS {max_rss} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""Check of offline mode: a replayed journal sends the same requests as the listener sends online.
+
+Events of a synthetic execution with screenshots are passed to the listener sending requests to a fake
+Report Portal, and to the listener writing them to a journal. The journal with its attachments is moved
+to another directory and the output directory is removed, as if the journal is replayed on another machine.
+Then it is replayed to the fake Report Portal. Each step is run in a separate process, as the service
+of the listener is initialized once in a process. Exits with non-zero status if requests differ.
+
+Usage:
+    python benchmarks/replay.py --tests 100
+"""
+
+import os
+import shutil
+import sys
+from argparse import ArgumentParser
+from multiprocessing import get_context
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, Iterator, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_server import FakeReportPortal  # noqa: E402
+from listener import START_TIME, generate_events  # noqa: E402
+
+# Name of screenshots, each keyword writes its own screenshot, as SeleniumLibrary does.
+SCREENSHOT_NAME = "selenium-screenshot-{number}.png"
+
+
+def generate_events_with_screenshots(output_dir: str, tests: int) -> Iterator[Tuple[str, tuple]]:
+    """Generates events of a synthetic execution, each keyword logs a screenshot.
+
+    Screenshots are written to the output directory, which is removed before the journal is replayed.
+
+    Args:
+        output_dir: output directory screenshots are written to.
+        tests: number of tests.
+    Returns:
+        Iterator over names of listener callbacks and their arguments.
+    """
+    screenshots = 0
+    for callback, args in generate_events(tests=tests, keywords=2, depth=1, messages=1):
+        yield callback, args
+        if callback == "start_keyword":
+            screenshots += 1
+            name = SCREENSHOT_NAME.format(number=screenshots)
+            with open(os.path.join(output_dir, name), "wb") as screenshot:
+                screenshot.write(b"\x89PNG screenshot %d" % screenshots)
+            yield "log_message", ({"message": f'</td></tr><tr><td colspan="3"><a href="{name}">'
+                                              f'<img src="{name}" width="800px"></a>',
+                                   "level": "INFO", "timestamp": START_TIME, "html": "yes"},)
+
+
+def _run_listener(endpoint: str, output_dir: str, tests: int, variables: Dict[str, Any]) -> None:
+    """Passes events of a synthetic execution to the listener.
+
+    Args:
+        endpoint: Report Portal endpoint.
+        output_dir: output directory.
+        tests: number of tests.
+        variables: additional variables of the listener.
+    """
+    from reportportal_listener import reportportal_listener
+    from reportportal_listener.variables import preset_variables
+
+    preset_variables(RP_ENDPOINT=endpoint, RP_UUID="replay", RP_PROJECT="replay", RP_LAUNCH="Replay",
+                     OUTPUT_DIR=output_dir, **variables)
+    listener = reportportal_listener()
+    for callback, args in generate_events_with_screenshots(output_dir=output_dir, tests=tests):
+        getattr(listener, callback)(*args)
+    listener.close()
+
+
+def _replay(endpoint: str, path: str) -> None:
+    """Replays the journal.
+
+    Args:
+        endpoint: Report Portal endpoint.
+        path: path to the journal.
+    """
+    from reportportal_listener.spool import replay_journal
+
+    replay_journal(path=path, endpoint=endpoint, project="replay", uuid="replay")
+
+
+def _collect(server: FakeReportPortal) -> Dict[str, Any]:
+    """Collects requests received by the stub and resets its counters.
+
+    Args:
+        server: Report Portal stub.
+    Returns:
+        Numbers of requests by kind and number of attachments.
+    """
+    received = {"requests": dict(server.requests), "attachments": server.attachments}
+    server.reset()
+    return received
+
+
+def main(args: List[str] = None) -> None:
+    """Runs the check.
+
+    Args:
+        args: command line arguments.
+    """
+    parser = ArgumentParser(description="Check of replay of the offline journal with a fake Report Portal.")
+    parser.add_argument("--tests", type=int, default=100, help="number of tests of the synthetic execution")
+    options = parser.parse_args(args)
+
+    context = get_context("spawn")
+    with FakeReportPortal() as server, TemporaryDirectory() as directory:
+        online_dir, offline_dir, moved_dir = (os.path.join(directory, name)
+                                              for name in ("online", "offline", "moved"))
+        for path in (online_dir, offline_dir, moved_dir):
+            os.makedirs(path)
+
+        with context.Pool(processes=1) as pool:
+            pool.apply(_run_listener, (server.endpoint, online_dir, options.tests, {}))
+        online = _collect(server=server)
+
+        journal = os.path.join(offline_dir, "rp_journal.bin")
+        with context.Pool(processes=1) as pool:
+            pool.apply(_run_listener, (server.endpoint, offline_dir, options.tests, {"RP_SPOOL_FILE": journal}))
+        offline = _collect(server=server)
+
+        shutil.move(journal, moved_dir)
+        shutil.move(journal + ".attachments", moved_dir)
+        shutil.rmtree(offline_dir)
+        with context.Pool(processes=1) as pool:
+            pool.apply(_replay, (server.endpoint, os.path.join(moved_dir, "rp_journal.bin")))
+        replayed = _collect(server=server)
+
+    print(f"  online: {online}")
+    print(f" offline: {offline}")
+    print(f"replayed: {replayed}")
+    # Log requests of the journal are joined, so only their attachments are compared.
+    online["requests"].pop("log", None)
+    replayed["requests"].pop("log", None)
+    if offline["requests"] or online != replayed:
+        sys.exit("Replayed requests differ from requests sent online.")
+    print("Replayed requests are the same as requests sent online.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""Results of benchmarks saved in JSON lines files, so runs can be compared between revisions."""
+
+import json
+import os
+import subprocess
+from typing import Any, Dict, Optional
+
+
+def get_revision() -> str:
+    """Gets git revision of the benchmarked code.
+
+    Returns:
+        Revision, "unknown" if it can not be determined.
+    """
+    try:
+        return subprocess.check_output(["git", "describe", "--always", "--dirty"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def find_previous(path: str, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Finds the last saved result with the same scenario, parameters and variables.
+
+    Args:
+        path: path to JSON lines file with results.
+        key: scenario, parameters and variables.
+    Returns:
+        Result, None if there is no such result.
+    """
+    if not os.path.exists(path):
+        return None
+    previous = None
+    with open(path, encoding="utf-8") as results:
+        for line in results:
+            result = json.loads(line)
+            if all(result.get(name) == value for name, value in key.items()):
+                previous = result
+    return previous
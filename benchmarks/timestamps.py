@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""Check and benchmark of parsing of Robot Framework timestamps without strptime.
+
+Random times are converted by the listener and by strptime in several time zones, including times
+around transitions of daylight saving time, and values must be the same. Conversion of the same times
+by both is then timed. Exits with non-zero status if any value differs.
+
+Usage:
+    python benchmarks/timestamps.py --values 200000
+"""
+
+import os
+import random
+import sys
+import time
+from argparse import ArgumentParser
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportportal_listener.service import RF_TIME_FORMAT, _rf_seconds_to_timestamp, timestamp  # noqa: E402
+
+# Time zones with and without daylight saving time, with offsets not divisible by an hour.
+TIME_ZONES = ["UTC", "Europe/Moscow", "America/New_York", "Australia/Adelaide", "Asia/Kolkata"]
+# Transitions of daylight saving time: spring forward and fall back in Europe and America.
+DST_TRANSITIONS = [datetime(2018, 3, 25, 2, 30), datetime(2018, 10, 28, 2, 30),
+                   datetime(2018, 3, 11, 2, 30), datetime(2018, 11, 4, 1, 30)]
+
+
+def generate_times(values: int, seed: int) -> List[str]:
+    """Generates random times in the format of Robot Framework.
+
+    Half of times are uniformly distributed over years, the other half are within two hours
+    of transitions of daylight saving time. Fractions of second have 1 to 6 digits.
+
+    Args:
+        values: number of times.
+        seed: seed of random numbers.
+    Returns:
+        Times in the format of Robot Framework.
+    """
+    rand = random.Random(seed)
+    start = datetime(1990, 1, 1)
+    times = []
+    for num in range(values):
+        if num % 2:
+            moment = rand.choice(DST_TRANSITIONS) + timedelta(seconds=rand.uniform(-7200, 7200))
+        else:
+            moment = start + timedelta(seconds=rand.uniform(0, 50 * 365 * 86400))
+        digits = rand.randint(1, 6)
+        times.append(moment.strftime("%Y%m%d %H:%M:%S.") + f"{moment.microsecond:06d}"[:digits])
+    return times
+
+
+def _strptime_timestamp(rf_time: str) -> str:
+    """Converts time with strptime, as it was converted before parsing without strptime.
+
+    Args:
+        rf_time: time in the format of Robot Framework.
+    Returns:
+        Time stamp for use in the log.
+    """
+    return str(int(datetime.strptime(rf_time, RF_TIME_FORMAT).timestamp() * 1000))
+
+
+def main(args: List[str] = None) -> None:
+    """Runs the check.
+
+    Args:
+        args: command line arguments.
+    """
+    parser = ArgumentParser(description="Check of parsing of Robot Framework timestamps without strptime.")
+    parser.add_argument("--values", type=int, default=200000, help="number of random times in each time zone")
+    parser.add_argument("--seed", type=int, default=0, help="seed of random numbers")
+    options = parser.parse_args(args)
+
+    times = generate_times(values=options.values, seed=options.seed)
+    failed = False
+    for zone in TIME_ZONES:
+        os.environ["TZ"] = zone
+        time.tzset()
+        # Converted seconds are cached for the time zone of the process.
+        _rf_seconds_to_timestamp.cache_clear()
+        different = [rf_time for rf_time in times if timestamp(rf_time=rf_time) != _strptime_timestamp(rf_time)]
+
+        start = time.perf_counter()
+        for rf_time in times:
+            timestamp(rf_time=rf_time)
+        parsed = time.perf_counter() - start
+        start = time.perf_counter()
+        for rf_time in times:
+            _strptime_timestamp(rf_time)
+        strptime = time.perf_counter() - start
+
+        print(f"{zone:>18}: {len(different)} of {len(times)} values differ, "
+              f"{strptime / parsed:.1f} times faster than strptime")
+        for rf_time in different[:5]:
+            print(f"{'':>20}{rf_time}: {timestamp(rf_time=rf_time)} != {_strptime_timestamp(rf_time)}")
+        failed = failed or bool(different)
+
+    if failed:
+        sys.exit("Parsed timestamps differ from timestamps parsed by strptime.")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,23 +5,20 @@ import logging
 from os import environ
 from typing import Any, Dict, List, Optional, Union
 
-from robot.api import ExecutionResult
 from robot.libraries.BuiltIn import BuiltIn
 from robot.utils import get_error_message
 
+from .coordinator import PABOT_LIB_LAUNCH_ID, PABOT_LIB_LAUNCH_LOCK, PabotLaunchCoordinator  # noqa: F401
 from .model import Keyword, Test, Suite
-from .service import RobotService
-from .variables import Variables
+from .service import RobotService, rf_time_to_milliseconds
+from .variables import Settings
+from .log_filter import LogFilter
 from .message import MessageFormatter
-from .service import timestamp
-from .report_modifier import RobotFrameworkReportModifier
+from .metrics import metrics
+from .report_modifier import OutputFileModifier
 
 # The id of the first suite keyword in the Robot Framework html log.
 FIRST_SUITE_ID = "s1"
-# The key for using the Report Portal launch ID between the pabotlib threads.
-PABOT_LIB_LAUNCH_ID = "PABOT_LIB_LAUNCH_ID"
-# The key for blocking the initial initialization of the Report Portal launch.
-PABOT_LIB_LAUNCH_LOCK = "PABOT_LIB_LAUNCH_LOCK"
 
 # Disable redundant logging in the report portal client.
 logging.getLogger(name="reportportal_client").setLevel(logging.WARNING)
@@ -44,12 +41,29 @@ class reportportal_listener(object):  # noqa
         """
         self._launch_id = launch_id
         self._service = RobotService
-        self._pabot_used: Optional[str] = None
+        self._coordinator: Optional[PabotLaunchCoordinator] = None
         self._suite: Optional[Suite] = None
         self._test: Optional[Test] = None
         self._keyword: Optional[Keyword] = None
         self._current_scope: Union[Suite, Test, Keyword, None] = None
-        self._variables = Variables()
+        # Depth of nested keywords which are not reported, models are not created for them.
+        self._skipped_depth = 0
+        self._log_filter: Optional[LogFilter] = None
+        self._settings: Optional[Settings] = None
+
+    @property
+    def settings(self) -> Settings:
+        """Gets listener settings.
+
+        Raises:
+            RuntimeError if settings are not resolved yet.
+        Returns:
+            Settings resolved at the start of the execution.
+        """
+        if self._settings is None:
+            raise RuntimeError("Settings are not resolved.")
+
+        return self._settings
 
     @property
     def suite(self) -> Suite:
@@ -108,37 +122,82 @@ class reportportal_listener(object):  # noqa
         return self._current_scope
 
     @property
-    def pabot_used(self) -> Optional[str]:
+    def log_filter(self) -> LogFilter:
+        """Gets filter of log messages.
+
+        Returns:
+            Filter configured by variables.
+        """
+        if self._log_filter is None:
+            self._log_filter = LogFilter(level=self.settings.log_level, include=self.settings.log_include,
+                                         exclude=self.settings.log_exclude)
+        return self._log_filter
+
+    @property
+    def pabot_used(self) -> str:
         """Get status of using pabot for test execution.
 
         Returns:
-            Cached value of Pabotlib URI.
+            Pabotlib URI, empty string if pabot is not used.
         """
-        if not self._pabot_used:
-            self._pabot_used = self.builtin_lib.get_variable_value(name="${PABOTLIBURI}")
-        return self._pabot_used
+        return self.settings.pabotlib_uri
 
+    @metrics.timed("listener.log_message")
     def log_message(self, message: Dict[str, str]) -> None:
         """Log message of current executing keyword.
 
         Adds log message to current keyword.
-        Message will be added if keyword is at top level or keyword type is setup/teardown,
-         keyword is not WUKS and message level is not "FAIL".
+        Message will be added if keyword is reported, i.e. it is at top level, keyword type is setup/teardown
+         or it is reported as an item, keyword is not WUKS and message is accepted by the log filter.
+        Messages with level "FAIL" are not accepted, errors are logged from statuses of keywords and tests.
+        Filter is checked first, so dropped messages are not formatted.
+        Status of screenshots is checked now, as messages are sent later and screenshot files may be written again.
 
         Args:
             message: current message passed from test by test executor.
         """
-        if self.keyword.is_top_level or self.keyword.is_setup_or_teardown:
-            if not self.keyword.is_wuks and message["level"] != "FAIL":
-                message = self._prepare_message(message)
-                self.keyword.messages.append(message)
+        if self._skipped_depth or not self.log_filter.accepts(level=message["level"], keyword_name=self.keyword.name):
+            return
+
+        if not self.keyword.is_wuks:
+            message = self._prepare_message(message)
+            MessageFormatter.stamp_screenshot(message=message, output_dir=self._service.output_dir)
+            self.keyword.messages.append(message)
+            if self._service.image_processor is not None:
+                MessageFormatter.prepare_attachment(message=message["message"],
+                                                    image_processor=self._service.image_processor,
+                                                    output_dir=self._service.output_dir)
 
     def _init_service(self) -> None:
         """Init report portal service."""
         # Setting launch id for report portal service.
-        self._service.init_service(endpoint=self._variables.endpoint, project=self._variables.project,
-                                   uuid=self._variables.uuid)
-
+        self._service.init_service(endpoint=self.settings.endpoint, project=self.settings.project,
+                                   uuid=self.settings.uuid, async_mode=self.settings.async_mode,
+                                   queue_size=self.settings.queue_size, close_timeout=self.settings.close_timeout,
+                                   log_batch_size=self.settings.log_batch_size,
+                                   log_batch_max_bytes=self.settings.log_batch_max_bytes,
+                                   log_batch_workers=self.settings.log_batch_workers,
+                                   spool_file=self.settings.spool_file,
+                                   item_index_file=self.settings.item_index_file,
+                                   pool_size=self.settings.pool_size, timeout=self.settings.timeout,
+                                   retries=self.settings.retries, gzip_logs=self.settings.gzip_logs,
+                                   uploader_socket=self.settings.uploader_socket,
+                                   output_dir=self.settings.output_dir,
+                                   attachment_max_size=self.settings.attachment_max_size,
+                                   message_max_length=self.settings.message_max_length,
+                                   spill_messages=self.settings.spill_messages,
+                                   deduplicate_attachments=self.settings.deduplicate_attachments,
+                                   image_min_size=self.settings.image_min_size,
+                                   image_format=self.settings.image_format,
+                                   image_max_dimension=self.settings.image_max_dimension,
+                                   image_workers=self.settings.image_workers)
+        # All paths are read now, as variables are not available when metrics are saved in close.
+        metrics_files = [self.settings.metrics_file, self.settings.metrics_prometheus_file,
+                         self.settings.metrics_trace_file]
+        if any(metrics_files):
+            metrics.enable(trace=bool(self.settings.metrics_trace_file))
+
+    @metrics.timed("listener.start_suite")
     def start_suite(self, name: str, attributes: Dict[str, Any]) -> None:
         """Do additional actions before suite start.
 
@@ -149,6 +208,9 @@ class reportportal_listener(object):  # noqa
             name: suite name.
             attributes: suite attributes dictionary.
         """
+        if self._settings is None:
+            # Settings are resolved once, they are not looked up in Robot Framework variables after that.
+            self._settings = Settings.resolve(launch_name_required=self._launch_id is None)
         if self._service.rp is None:
             self._init_service()
 
@@ -158,21 +220,31 @@ class reportportal_listener(object):  # noqa
             # If launch id is specified - use it.
             # Otherwise, create launch automatically.
             if self._launch_id is not None:
-                self._service.rp.launch_id = self._launch_id
+                self._service.use_launch(launch_id=self._launch_id)
+            elif self.pabot_used and not self.settings.spool_file:
+                # Share one launch between pabot executions, the first of them creates it.
+                self.suite.doc = self.settings.launch_doc
+                self._coordinator = PabotLaunchCoordinator()
+                launch_id = self._coordinator.get_launch_id(
+                    start_launch=lambda: self._service.start_launch(launch_name=self.settings.launch_name,
+                                                                    launch_tags=self.settings.launch_tags,
+                                                                    launch=self.suite))
+                self._service.use_launch(launch_id=launch_id)
             else:
                 # In case running tests using robot we can create launch automatically.
                 if self.pabot_used:
-                    raise Exception("Pabot used but launch_id is not provided. "
+                    raise Exception("Pabot used in offline mode but launch_id is not provided. "
                                     "Please, correctly initialize listener with launch_id argument.")
                 # Fill launch description with contents of corresponding variable value.
-                self.suite.doc = self._variables.launch_doc
+                self.suite.doc = self.settings.launch_doc
                 # Automatically create new report portal launch and save it into the service instance.
-                self._service.rp.launch_id = self._service.start_launch(launch_name=self._variables.launch_name,
-                                                                        launch_tags=self._variables.launch_tags,
+                self._service.rp.launch_id = self._service.start_launch(launch_name=self.settings.launch_name,
+                                                                        launch_tags=self.settings.launch_tags,
                                                                         launch=self.suite)
         if attributes["tests"]:
             self._service.start_suite(suite=self.suite)
 
+    @metrics.timed("listener.end_suite")
     def end_suite(self, name: str, attributes: Dict[str, Any]) -> None:
         """Do additional actions after suite run.
 
@@ -201,7 +273,18 @@ class reportportal_listener(object):  # noqa
                 # thus we can finish a launch automatically.
                 if not self.pabot_used:
                     self._service.finish_launch(launch=self.suite)
-
+                elif self._coordinator is not None:
+                    # With pabot, the launch is finished by the last execution, when all its requests are sent.
+                    if not self._service.flush():
+                        # The execution is still counted, otherwise the launch is never finished.
+                        self.builtin_lib.log_to_console(
+                            f"[reportportal-listener] Requests of the pabot execution were not sent to Report Portal "
+                            f"in {self.settings.close_timeout} seconds, the shared launch may be finished "
+                            f"before they are sent.")
+                    self._coordinator.finish_execution(
+                        finish_launch=lambda: self._service.finish_launch(launch=self.suite))
+
+    @metrics.timed("listener.start_test")
     def start_test(self, name: str, attributes: Dict[str, Union[str, List[str]]]) -> None:
         """Do additional actions before test run.
 
@@ -212,11 +295,17 @@ class reportportal_listener(object):  # noqa
             attributes: test attributes.
         """
         self._test = self._current_scope = Test(name=name, attributes=attributes)
+        if self.settings.keyword_depth:
+            # Keywords are reported as items of the test when they start, so the test item is started now.
+            self._service.start_test(test=self.test)
 
+    @metrics.timed("listener.end_test")
     def end_test(self, name: str, attributes: Dict[str, Union[str, List[str]]]) -> None:
         """Do additional actions after test run.
 
         Update Test model and add to current suite.
+        In streaming mode send test logs to Report Portal.
+        If keywords are reported as items, the test item is left unfinished, the same as in streaming mode.
 
         Args:
             name: test name.
@@ -230,19 +319,32 @@ class reportportal_listener(object):  # noqa
                 msg["level"] = "WARN"
             self.test.message = self._prepare_message(msg)
 
+        if self.settings.keyword_depth:
+            self.test.open_items.append(self._service.detach_item())
+        elif self.settings.stream_tests:
+            self._rp_stream_test(test=self.test)
+
         self.suite.tests.append(self.test)
         self._current_scope = self.suite
 
+    @metrics.timed("listener.start_keyword")
     def start_keyword(self, name: str, attributes: Dict[str, Union[str, List[str]]]) -> None:
         """Do additional actions before keyword starts.
 
         Create Keyword model for current keyword, if it is at top level or a fixture.
         Add Keyword model to corresponding parent model.
+        Only the depth is counted for keywords, which are not reported.
+        If keywords are reported as items, the item is started now, after messages logged by the parent
+        keyword before it are sent, and the model is not added to the steps of the parent.
 
         Args:
             name: keyword name.
             attributes: keyword attributes.
         """
+        if self._skipped_depth or not self._is_reported_keyword(attributes=attributes):
+            self._skipped_depth += 1
+            return
+
         self._keyword = self._current_scope = Keyword(name=name, attributes=attributes, parent=self.current_scope)
         if self.keyword.is_setup_or_teardown and isinstance(self.keyword.parent, Test):
             self.keyword.tags = self.keyword.parent.tags
@@ -251,23 +353,54 @@ class reportportal_listener(object):  # noqa
             self.keyword.parent.setup = self.keyword
         elif attributes["type"] == "Teardown" and not isinstance(self.keyword.parent, Keyword):
             self.keyword.parent.teardown = self.keyword
-        elif self._keyword.is_top_level and not isinstance(self.keyword.parent, Suite):
+        elif self._keyword.is_top_level and not isinstance(self.keyword.parent, Suite) \
+                and not self.settings.keyword_depth:
             self.keyword.parent.steps.append(self.keyword)
 
+        if self.settings.keyword_depth:
+            if isinstance(self.keyword.parent, Keyword):
+                self._rp_log_keyword_messages(keyword=self.keyword.parent)
+            self._service.start_keyword(keyword=self.keyword)
+
+    def _is_reported_keyword(self, attributes: Dict[str, Any]) -> bool:
+        """Check the started keyword is added to the model of the test or the suite.
+
+        These are setup, teardown and steps of tests, setup and teardown of suites, and steps of these setups
+        and teardowns. Other keywords are nested in steps, their messages are not sent to Report Portal,
+        unless keywords are reported as items down to the configured depth.
+
+        Args:
+            attributes: keyword attributes.
+        Returns:
+            True if the keyword is reported, otherwise - False.
+        """
+        parent = self.current_scope
+        if not isinstance(parent, Keyword):
+            return True
+        if parent.is_setup_or_teardown and attributes["type"] not in ("Setup", "Teardown"):
+            return True
+        return parent.level < self.settings.keyword_depth
+
+    @metrics.timed("listener.end_keyword")
     def end_keyword(self, name: str, attributes: Dict[str, Union[str, List[str]]]) -> None:
         """Do additional actions after keyword ends.
 
         Update current Keyword model.
         For keywords with type "BEFORE_SUITE" and "AFTER_SUITE" send logs to Report Portal.
+        If keywords are reported as items, remaining messages of the keyword are sent and its item is finished.
 
         Args:
             name: keyword name.
             attributes: keyword attributes.
         """
+        if self._skipped_depth:
+            self._skipped_depth -= 1
+            return
+
         self.keyword.update(attributes=attributes)
 
         if self.keyword.is_setup_or_teardown:
-            error_message = get_error_message()
+            error_message = self._get_keyword_error(attributes=attributes)
             message = {"message": error_message, "level": "FAIL", "timestamp": self.keyword.end_time}
             if self.keyword.status == "FAIL":
                 message = self._prepare_message(message=message)
@@ -278,30 +411,42 @@ class reportportal_listener(object):  # noqa
                 message = self._prepare_message(message=message)
                 self.keyword.messages.append(message)
 
-        if self.keyword.rp_item_type in ["BEFORE_SUITE", "AFTER_SUITE"]:
+        if self.settings.keyword_depth:
+            self._rp_log_keyword_messages(keyword=self.keyword)
+            self._service.finish_keyword(keyword=self.keyword)
+        elif self.keyword.rp_item_type in ["BEFORE_SUITE", "AFTER_SUITE"]:
             self._rp_log_fixture_keyword(keyword=self.keyword)
 
         self._current_scope = self.keyword.parent
         if isinstance(self.current_scope, Keyword):
             self._keyword = self.current_scope
 
+    @metrics.timed("listener.output_file")
     def output_file(self, path: str) -> None:
         """Called when writing to an output file is ready.
 
         Adds Report Portal links to output file.
+        Links are not added in offline mode, as the launch is not created yet.
 
         Args:
             path: absolute path to output file.
         """
-        result = ExecutionResult(path)
-        result.visit(RobotFrameworkReportModifier(robot_service=RobotService))
-        result.save()
+        if self.settings.spool_file:
+            return
+
+        OutputFileModifier(robot_service=RobotService).modify(path=path)
 
     def close(self) -> None:
         """Called when the whole test execution ends.
         Terminating service.
         """
         self._service.terminate_service()
+        if self._coordinator is not None:
+            self._coordinator.report_throughput(*self._service.get_request_statistics())
+        if metrics.enabled:
+            metrics.save(json_file=self.settings.metrics_file,
+                         prometheus_file=self.settings.metrics_prometheus_file,
+                         trace_file=self.settings.metrics_trace_file)
 
     def _rp_log_steps(self, steps: List[Keyword], additional_msgs: List[Dict[str, Any]] = None) -> None:
         """Send steps logs of test or keyword to Report Portal.
@@ -321,6 +466,16 @@ class reportportal_listener(object):  # noqa
 
         self._service.log(log_data=messages)
 
+    def _rp_log_keyword_messages(self, keyword: Keyword) -> None:
+        """Send messages of the keyword reported as an item, which are not sent yet, to Report Portal.
+
+        Args:
+            keyword: logging keyword, its item is the current item.
+        """
+        if len(keyword.messages):
+            self._service.log(log_data=list(keyword.messages))
+            keyword.messages.clear()
+
     def _rp_log_fixture_keyword(self, keyword: Optional[Keyword]) -> None:
         """Send fixture keyword logs to Report Portal.
 
@@ -332,10 +487,10 @@ class reportportal_listener(object):  # noqa
             self._service.start_keyword(keyword=keyword)
 
             if keyword.steps:
-                error_messages = [msg for msg in keyword.messages if msg["level"] == "ERROR"]
+                error_messages = [msg for msg in keyword.messages if msg["level"] in ("FAIL", "ERROR")]
                 self._rp_log_steps(steps=keyword.steps, additional_msgs=error_messages)
             else:
-                self._service.log(log_data=keyword.messages)
+                self._service.log(log_data=list(keyword.messages))
 
             self._service.finish_keyword(keyword=keyword)
 
@@ -346,8 +501,12 @@ class reportportal_listener(object):  # noqa
             if error_msg:
                 if test.status != "SKIP":
                     test.status = "FAIL"
-                if environ.get("STACK_TRACE_DESCRIPTION") == '1':
-                    test.doc += f"\n```error\n{error_msg['message']}\n```"
+                if environ.get("STACK_TRACE_DESCRIPTION") == '1' and not test.open_items:
+                    test.doc += f"\n```error\n{MessageFormatter.format_text(message=error_msg['message'])}\n```"
+
+            if test.open_items:
+                self._rp_finish_streamed_test(test=test, error_msg=error_msg)
+                continue
 
             self._service.start_test(test=test)
 
@@ -366,19 +525,78 @@ class reportportal_listener(object):  # noqa
 
             self._service.finish_test(test=test)
 
+    def _rp_stream_test(self, test: Test) -> None:
+        """Send logs of the ended test to Report Portal and free them.
+
+        Test items are left unfinished, because the suite teardown may change the test status.
+        They are finished with the test error message at the end of suite.
+
+        Args:
+            test: instance of Test model.
+        """
+        error_msg = self._get_test_error(test=test)
+        if error_msg and environ.get("STACK_TRACE_DESCRIPTION") == '1':
+            test.doc += f"\n```error\n{MessageFormatter.format_text(message=error_msg['message'])}\n```"
+
+        self._service.start_test(test=test)
+
+        if test.setup or test.teardown:
+            self._rp_log_fixture_keyword(keyword=test.setup)
+            if test.setup:
+                test.start_time = test.setup.end_time
+
+            self._service.start_test(test=test)
+            self._rp_log_steps(steps=test.steps)
+            test.open_items.append(self._service.detach_item())
+            self._rp_log_fixture_keyword(keyword=test.teardown)
+        else:
+            self._rp_log_steps(steps=test.steps)
+
+        test.open_items.append(self._service.detach_item())
+        test.setup = test.teardown = None
+        test.steps = []
+
+    def _rp_finish_streamed_test(self, test: Test, error_msg: Dict[str, Any]) -> None:
+        """Finish test items left unfinished by streaming.
+
+        Args:
+            test: instance of Test model.
+            error_msg: test error message, it is logged to the innermost test item.
+        """
+        for item in test.open_items:
+            self._service.attach_item(handle=item)
+            if error_msg:
+                self._service.log(log_data=[error_msg])
+                error_msg = {}
+            self._service.finish_test(test=test)
+
+        test.open_items = []
+
     def _prepare_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
-        """Prepare message for sending to Report Portal.
+        """Capture message for sending to Report Portal.
+
+        Message is formatted when it is sent, only the name of the current keyword is added to it now,
+        and its time is converted to milliseconds, which are kept by Messages.
 
         Args:
-            message (dict): message for preparing.
+            message (dict): message with Robot Framework message, level and timestamp.
         Returns:
-            Message dictionary, contains LEVEL, MESSAGE, TIME, ATTACHMENT.
+            Message dictionary, contains MESSAGE, LEVEL, TIMESTAMP in milliseconds, KEYWORD.
         """
-        message["timestamp"] = timestamp(rf_time=message["timestamp"])
-        message["level"] = self._service.log_level_mapping[message["level"]]
-        message = MessageFormatter.format_message(message=message, keyword_name=self.keyword.name)
+        message["keyword"] = self.keyword.name
+        message["timestamp"] = rf_time_to_milliseconds(rf_time=message["timestamp"])
         return message
 
+    def _get_keyword_error(self, attributes: Dict[str, Any]) -> str:
+        """Gets error message of the ended keyword.
+
+        Args:
+            attributes: keyword attributes.
+        Returns:
+            Error message.
+        """
+        return get_error_message()
+
     def _get_test_error(self, test: Test) -> Dict[str, Any]:
         """Gets test error considering Suite errors.
 
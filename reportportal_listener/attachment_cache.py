@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# Max number of files and contents remembered by the cache.
+ATTACHMENT_CACHE_SIZE = 10000
+# Size of chunks files are hashed by.
+HASH_CHUNK_SIZE = 1048576
+
+
+class AttachmentCache(object):
+    """Content hashes of files attached in a launch, so files with the same content are attached once.
+
+    Files are hashed once for each path and modification time, contents of files are not kept.
+    Both hashes of files and attached contents are evicted when they are least recently used,
+    a repeated file with evicted content is attached again.
+    """
+
+    def __init__(self, max_size: int = ATTACHMENT_CACHE_SIZE) -> None:
+        """Initialization.
+
+        Args:
+            max_size: max number of remembered files, and of remembered attached contents.
+        """
+        self.max_size = max_size
+        self.repeated = 0
+        self.repeated_bytes = 0
+        self._hashes: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._attached: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def find_attached(self, path: str) -> Optional[str]:
+        """Find earlier attachment with the same content as the file, or remember the file as attached.
+
+        Args:
+            path: path to the file.
+        Returns:
+            Name of the earlier attachment, None if the content is attached for the first time.
+        """
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._get(self._hashes, key)
+        if digest is None:
+            digest = self._hash_file(path=path)
+
+        with self._lock:
+            self._put(self._hashes, key, digest)
+            name = self._get(self._attached, digest)
+            if name is None:
+                self._put(self._attached, digest, os.path.basename(path))
+            else:
+                self.repeated += 1
+                self.repeated_bytes += stat.st_size
+            return name
+
+    def _get(self, entries: OrderedDict, key: object) -> Optional[str]:
+        """Get the entry and mark it as recently used.
+
+        Args:
+            entries: hashes of files or attached contents.
+            key: key of the entry.
+        Returns:
+            Value of the entry, None if there is no such entry.
+        """
+        value = entries.get(key)
+        if value is not None:
+            entries.move_to_end(key)
+        return value
+
+    def _put(self, entries: OrderedDict, key: object, value: str) -> None:
+        """Add the entry, evicting the least recently used entry if there are too many entries.
+
+        Args:
+            entries: hashes of files or attached contents.
+            key: key of the entry.
+            value: value of the entry.
+        """
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self.max_size:
+            entries.popitem(last=False)
+
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        """Hash content of the file.
+
+        Args:
+            path: path to the file.
+        Returns:
+            SHA-256 hash of the content.
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as attachment:
+            for chunk in iter(lambda: attachment.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
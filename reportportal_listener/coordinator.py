@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Callable
+
+from robot.api import logger
+from robot.utils import is_truthy
+
+from .variables import get_variable
+
+# The key for using the Report Portal launch ID between the pabotlib threads.
+PABOT_LIB_LAUNCH_ID = "PABOT_LIB_LAUNCH_ID"
+# The key for blocking the initial initialization of the Report Portal launch.
+PABOT_LIB_LAUNCH_LOCK = "PABOT_LIB_LAUNCH_LOCK"
+# The key for the number of pabot executions logging to the launch.
+PABOT_LIB_LAUNCH_EXECUTIONS = "PABOT_LIB_LAUNCH_EXECUTIONS"
+# The key for the number of pabot executions which have sent all their requests to the launch.
+PABOT_LIB_LAUNCH_FINISHED_EXECUTIONS = "PABOT_LIB_LAUNCH_FINISHED_EXECUTIONS"
+
+
+class PabotLaunchCoordinator(object):
+    """Class for sharing one Report Portal launch between pabot executions.
+
+    The first execution creates the launch under pabotlib lock and publishes its id, other executions use it.
+    The execution started last by pabot publishes the number of executions, as executions are started
+    in the order of pabot queue. The launch is finished by the execution, which finishes the last of them.
+    Pabot must be run with --pabotlib option.
+    """
+
+    def __init__(self) -> None:
+        """Initialization, should be called while Robot Framework is running.
+
+        Raises:
+            RuntimeError: if pabot can not be imported.
+        """
+        try:
+            from pabot.pabotlib import PabotLib
+        except ImportError:
+            raise RuntimeError("Pabot used but robotframework-pabot can not be imported. "
+                               "Please, install it or initialize listener with launch_id argument.")
+
+        self._pabotlib = PabotLib()
+        self._queue_index = int(get_variable("PABOTQUEUEINDEX", 0))
+        self._last_execution = is_truthy(get_variable("PABOTISLASTEXECUTIONINPOOL", False))
+
+    def get_launch_id(self, start_launch: Callable[[], str]) -> str:
+        """Gets id of the launch shared between pabot executions, starts the launch if it does not exist.
+
+        Args:
+            start_launch: function starting the launch and returning its id.
+        Returns:
+            Launch id.
+        """
+        self._pabotlib.acquire_lock(PABOT_LIB_LAUNCH_LOCK)
+        try:
+            launch_id = self._pabotlib.get_parallel_value_for_key(PABOT_LIB_LAUNCH_ID)
+            if not launch_id:
+                launch_id = start_launch()
+                self._pabotlib.set_parallel_value_for_key(PABOT_LIB_LAUNCH_ID, launch_id)
+            if self._last_execution:
+                self._pabotlib.set_parallel_value_for_key(PABOT_LIB_LAUNCH_EXECUTIONS, self._queue_index + 1)
+        finally:
+            self._pabotlib.release_lock(PABOT_LIB_LAUNCH_LOCK)
+
+        return launch_id
+
+    def finish_execution(self, finish_launch: Callable[[], Any]) -> bool:
+        """Counts the execution as finished, finishes the launch if it is the last finished execution.
+
+        Should be called when all requests of the execution are sent to Report Portal.
+
+        Args:
+            finish_launch: function finishing the launch.
+        Returns:
+            True if the launch is finished, otherwise - False.
+        """
+        self._pabotlib.acquire_lock(PABOT_LIB_LAUNCH_LOCK)
+        try:
+            finished = int(self._pabotlib.get_parallel_value_for_key(PABOT_LIB_LAUNCH_FINISHED_EXECUTIONS) or 0) + 1
+            self._pabotlib.set_parallel_value_for_key(PABOT_LIB_LAUNCH_FINISHED_EXECUTIONS, finished)
+            executions = self._pabotlib.get_parallel_value_for_key(PABOT_LIB_LAUNCH_EXECUTIONS)
+            if executions and finished >= int(executions):
+                finish_launch()
+                return True
+        finally:
+            self._pabotlib.release_lock(PABOT_LIB_LAUNCH_LOCK)
+
+        return False
+
+    def report_throughput(self, requests: int, seconds: float) -> None:
+        """Reports throughput of requests to Report Portal of the execution to the console.
+
+        Args:
+            requests: number of HTTP requests sent by the execution.
+            seconds: time from the start of the listener.
+        """
+        rate = requests / seconds if seconds > 0 else 0.0
+        logger.console(f"[reportportal-listener] Pabot execution {self._queue_index}: {requests} "
+                       f"requests to Report Portal in {seconds:.1f} seconds, {rate:.1f} requests per second.")
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import count
+from multiprocessing import get_context
+from typing import Dict, Optional, Set, Tuple
+
+# Formats images are re-encoded to, with extensions and MIME types of files.
+IMAGE_FORMATS = {
+    "JPEG": (".jpg", "image/jpeg"),
+    "WEBP": (".webp", "image/webp"),
+    "PNG": (".png", "image/png")
+}
+# Directory next to images, re-encoded images are written to.
+IMAGE_DIRECTORY = "reportportal-images"
+# Quality of re-encoded images in lossy formats.
+IMAGE_QUALITY = 85
+
+
+def _compress_image(path: str, target_path: str, image_format: str, max_dimension: int) -> int:
+    """Resize the image to fit the max dimension and re-encode it, called in processes of the pool.
+
+    Args:
+        path: path to the image.
+        target_path: path to the re-encoded image.
+        image_format: format of the re-encoded image, one of IMAGE_FORMATS.
+        max_dimension: max width and height of the re-encoded image in pixels.
+    Returns:
+        Size of the re-encoded image in bytes.
+    """
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image.thumbnail((max_dimension, max_dimension))
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(target_path, format=image_format, quality=IMAGE_QUALITY, optimize=True)
+    return os.path.getsize(target_path)
+
+
+class ImageProcessor(object):
+    """Resizing and re-encoding of large screenshots before they are attached.
+
+    Images are processed by Pillow in a pool of processes. Processing is started when messages are captured,
+    so tests are not blocked, and its result is waited for when messages are formatted. Results are kept,
+    so a screenshot logged several times is processed once. Images, which can not be processed
+    or are not smaller after processing, are attached as they are.
+    """
+
+    def __init__(self, min_size: int, image_format: str = "JPEG", max_dimension: int = 1920,
+                 workers: int = 1) -> None:
+        """Initialization.
+
+        Args:
+            min_size: min size of processed images in bytes, smaller images are attached as they are.
+            image_format: format of re-encoded images, one of IMAGE_FORMATS.
+            max_dimension: max width and height of re-encoded images in pixels.
+            workers: number of processes of the pool.
+        Raises:
+            RuntimeError: if Pillow can not be imported.
+            ValueError: if the format is unknown.
+        """
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            raise RuntimeError("Processing of images used but Pillow can not be imported. "
+                               "Please, install it: pip install robotframework-reportportal-ng[images].")
+        image_format = image_format.upper()
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unknown image format {image_format}, expected one of: {', '.join(IMAGE_FORMATS)}.")
+
+        self.min_size = min_size
+        self.image_format = image_format
+        self.max_dimension = max_dimension
+        self.processed = 0
+        self.saved_bytes = 0
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+        self._images: Dict[Tuple[str, int, int], Tuple[str, Future]] = {}
+        self._counted: Set[Tuple[str, int, int]] = set()
+        self._numbers = count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, path: str) -> Optional[Tuple[str, int, int]]:
+        """Start processing of the image in the background, if it is large enough.
+
+        Args:
+            path: path to the image.
+        Returns:
+            Key of the image: path, modification time and size, None if the image is not processed.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if stat.st_size < self.min_size:
+            return None
+
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key in self._images:
+                return key
+            directory = os.path.join(os.path.dirname(path), IMAGE_DIRECTORY)
+            os.makedirs(directory, exist_ok=True)
+            stem = os.path.splitext(os.path.basename(path))[0]
+            extension = IMAGE_FORMATS[self.image_format][0]
+            target_path = os.path.join(directory, f"{stem}-{os.getpid()}-{next(self._numbers)}{extension}")
+            future = self._executor.submit(_compress_image, path, target_path, self.image_format, self.max_dimension)
+            self._images[key] = (target_path, future)
+        return key
+
+    def process(self, attachment: Dict[str, str]) -> Dict[str, str]:
+        """Get attachment with the processed image, wait until it is processed.
+
+        Args:
+            attachment: information by attachment, see MessageFormatter._get_attachment.
+        Returns:
+            Information by attachment with the processed image, or the same attachment
+            if the image is not processed.
+        """
+        key = self.submit(path=attachment["path"])
+        if key is None:
+            return attachment
+        with self._lock:
+            target_path, future = self._images[key]
+        try:
+            size = future.result()
+        except Exception:
+            return attachment
+        if size >= key[2]:
+            return attachment
+
+        with self._lock:
+            # A screenshot logged several times is counted once, as it is processed once.
+            if key not in self._counted:
+                self._counted.add(key)
+                self.processed += 1
+                self.saved_bytes += key[2] - size
+        extension, mime = IMAGE_FORMATS[self.image_format]
+        return {"name": os.path.splitext(attachment["name"])[0] + extension, "path": target_path, "mime": mime}
+
+    def close(self) -> None:
+        """Wait for images being processed and stop processes of the pool."""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+
+import os
+import re
+from argparse import ArgumentParser
+from typing import Any, Dict, List, Optional
+from xml.etree.ElementTree import Element, iterparse
+
+from . import reportportal_listener
+from .variables import preset_variables
+
+# Pattern of the generator of output.xml, e.g. "Robot 3.0.2 (Python 3.6.5 on linux)" or "Rebot 3.1".
+GENERATOR_PATTERN = re.compile(r"(?:Robot|Rebot) (?P<major>\d+)\.")
+
+# Keyword types used by the listener API by keyword types in output.xml.
+KEYWORD_TYPES = {
+    None: "Keyword",
+    "kw": "Keyword",
+    "setup": "Setup",
+    "teardown": "Teardown",
+    "for": "For",
+    "foritem": "For Iteration"
+}
+
+
+def _rf_time(value: Optional[str]) -> str:
+    """Get time from output.xml attribute.
+
+    Args:
+        value: value of starttime or endtime attribute.
+    Returns:
+        Time in the format used in RobotFramework, empty string if it is not available.
+    """
+    return "" if value in (None, "N/A") else value
+
+
+def _check_schema(element: Element) -> None:
+    """Check output.xml is written by Robot Framework 3.x, other versions write output.xml of another schema.
+
+    Robot Framework 4 and later write types of keywords in upper case, times in status elements
+    as start and elapsed time, and control structures as separate elements. The schema version
+    is written since Robot Framework 4.
+
+    Args:
+        element: root element of output.xml.
+    Raises:
+        RuntimeError: if output.xml is not written by Robot Framework 3.x.
+    """
+    generator = element.get("generator", "")
+    match = GENERATOR_PATTERN.match(generator)
+    if element.tag != "robot" or element.get("schemaversion") is not None or match is None \
+            or int(match.group("major")) != 3:
+        raise RuntimeError(f"output.xml of {generator or 'unknown generator'} can not be imported, "
+                           f"only output.xml of Robot Framework 3.x is supported.")
+
+
+class OutputImporter(reportportal_listener):
+    """Class for sending results from output.xml to Report Portal after the test run.
+
+    output.xml is parsed incrementally and converted to listener calls,
+    so results are sent to Report Portal in the same way as by the listener.
+    Parsed elements are dropped, memory usage does not depend on the size of output.xml.
+    Only output.xml of Robot Framework 3.x is supported.
+    """
+
+    def __init__(self, path: str, launch_id: str = None) -> None:
+        """Initialization.
+
+        Args:
+            path: path to output.xml.
+            launch_id: id of existing launch to log test results in, new launch is created if it is not specified.
+        """
+        super(OutputImporter, self).__init__(launch_id=launch_id)
+        self._path = path
+        self._suites: Dict[str, Dict[str, Any]] = {}
+        self._elements: List[Element] = []
+        self._keywords: List[Dict[str, Any]] = []
+        self._test_info: Dict[str, Any] = {}
+        self._suite_teardowns: Dict[str, Element] = {}
+
+    def import_results(self) -> None:
+        """Send results from output.xml to Report Portal."""
+        self._suites = self._read_suites()
+        teardown: Optional[Element] = None
+        for event, element in iterparse(self._path, events=("start", "end")):
+            if event == "start":
+                self._elements.append(element)
+                if teardown is None and self._is_suite_teardown(element=element):
+                    teardown = element
+                if teardown is None:
+                    self._start_element(element=element)
+                continue
+
+            if element is teardown:
+                self._suite_teardowns[self._elements[-2].get("id")] = teardown
+                teardown = None
+            elif teardown is None:
+                if element.tag == "suite" and element.get("id") in self._suite_teardowns:
+                    self._replay_element(element=self._suite_teardowns.pop(element.get("id")))
+                self._elements.pop()
+                self._end_element(element=element)
+                if self._elements:
+                    self._elements[-1].remove(element)
+                continue
+            self._elements.pop()
+        self.close()
+
+    def _is_suite_teardown(self, element: Element) -> bool:
+        """Checks if the element is a suite teardown.
+
+        Suite teardown is written before tests in output.xml saved by Robot Framework API,
+        so it is kept until the end of the suite.
+
+        Args:
+            element: started element.
+        Returns:
+            True if the element is a suite teardown, otherwise - False.
+        """
+        return element.tag == "kw" and element.get("type") == "teardown" and self._elements[-2].tag == "suite"
+
+    def _replay_element(self, element: Element) -> None:
+        """Handle the kept element with all its children.
+
+        Args:
+            element: kept element.
+        """
+        self._elements.append(element)
+        self._start_element(element=element)
+        for child in list(element):
+            self._replay_element(element=child)
+        self._elements.pop()
+        self._end_element(element=element)
+
+    def _read_suites(self) -> Dict[str, Dict[str, Any]]:
+        """Read suites attributes from output.xml.
+
+        Attributes of suites are written at the end of suites in output.xml,
+        but they are needed at the start of suites.
+
+        Returns:
+            Suite attributes by suite id.
+        Raises:
+            RuntimeError: if output.xml is not written by Robot Framework 3.x.
+        """
+        suites: Dict[str, Dict[str, Any]] = {}
+        stack: List[Dict[str, Any]] = []
+        elements: List[Element] = []
+        for event, element in iterparse(self._path, events=("start", "end")):
+            if event == "start":
+                if not elements:
+                    _check_schema(element=element)
+                elements.append(element)
+                if element.tag == "suite" and len(elements) > 1 and elements[-2].tag in ("robot", "suite"):
+                    parent = stack[-1] if stack else None
+                    name = element.get("name", "")
+                    suite = {
+                        "id": element.get("id"),
+                        "name": name,
+                        "longname": f"{parent['longname']}.{name}" if parent else name,
+                        "source": element.get("source", ""),
+                        "doc": "",
+                        "metadata": {},
+                        "suites": [],
+                        "tests": [],
+                        "totaltests": 0
+                    }
+                    if parent:
+                        parent["suites"].append(name)
+                    stack.append(suite)
+                    suites[suite["id"]] = suite
+                elif element.tag == "test" and stack:
+                    stack[-1]["tests"].append(element.get("name", ""))
+                continue
+
+            elements.pop()
+            parent_tag = elements[-1].tag if elements else None
+            if element.tag == "suite" and parent_tag in ("robot", "suite"):
+                suite = stack.pop()
+                suite["totaltests"] += len(suite["tests"])
+                if stack:
+                    stack[-1]["totaltests"] += suite["totaltests"]
+            elif element.tag == "status" and parent_tag == "suite":
+                stack[-1].update(starttime=_rf_time(element.get("starttime")), endtime=_rf_time(element.get("endtime")),
+                                 status=element.get("status"), message=element.text or "")
+            elif element.tag == "doc" and parent_tag == "suite":
+                stack[-1]["doc"] = element.text or ""
+            elif element.tag == "item" and parent_tag == "metadata" and elements[-2].tag == "suite":
+                stack[-1]["metadata"][element.get("name")] = element.text or ""
+
+            if elements:
+                elements[-1].remove(element)
+
+        return suites
+
+    def _start_element(self, element: Element) -> None:
+        """Handle the start of output.xml element.
+
+        Args:
+            element: started element.
+        """
+        if element.tag == "suite" and self._elements[-2].tag in ("robot", "suite"):
+            suite = self._suites[element.get("id")]
+            self.start_suite(name=suite["name"], attributes=suite)
+        elif element.tag == "test":
+            self._test_info = {"doc": "", "tags": []}
+            self.start_test(name=element.get("name", ""), attributes={
+                "id": element.get("id"),
+                "longname": f"{self.suite.longname}.{element.get('name', '')}",
+                "doc": "",
+                "tags": [],
+                "starttime": "",
+                "critical": "yes",
+                "template": ""
+            })
+        elif element.tag == "kw":
+            self._start_pending_keyword()
+            self._keywords.append({
+                "name": element.get("name", ""),
+                "libname": element.get("library", ""),
+                "type": KEYWORD_TYPES.get(element.get("type"), "Keyword"),
+                "doc": "",
+                "args": [],
+                "assign": [],
+                "tags": [],
+                "started": False
+            })
+        elif element.tag in ("msg", "status") and self._keywords and self._elements[-2].tag == "kw":
+            self._start_pending_keyword()
+
+    def _start_pending_keyword(self) -> None:
+        """Start the current keyword, if it is not started yet.
+
+        Keyword is started when its documentation, arguments and tags, preceding its body in output.xml, are read.
+        """
+        if self._keywords and not self._keywords[-1]["started"]:
+            keyword = self._keywords[-1]
+            keyword["started"] = True
+            name = f"{keyword['libname']}.{keyword['name']}" if keyword["libname"] else keyword["name"]
+            self.start_keyword(name=name, attributes={
+                "kwname": keyword["name"],
+                "libname": keyword["libname"],
+                "doc": keyword["doc"],
+                "tags": keyword["tags"],
+                "args": keyword["args"],
+                "assign": keyword["assign"],
+                "starttime": "",
+                "type": keyword["type"]
+            })
+
+    def _end_element(self, element: Element) -> None:
+        """Handle the end of output.xml element.
+
+        Args:
+            element: ended element.
+        """
+        parent_tag = self._elements[-1].tag if self._elements else None
+        grandparent_tag = self._elements[-2].tag if len(self._elements) > 1 else None
+        text = element.text or ""
+
+        if element.tag == "suite" and parent_tag in ("robot", "suite"):
+            suite = self._suites.pop(element.get("id"))
+            self.end_suite(name=suite["name"], attributes=dict(suite, statistics=""))
+        elif element.tag == "test":
+            self._end_test(name=element.get("name", ""))
+        elif element.tag == "kw":
+            self._end_keyword()
+        elif element.tag == "msg" and self._keywords:
+            self.log_message(message={"message": text, "level": element.get("level"),
+                                      "timestamp": _rf_time(element.get("timestamp")),
+                                      "html": element.get("html", "no")})
+        elif element.tag == "status" and parent_tag == "kw":
+            self._keywords[-1]["status"] = element
+        elif element.tag == "status" and parent_tag == "test":
+            self._test_info["status"] = element
+        elif element.tag == "doc" and parent_tag == "kw":
+            self._keywords[-1]["doc"] = text
+        elif element.tag == "doc" and parent_tag == "test":
+            self._test_info["doc"] = text
+        elif element.tag == "arg" and grandparent_tag == "kw":
+            self._keywords[-1]["args"].append(text)
+        elif element.tag == "var" and grandparent_tag == "kw":
+            self._keywords[-1]["assign"].append(text)
+        elif element.tag == "tag" and grandparent_tag == "kw":
+            self._keywords[-1]["tags"].append(text)
+        elif element.tag == "tag" and grandparent_tag == "test":
+            self._test_info["tags"].append(text)
+
+    def _end_keyword(self) -> None:
+        """End the current keyword."""
+        self._start_pending_keyword()
+        keyword = self._keywords.pop()
+        status = keyword["status"]
+        start_time = _rf_time(status.get("starttime"))
+        if not self._skipped_depth:
+            self.keyword.start_time = start_time
+        name = f"{keyword['libname']}.{keyword['name']}" if keyword["libname"] else keyword["name"]
+        self.end_keyword(name=name, attributes={
+            "type": keyword["type"],
+            "status": status.get("status"),
+            "starttime": start_time,
+            "endtime": _rf_time(status.get("endtime")),
+            "message": status.text or ""
+        })
+
+    def _end_test(self, name: str) -> None:
+        """End the current test.
+
+        Args:
+            name: test name.
+        """
+        status = self._test_info["status"]
+        test = self.test
+        test.doc = self._test_info["doc"]
+        test.start_time = _rf_time(status.get("starttime"))
+        test.critical = status.get("critical", "yes")
+        for fixture in (test.setup, test.teardown):
+            if fixture is not None:
+                fixture.tags = tuple(self._test_info["tags"])
+
+        self.end_test(name=name, attributes={
+            "status": status.get("status"),
+            "message": status.text or "",
+            "tags": self._test_info["tags"],
+            "starttime": test.start_time,
+            "endtime": _rf_time(status.get("endtime"))
+        })
+
+    def _get_keyword_error(self, attributes: Dict[str, Any]) -> str:
+        """Gets error message of the ended keyword from its status in output.xml.
+
+        Args:
+            attributes: keyword attributes.
+        Returns:
+            Error message.
+        """
+        return attributes.get("message", "")
+
+
+def main(args: List[str] = None) -> None:
+    """Entry point of the command sending results from output.xml to Report Portal.
+
+    Args:
+        args: command line arguments.
+    """
+    parser = ArgumentParser(description="Send Robot Framework results from output.xml to Report Portal.")
+    parser.add_argument("output", help="path to output.xml")
+    parser.add_argument("--endpoint", required=True, help="Report Portal endpoint")
+    parser.add_argument("--project", required=True, help="Report Portal project name")
+    parser.add_argument("--uuid", required=True, help="Report Portal user uuid")
+    parser.add_argument("--launch", help="name of the new launch")
+    parser.add_argument("--launch-doc", default="", help="documentation of the new launch")
+    parser.add_argument("--launch-tags", default="", help="comma separated tags of the new launch")
+    parser.add_argument("--launch-id", help="id of existing launch to log test results in")
+    parser.add_argument("--queue-size", type=int, default=1000,
+                        help="max number of requests waiting for sending in the background")
+    parser.add_argument("--close-timeout", type=float, default=300,
+                        help="max time to wait for sending requests at the end of import in seconds")
+    parser.add_argument("--log-batch-size", type=int, default=0, help="max number of messages in one log request")
+    parser.add_argument("--log-batch-max-bytes", type=int, default=0,
+                        help="max estimated size of one log request in bytes, 0 - not limited")
+    parser.add_argument("--log-batch-workers", type=int, default=1,
+                        help="number of log requests of the same item sent in parallel")
+    options = parser.parse_args(args)
+    if not options.launch and not options.launch_id:
+        parser.error("one of the arguments --launch, --launch-id is required")
+
+    preset_variables(RP_ENDPOINT=options.endpoint, RP_PROJECT=options.project, RP_UUID=options.uuid,
+                     RP_LAUNCH=options.launch, RP_LAUNCH_DOC=options.launch_doc, RP_LAUNCH_TAGS=options.launch_tags,
+                     RP_ASYNC=True, RP_QUEUE_SIZE=options.queue_size, RP_CLOSE_TIMEOUT=options.close_timeout,
+                     RP_STREAM_TESTS=True,
+                     RP_LOG_BATCH_SIZE=options.log_batch_size, RP_LOG_BATCH_MAX_BYTES=options.log_batch_max_bytes,
+                     RP_LOG_BATCH_WORKERS=options.log_batch_workers,
+                     OUTPUT_DIR=os.path.dirname(os.path.abspath(options.output)))
+    OutputImporter(path=options.output, launch_id=options.launch_id).import_results()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+import json
+from typing import Any, Dict, List, Optional
+
+
+class ItemIndex(object):
+    """Index of Report Portal suite and test items started by the listener.
+
+    Items are recorded as they are created, so links to Report Portal and ids of items
+    are available without requests to Report Portal.
+    """
+
+    def __init__(self) -> None:
+        """Initialization."""
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._by_robot_id: Dict[str, str] = {}
+        self._by_longname: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        """Get number of indexed items.
+
+        Returns:
+            Number of items.
+        """
+        return len(self._items)
+
+    def add(self, item_id: str, path: List[str], item_type: str, longname: str, robot_id: str = None) -> None:
+        """Add started item to the index.
+
+        Args:
+            item_id: Report Portal item id.
+            path: ids of parent items, starting from the top one.
+            item_type: Report Portal item type.
+            longname: long name of the suite or the test.
+            robot_id: Robot Framework id of the suite or the test, e.g. s1-s2-t3.
+        """
+        self._items[item_id] = {
+            "id": item_id,
+            "path": path,
+            "item_type": item_type,
+            "longname": longname,
+            "robot_id": robot_id,
+            "has_children": False
+        }
+        self._by_longname.setdefault(longname, item_id)
+        if robot_id is not None:
+            self._by_robot_id.setdefault(robot_id, item_id)
+
+    def add_child(self, parent_id: Optional[str]) -> None:
+        """Mark the item as having child items.
+
+        Args:
+            parent_id: id of the parent item of the started item.
+        """
+        if parent_id in self._items:
+            self._items[parent_id]["has_children"] = True
+
+    def get(self, longname: str = None, robot_id: str = None) -> Optional[Dict[str, Any]]:
+        """Get item by Robot Framework id or long name.
+
+        Args:
+            longname: long name of the suite or the test.
+            robot_id: Robot Framework id of the suite or the test.
+        Returns:
+            Item information, None if there is no such item.
+        """
+        item_id = self._by_robot_id.get(robot_id) if robot_id is not None else self._by_longname.get(longname)
+        return self._items.get(item_id) if item_id is not None else None
+
+    def get_uri_part(self, longname: str) -> Optional[str]:
+        """Get part of the link to Report Portal for the suite or the test.
+
+        Args:
+            longname: long name of the suite or the test.
+        Returns:
+            Path of suite ids for suites, "/" with id for tests with child items
+            and "?log.item=" with id for other tests; None if there is no such item.
+        """
+        item = self.get(longname=longname)
+        if item is None:
+            return None
+        if item["item_type"] != "STEP":
+            return "/" + "/".join(item["path"] + [item["id"]])
+        return ("/" if item["has_children"] else "?log.item=") + item["id"]
+
+    def save(self, path: str, launch_id: str = None) -> None:
+        """Save the index to JSON file.
+
+        Args:
+            path: path to the file.
+            launch_id: id of the launch the items belong to.
+        """
+        with open(path, "w", encoding="utf-8") as index_file:
+            json.dump({"launch_id": launch_id, "items": list(self._items.values())}, index_file, indent=2)
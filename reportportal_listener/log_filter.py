@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+import re
+from fnmatch import translate
+from typing import Dict, FrozenSet, Optional, Pattern, Sequence
+
+# Levels of Robot Framework log messages from the lowest.
+LOG_LEVELS = ("TRACE", "DEBUG", "INFO", "WARN", "ERROR")
+
+
+def _compile_patterns(patterns: Sequence[str]) -> Optional[Pattern]:
+    """Compile glob patterns into one case-insensitive regular expression.
+
+    Args:
+        patterns: glob patterns, e.g. "BuiltIn.*" or "*.Log Many".
+    Returns:
+        Compiled expression matching any of the patterns, None if there are no patterns.
+    """
+    patterns = [pattern.strip() for pattern in patterns if pattern.strip()]
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{translate(pattern)})" for pattern in patterns), re.I)
+
+
+class LogFilter(object):
+    """Filter of log messages, applied before messages are formatted.
+
+    Messages are filtered by level and by full name of the keyword, which logs them.
+    Decisions for keywords are cached, as the same keywords log messages many times.
+    """
+
+    def __init__(self, level: str = "TRACE", include: Sequence[str] = None, exclude: Sequence[str] = None) -> None:
+        """Initialization.
+
+        Args:
+            level: minimal level of messages, one of LOG_LEVELS.
+            include: glob patterns of full names of keywords, e.g. "MyLibrary.*", only messages
+                of matching keywords are accepted. Messages of all keywords are accepted if it is empty.
+            exclude: glob patterns of full names of keywords, messages of matching keywords are dropped.
+        Raises:
+            ValueError: if the level is unknown.
+        """
+        level = level.upper()
+        if level not in LOG_LEVELS:
+            raise ValueError(f"Unknown log level {level}, expected one of: {', '.join(LOG_LEVELS)}.")
+
+        self.levels: FrozenSet[str] = frozenset(LOG_LEVELS[LOG_LEVELS.index(level):])
+        self._include = _compile_patterns(patterns=include or [])
+        self._exclude = _compile_patterns(patterns=exclude or [])
+        self._keywords: Dict[str, bool] = {}
+
+    def accepts(self, level: str, keyword_name: str) -> bool:
+        """Check the message should be sent to Report Portal.
+
+        Args:
+            level: level of the message.
+            keyword_name: full name of the keyword, e.g. "BuiltIn.Log".
+        Returns:
+            True if the message is accepted, otherwise - False.
+        """
+        if level not in self.levels:
+            return False
+
+        accepted = self._keywords.get(keyword_name)
+        if accepted is None:
+            accepted = self._keywords[keyword_name] = (
+                (self._include is None or self._include.match(keyword_name) is not None)
+                and (self._exclude is None or self._exclude.match(keyword_name) is None))
+        return accepted
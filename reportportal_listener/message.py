@@ -1,42 +1,105 @@
 # -*- coding: utf-8 -*-
 
+import gzip
 import os
 import re
-from typing import Any, Dict, Union
+from itertools import count
+from typing import Any, Dict, Match, Optional, Tuple
 
 from html import unescape
 from mimetypes import guess_type
-from robot.libraries.BuiltIn import BuiltIn
 
-# Patterns for editing HTML messages.
-HTML_MESSAGE_PATTERN = re.compile(r"<details><summary>(?P<summary>.*)</summary><p>(?P<message>.*)</p></details>", re.S)
-SCREENSHOT_PATH_PATTERN = re.compile(r'<img src="(?P<path>[_/.\-\w]*)"', re.S)
+from .attachment_cache import AttachmentCache
+from .images import ImageProcessor
+from .variables import get_variable
+
+# Max length of messages, longer messages are truncated.
+MESSAGE_MAX_LENGTH = 8388608
+# Length of the preview of messages spilled to attachments.
+MESSAGE_PREVIEW_LENGTH = 4096
+# Directory in output directory, messages are spilled to.
+SPILL_DIRECTORY = "reportportal-messages"
+# Numbers of files of spilled messages in the current process.
+_spill_numbers = count(1)
+
+# Markers of HTML messages with details: <details><summary>summary</summary><p>message</p></details>.
+DETAILS_START = "<details><summary>"
+DETAILS_SEPARATOR = "</summary><p>"
+DETAILS_END = "</p></details>"
+# Marker and pattern of screenshots embedded in messages.
+SCREENSHOT_MARKER = '<img src="'
+SCREENSHOT_PATH_PATTERN = re.compile(r'<img src="(?P<path>[_/.\-\w]*)"')
+# Patterns converting tags of Robot Framework HTML messages to text, each of them is applied in one pass.
+# Tags end at the first angle bracket, and no two repeated parts of a pattern match the same characters,
+# so unterminated tags are not scanned again from each position.
+HTML_CELL_SEPARATOR_PATTERN = re.compile(r"</t[dh]>\s*<t[dh]\b[^<>]*>", re.I)
+HTML_LINK_PATTERN = re.compile(r"<a\b(?P<attributes>[^<>]*)>(?P<text>[^<]*)</a>", re.I)
+HTML_HREF_PATTERN = re.compile(r'''href=["']?(?P<href>[^"'\s>]*)''', re.I)
+HTML_LINE_BREAK_PATTERN = re.compile(r"<(?:br|hr|tr|p|div|pre|/p|/div|/pre|/table)\b[^<>]*>", re.I)
+HTML_LIST_ITEM_PATTERN = re.compile(r"<li\b[^<>]*>", re.I)
+HTML_TAG_PATTERN = re.compile(r"</?[a-zA-Z][^<>]*>")
 
 
 class MessageFormatter(object):
     """Class for formatting log messages in ReportPortal."""
 
     @staticmethod
-    def format_message(message: Dict[str, Any], keyword_name: str) -> Dict[str, Any]:
+    def format_message(message: Dict[str, Any], keyword_name: str, max_attachment_size: int = None,
+                       output_dir: str = None, html: bool = False, max_length: int = MESSAGE_MAX_LENGTH,
+                       spill: bool = False, attachment_cache: AttachmentCache = None,
+                       image_processor: ImageProcessor = None, file_stamp: Tuple[int, int] = None) -> Dict[str, Any]:
         """Method for formatting message.
         Truncate message and cut any html attribute:
         tags: details, summary, p; quote symbols: &gt and other.
-        Adds attachment to message if it exists.
+        Tables, links and other tags of HTML messages are converted to text.
+        Adds attachment to message if it exists, a missing screenshot, or a screenshot written again
+        after it was logged, is noted in the message.
+        Longer messages are truncated first, or spilled to gzipped attachments with a preview as the message.
         And prepare message to correctly display in Report Portal.
 
         Args:
             message: message of the step of keyword.
             keyword_name: current keyword name.
+            max_attachment_size: max size of attachment file in bytes, larger files are not attached.
+            output_dir: directory screenshot paths are relative to, OUTPUT_DIR variable is used if it is not set.
+            html: the message is HTML message of Robot Framework.
+            max_length: max length of the message.
+            spill: attach the full text of longer messages as gzipped file instead of truncating it.
+            attachment_cache: cache of attached files, screenshots with the same content as earlier attached
+                files are not attached again.
+            image_processor: processor of screenshots, large screenshots are resized and re-encoded.
+            file_stamp: size and modification time of the screenshot when it was logged, see stamp_screenshot.
         Returns:
             Dictionary with message information, that is correctly displayed in Report Portal.
         """
-        path_to_screen = SCREENSHOT_PATH_PATTERN.search(message["message"])
-        if path_to_screen:
-            message["attachment"] = MessageFormatter._get_attachment(attachment_path=path_to_screen.group("path"))
-            message["message"] = f'Screen shot in the keyword "{keyword_name}"'
+        text = message["message"]
+        path_to_screen = None
+        if spill and len(text) > max_length:
+            message["attachment"] = MessageFormatter._spill_message(message=text, output_dir=output_dir)
+            message["message"] = MessageFormatter.format_text(
+                message=text, html=html, max_length=min(max_length, MESSAGE_PREVIEW_LENGTH))
+            message["message"] += f"\nFull message of {len(text)} characters is attached."
         else:
-            message["message"] = MessageFormatter._strip_html_tags(message=message["message"])
-            message["message"] = MessageFormatter._truncate_message(message=message["message"])
+            path_to_screen = MessageFormatter._find_screenshot(message=text[:max_length])
+            if path_to_screen is None:
+                message["message"] = MessageFormatter.format_text(message=text, html=html, max_length=max_length)
+
+        if path_to_screen is not None:
+            attachment = MessageFormatter._get_attachment(attachment_path=path_to_screen,
+                                                          output_dir=output_dir)
+            message["message"] = f'Screen shot in the keyword "{keyword_name}"'
+            try:
+                if file_stamp is not None and MessageFormatter._get_file_stamp(path=attachment["path"]) != file_stamp:
+                    # The file has another content than the screenshot, which was logged.
+                    message["message"] += f" is not attached: screenshot {attachment['path']} was written again " \
+                        f"after it was logged"
+                else:
+                    MessageFormatter._attach(message=message, attachment=attachment,
+                                             max_attachment_size=max_attachment_size,
+                                             attachment_cache=attachment_cache, image_processor=image_processor)
+            except OSError:
+                # Only this message loses its screenshot, other messages of the request are sent.
+                message["message"] += f" is not attached: screenshot not found ({attachment['path']})"
 
         message = {
             "time": message.get("timestamp"),
@@ -47,55 +110,237 @@ class MessageFormatter(object):
         return message
 
     @staticmethod
-    def _get_attachment(attachment_path: str, is_absolute_path: bool = False) -> Dict[str, str]:
+    def stamp_screenshot(message: Dict[str, Any], output_dir: str = None) -> None:
+        """Remember size and modification time of the screenshot embedded in the message.
+
+        Screenshots are read when messages are sent, after the end of the test or the suite.
+        A screenshot written again under the same name, e.g. in a retry loop, has another content then,
+        so it is not attached to the message, see format_message. The file is not copied or read here,
+        only its status is checked.
+
+        Args:
+            message: captured message, file_stamp is added to it if the screenshot exists.
+            output_dir: directory screenshot paths are relative to, OUTPUT_DIR variable is used if it is not set.
+        """
+        path_to_screen = MessageFormatter._find_screenshot(message=message["message"])
+        if path_to_screen is None:
+            return
+
+        path = os.path.join(output_dir or get_variable("OUTPUT_DIR"), path_to_screen)
+        try:
+            message["file_stamp"] = MessageFormatter._get_file_stamp(path=path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def prepare_attachment(message: str, image_processor: ImageProcessor, output_dir: str = None) -> None:
+        """Start processing of the screenshot of the message in the background, before the message is formatted.
+
+        Args:
+            message: text of the message.
+            image_processor: processor of screenshots.
+            output_dir: directory screenshot paths are relative to, OUTPUT_DIR variable is used if it is not set.
+        """
+        path_to_screen = MessageFormatter._find_screenshot(message=message)
+        if path_to_screen is not None:
+            attachment = MessageFormatter._get_attachment(attachment_path=path_to_screen, output_dir=output_dir)
+            image_processor.submit(path=attachment["path"])
+
+    @staticmethod
+    def format_text(message: str, html: bool = False, max_length: int = MESSAGE_MAX_LENGTH) -> str:
+        """Format text of the message: truncate it and remove html tags.
+
+        Args:
+            message: text of the message.
+            html: the message is HTML message of Robot Framework.
+            max_length: max length of the message.
+        Returns:
+            Formatted text.
+        """
+        return MessageFormatter._strip_html_tags(message=message, html=html, max_length=max_length)
+
+    @staticmethod
+    def _spill_message(message: str, output_dir: str = None) -> Dict[str, str]:
+        """Write the message to gzipped file to attach it to the log.
+
+        The file is kept in output directory, as attachments are read from disk while the log is being sent.
+
+        Args:
+            message: text of the message.
+            output_dir: output directory, OUTPUT_DIR variable is used if it is not set.
+        Returns:
+            Information by attachment for log message.
+        """
+        directory = os.path.join(output_dir or get_variable("OUTPUT_DIR"), SPILL_DIRECTORY)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"message-{os.getpid()}-{next(_spill_numbers)}.txt.gz")
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as spill_file:
+            spill_file.write(message)
+        return {"name": "message.txt.gz", "path": path, "mime": "application/gzip"}
+
+    @staticmethod
+    def _find_screenshot(message: str) -> Optional[str]:
+        """Find path of the first screenshot embedded in the message.
+
+        Args:
+            message: message of the step of keyword.
+        Returns:
+            Path to the screenshot, None if there is no screenshot.
+        """
+        match = MessageFormatter._match_screenshot(message=message)
+        return match.group("path") if match else None
+
+    @staticmethod
+    def _match_screenshot(message: str) -> Optional[Match]:
+        """Find the first screenshot embedded in the message.
+
+        Args:
+            message: message of the step of keyword.
+        Returns:
+            Match of SCREENSHOT_PATH_PATTERN, None if there is no screenshot.
+        """
+        position = message.find(SCREENSHOT_MARKER)
+        while position >= 0:
+            match = SCREENSHOT_PATH_PATTERN.match(message, position)
+            if match:
+                return match
+            position = message.find(SCREENSHOT_MARKER, position + len(SCREENSHOT_MARKER))
+        return None
+
+    @staticmethod
+    def _attach(message: Dict[str, Any], attachment: Dict[str, str], max_attachment_size: int = None,
+                attachment_cache: AttachmentCache = None, image_processor: ImageProcessor = None) -> None:
+        """Add the screenshot to the message, unless it is too large or it is attached before.
+
+        Args:
+            message: message of the step of keyword.
+            attachment: information by the screenshot.
+            max_attachment_size: max size of attachment file in bytes, larger files are not attached.
+            attachment_cache: cache of attached files.
+            image_processor: processor of screenshots.
+        Raises:
+            OSError: if the screenshot does not exist.
+        """
+        if image_processor is not None:
+            attachment = image_processor.process(attachment=attachment)
+        attachment_size = os.path.getsize(attachment["path"])
+        if max_attachment_size and attachment_size > max_attachment_size:
+            message["message"] += f" is not attached: file size {attachment_size} bytes " \
+                f"exceeds the limit of {max_attachment_size} bytes"
+        else:
+            attached_name = attachment_cache.find_attached(path=attachment["path"]) \
+                if attachment_cache is not None else None
+            if attached_name is None:
+                message["attachment"] = attachment
+            else:
+                message["message"] += f" is not attached: it is the same as {attached_name} attached before"
+
+    @staticmethod
+    def _get_file_stamp(path: str) -> Tuple[int, int]:
+        """Gets size and modification time of the file, which change when the file is written again.
+
+        Args:
+            path: path to the file.
+        Returns:
+            Size in bytes and modification time in nanoseconds.
+        Raises:
+            OSError: if the file does not exist.
+        """
+        status = os.stat(path)
+        return status.st_size, status.st_mtime_ns
+
+    @staticmethod
+    def _get_attachment(attachment_path: str, is_absolute_path: bool = False,
+                        output_dir: str = None) -> Dict[str, str]:
         """Gets attachment information to use in Report Portal.
 
+        The file is not read here, it is read from disk while the log is being sent.
+
         Args:
             attachment_path: path to attachment.
             is_absolute_path: flag indicating path to attachment is absolute or not.
+            output_dir: directory relative path is relative to, OUTPUT_DIR variable is used if it is not set.
         Returns:
             Information by attachment for log message.
         """
         if not is_absolute_path:
-            output_dir = BuiltIn().get_variable_value("${OUTPUT_DIR}")
+            output_dir = output_dir or get_variable("OUTPUT_DIR")
             attachment_path = os.path.join(output_dir, attachment_path)
-        with open(attachment_path, "rb") as attachment:
-            attachment_info = {
-                "name": os.path.basename(attachment_path),
-                "data": str(attachment.read()),
-                "mime": guess_type(attachment_path)[0] or "application/octet-stream"
-            }
+        attachment_info = {
+            "name": os.path.basename(attachment_path),
+            "path": attachment_path,
+            "mime": guess_type(attachment_path)[0] or "application/octet-stream"
+        }
         return attachment_info
 
     @staticmethod
-    def _strip_html_tags(message: str) -> str:
-        """Method for unquote message and removing html tags: details, summary, p.
+    def _strip_html_tags(message: str, html: bool = False, max_length: int = MESSAGE_MAX_LENGTH) -> str:
+        """Method for unquote message and removing html tags: details, summary, p, and truncating it.
+
+        The message is checked with substring search, so large messages are not scanned by regular expressions
+        unless they are HTML messages. It is truncated before it is unquoted and html tags are removed,
+        so only the part of the message, which is sent, is copied and processed.
 
         Args:
             message: message of the step of keyword.
+            html: the message is HTML message of Robot Framework, its tables, links and other tags
+                are converted to text.
+            max_length: max length of the message.
         Returns:
             String, where all quotes and html tags are removing.
         """
-        match = HTML_MESSAGE_PATTERN.fullmatch(message)
-        if match:
-            summary, message = match.group("summary", "message")
-            if not message.startswith(summary):
-                message = "\n".join([summary, message])
-            message = unescape(message)
-        return message
+        start, end = 0, len(message)
+        summary = None
+        if message.startswith(DETAILS_START) and message.endswith(DETAILS_END):
+            # The last separator is the end of the summary, the same as with greedy regular expression.
+            separator = message.rfind(DETAILS_SEPARATOR, len(DETAILS_START), len(message) - len(DETAILS_END))
+            if separator >= 0:
+                summary = message[len(DETAILS_START):separator]
+                start, end = separator + len(DETAILS_SEPARATOR), len(message) - len(DETAILS_END)
+
+        truncated = end - start > max_length
+        text = message[start:min(end, start + max_length)]
+        if summary is not None:
+            if not message.startswith(summary, start, end):
+                text = "\n".join([summary, text])
+            text = unescape(text)
+        elif html and "<" in text:
+            text = MessageFormatter._html_to_text(message=text)
+
+        if len(text) > max_length:
+            text, truncated = text[:max_length], True
+        return text + ".." if truncated else text
 
     @staticmethod
-    def _truncate_message(message: Union[str, dict], max_length: int = 8388608) -> Union[str, Dict[str, Any]]:
-        """Truncate message to the maximum length.
+    def _html_to_text(message: str) -> str:
+        """Convert HTML message of Robot Framework to text.
+
+        Cells of tables are separated by "|", rows, paragraphs and line breaks start new lines,
+        links are followed by their targets, other tags are removed.
 
         Args:
-            message: message of the step of keyword. It may be string or dictionary.
-            max_length: max length of the message.
+            message: HTML message.
         Returns:
-            String or dictionary, that is truncated.
+            Text of the message.
         """
-        if isinstance(message, dict):
-            message["message"] = message["message"][:max_length] + (message["message"][max_length:] and "..")
-        else:
-            message = message[:max_length] + (message[max_length:] and "..")
-        return message
+        message = HTML_CELL_SEPARATOR_PATTERN.sub(" | ", message)
+        message = HTML_LINK_PATTERN.sub(MessageFormatter._link_to_text, message)
+        message = HTML_LINE_BREAK_PATTERN.sub("\n", message)
+        message = HTML_LIST_ITEM_PATTERN.sub("\n- ", message)
+        message = HTML_TAG_PATTERN.sub("", message)
+        return unescape(message).strip()
+
+    @staticmethod
+    def _link_to_text(link: Match) -> str:
+        """Convert HTML link to text followed by its target.
+
+        Args:
+            link: match of HTML_LINK_PATTERN.
+        Returns:
+            Text of the link.
+        """
+        text = link.group("text")
+        href = HTML_HREF_PATTERN.search(link.group("attributes"))
+        if href is None or not href.group("href") or text.strip() == href.group("href"):
+            return text
+        return f"{text} ({href.group('href')})"
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import threading
+from array import array
+from functools import wraps
+from time import perf_counter, time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Percentiles of latencies included in the summary.
+PERCENTILES = (50, 90, 99)
+
+
+def _percentile(durations: List[float], percentile: int) -> float:
+    """Get percentile of sorted durations by nearest rank.
+
+    Args:
+        durations: sorted durations.
+        percentile: percentile from 0 to 100.
+    Returns:
+        Duration.
+    """
+    rank = max(1, -(-len(durations) * percentile // 100))
+    return durations[rank - 1]
+
+
+def body_size(body: Optional[Any]) -> int:
+    """Get size of the request body.
+
+    Args:
+        body: body of prepared request.
+    Returns:
+        Size in bytes, 0 if it is unknown.
+    """
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    try:
+        return len(body)
+    except TypeError:
+        return 0
+
+
+class Metrics(object):
+    """Call counts and latencies of listener callbacks and requests to Report Portal.
+
+    Metrics are collected only after they are enabled, otherwise measured functions are called directly.
+    """
+
+    def __init__(self) -> None:
+        """Initialization."""
+        self.enabled = False
+        self.trace = False
+        self.http_requests = 0
+        self.bytes_sent = 0
+        self._start = perf_counter()
+        self._start_time = time()
+        self._durations: Dict[str, array] = {}
+        self._events: List[Tuple[str, float, float, int]] = []
+        self._lock = threading.Lock()
+
+    def enable(self, trace: bool = False) -> None:
+        """Start collecting metrics.
+
+        Args:
+            trace: also record every call for Chrome trace.
+        """
+        self.enabled = True
+        self.trace = trace
+        self._start = perf_counter()
+        self._start_time = time()
+
+    def call(self, metric: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Call the function and record its duration.
+
+        Args:
+            metric: name of the metric, it is not "name", as arguments of requests include name.
+            func: function to call.
+            args: positional arguments of the function.
+            kwargs: keyword arguments of the function.
+        Returns:
+            Result of the function.
+        """
+        if not self.enabled:
+            return func(*args, **kwargs)
+
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.record(name=metric, start=start, duration=perf_counter() - start)
+
+    def timed(self, name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Decorator recording duration of each call of the function.
+
+        Args:
+            name: name of the metric.
+        Returns:
+            Decorator.
+        """
+
+        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+            @wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                return self.call(name, func, *args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def record(self, name: str, start: float, duration: float) -> None:
+        """Record a call.
+
+        Args:
+            name: name of the metric.
+            start: start of the call, value of perf_counter.
+            duration: duration of the call in seconds.
+        """
+        durations = self._durations.get(name)
+        if durations is None:
+            durations = self._durations.setdefault(name, array("d"))
+        durations.append(duration)
+        if self.trace:
+            self._events.append((name, start, duration, threading.get_ident()))
+
+    def add_request(self, body_size: int) -> None:
+        """Count HTTP request sent to Report Portal.
+
+        Args:
+            body_size: size of the request body in bytes.
+        """
+        with self._lock:
+            self.http_requests += 1
+            self.bytes_sent += body_size
+
+    def summary(self) -> Dict[str, Any]:
+        """Get summary of collected metrics.
+
+        Returns:
+            Duration of collecting, number of HTTP requests, bytes sent and, for each metric,
+            number of calls, total, mean, max and percentile durations in seconds.
+        """
+        calls: Dict[str, Dict[str, Any]] = {}
+        for name, durations in sorted(self._durations.items()):
+            ordered = sorted(durations)
+            total = sum(ordered)
+            calls[name] = {"count": len(ordered), "total": total, "mean": total / len(ordered), "max": ordered[-1]}
+            for percentile in PERCENTILES:
+                calls[name][f"p{percentile}"] = _percentile(durations=ordered, percentile=percentile)
+
+        return {
+            "duration": perf_counter() - self._start,
+            "http_requests": self.http_requests,
+            "bytes_sent": self.bytes_sent,
+            "calls": calls
+        }
+
+    def save(self, json_file: str = None, prometheus_file: str = None, trace_file: str = None) -> None:
+        """Save collected metrics to files.
+
+        Args:
+            json_file: path to JSON summary.
+            prometheus_file: path to Prometheus textfile, e.g. for textfile collector of node exporter.
+            trace_file: path to Chrome trace, can be opened in chrome://tracing or Perfetto.
+        """
+        summary = self.summary()
+        if json_file:
+            with open(json_file, "w", encoding="utf-8") as summary_file:
+                json.dump(summary, summary_file, indent=2)
+        if prometheus_file:
+            self._save_prometheus(path=prometheus_file, summary=summary)
+        if trace_file:
+            self._save_trace(path=trace_file)
+
+    @staticmethod
+    def _save_prometheus(path: str, summary: Dict[str, Any]) -> None:
+        """Save summary in Prometheus text format.
+
+        The file is replaced atomically, so a collector never reads it partially written.
+
+        Args:
+            path: path to the file.
+            summary: summary of metrics.
+        """
+        lines = [
+            "# HELP rp_listener_http_requests_total HTTP requests sent to Report Portal.",
+            "# TYPE rp_listener_http_requests_total counter",
+            f"rp_listener_http_requests_total {summary['http_requests']}",
+            "# HELP rp_listener_sent_bytes_total Bytes of request bodies sent to Report Portal.",
+            "# TYPE rp_listener_sent_bytes_total counter",
+            f"rp_listener_sent_bytes_total {summary['bytes_sent']}",
+            "# HELP rp_listener_call_seconds Duration of listener callbacks and requests to Report Portal.",
+            "# TYPE rp_listener_call_seconds summary"
+        ]
+        for name, call in summary["calls"].items():
+            for percentile in PERCENTILES:
+                lines.append(f'rp_listener_call_seconds{{name="{name}",quantile="{percentile / 100}"}} '
+                             f'{call[f"p{percentile}"]}')
+            lines.append(f'rp_listener_call_seconds_sum{{name="{name}"}} {call["total"]}')
+            lines.append(f'rp_listener_call_seconds_count{{name="{name}"}} {call["count"]}')
+
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as prometheus_file:
+            prometheus_file.write("\n".join(lines) + "\n")
+        os.replace(temp_path, path)
+
+    def _save_trace(self, path: str) -> None:
+        """Save recorded calls in Chrome trace event format.
+
+        Args:
+            path: path to the file.
+        """
+        pid = os.getpid()
+        offset = self._start_time - self._start
+        events: List[Dict[str, Any]] = [
+            {"name": name, "cat": name.split(".", 1)[0], "ph": "X", "ts": (start + offset) * 1e6,
+             "dur": duration * 1e6, "pid": pid, "tid": tid}
+            for name, start, duration, tid in self._events
+        ]
+        with open(path, "w", encoding="utf-8") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+
+
+# Metrics of the current process.
+metrics = Metrics()
@@ -1,11 +1,84 @@
 # -*- coding: utf-8 -*-
 
-from typing import Any, Dict, List, Optional, Union
+from array import array
+from sys import intern
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+
+class Messages(object):
+    """Compact storage of log messages captured by the listener.
+
+    Fields of messages are kept in separate columns instead of a dictionary per message:
+    texts as they are received from Robot Framework, times in milliseconds as an array of integers,
+    levels and keyword names as interned strings, flags of HTML messages as booleans.
+    Stamps of screenshots are kept only for messages with screenshots, by the number of the message.
+    Messages are formatted for Report Portal only when they are sent.
+    """
+
+    __slots__ = ("_times", "_messages", "_levels", "_keywords", "_html", "_file_stamps")
+
+    def __init__(self) -> None:
+        """Messages initialization."""
+        self._times = array("q")
+        self._messages: List[str] = []
+        self._levels: List[str] = []
+        self._keywords: List[str] = []
+        self._html: List[bool] = []
+        self._file_stamps: Dict[int, Tuple[int, int]] = {}
+
+    def append(self, message: Dict[str, Any]) -> None:
+        """Add message to the storage.
+
+        Args:
+            message: captured message with Robot Framework message, level, timestamp in milliseconds, html flag,
+                keyword name and optional stamp of its screenshot.
+        """
+        if "file_stamp" in message:
+            self._file_stamps[len(self._messages)] = message["file_stamp"]
+        self._times.append(message["timestamp"])
+        self._messages.append(message["message"])
+        self._levels.append(intern(message["level"]))
+        self._keywords.append(intern(message["keyword"]))
+        self._html.append(message.get("html") == "yes")
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over messages.
+
+        Returns:
+            Iterator over captured messages.
+        """
+        for number, (time, message, level, keyword, html) in enumerate(zip(self._times, self._messages, self._levels,
+                                                                           self._keywords, self._html)):
+            captured = {"message": message, "level": level, "timestamp": time, "keyword": keyword,
+                        "html": "yes" if html else "no"}
+            if number in self._file_stamps:
+                captured["file_stamp"] = self._file_stamps[number]
+            yield captured
+
+    def clear(self) -> None:
+        """Remove all messages."""
+        del self._times[:]
+        self._messages.clear()
+        self._levels.clear()
+        self._keywords.clear()
+        self._html.clear()
+        self._file_stamps.clear()
+
+    def __len__(self) -> int:
+        """Get number of messages.
+
+        Returns:
+            Number of messages.
+        """
+        return len(self._messages)
 
 
 class Suite(object):
     """Object describes suite."""
 
+    __slots__ = ("suites", "doc", "source", "total_tests", "longname", "robot_id", "metadata", "start_time",
+                 "end_time", "status", "message", "statistics", "rp_item_type", "tests", "type", "setup", "teardown")
+
     def __init__(self, attributes: Dict[str, Any]) -> None:
         """Suite initialization.
 
@@ -45,6 +118,9 @@ class Suite(object):
 class Test(object):
     """Object describes test."""
 
+    __slots__ = ("name", "critical", "template", "tags", "doc", "longname", "robot_id", "start_time", "status",
+                 "message", "end_time", "rp_item_type", "type", "setup", "teardown", "steps", "open_items")
+
     def __init__(self, name: str, attributes: Dict[str, Any]) -> None:
         """Test initialization.
 
@@ -56,7 +132,7 @@ class Test(object):
         self.name: str = name
         self.critical: str = attributes["critical"]
         self.template: str = attributes["template"]
-        self.tags: List[str] = attributes["tags"]
+        self.tags: Tuple[str, ...] = tuple(intern(tag) for tag in attributes["tags"])
         self.doc: str = attributes["doc"]
         self.longname: str = attributes["longname"]
         self.robot_id: str = attributes["id"]
@@ -69,6 +145,7 @@ class Test(object):
         self.setup: Optional[Keyword] = None
         self.teardown: Optional[Keyword] = None
         self.steps: List[Keyword] = []
+        self.open_items: List[int] = []
 
     def update(self, attributes: Dict[str, Any]) -> None:
         """Update test STATUS, MESSAGE and ENDTIME.
@@ -77,13 +154,16 @@ class Test(object):
             attributes (dict): test attributes.
         """
         self.status = attributes.get("status", "")
-        self.tags = attributes.get("tags", [])
+        self.tags = tuple(intern(tag) for tag in attributes.get("tags", []))
         self.end_time = attributes.get("endtime", "")
 
 
 class Keyword(object):
     """Object describes keyword."""
 
+    __slots__ = ("name", "libname", "keyword_name", "doc", "tags", "args", "assign", "start_time", "end_time",
+                 "status", "parent", "messages", "steps", "type", "level", "_rp_item_type")
+
     def __init__(self, name: str, attributes: Dict[str, Any], parent: Union[Suite, Test, "Keyword"]) -> None:
         """Keyword initialization.
 
@@ -93,22 +173,24 @@ class Keyword(object):
             parent: parent object, may be Keyword, Test or Suite.
         """
         super(Keyword, self).__init__()
-        self.name = name
-        self.libname: str = attributes["libname"]
-        self.keyword_name: str = attributes["kwname"]
+        self.name = intern(name)
+        self.libname: str = intern(attributes["libname"])
+        self.keyword_name: str = intern(attributes["kwname"])
         self.doc: str = attributes["doc"]
-        self.tags: List[str] = attributes["tags"]
+        self.tags: Tuple[str, ...] = tuple(intern(tag) for tag in attributes["tags"])
         self.args: List[str] = attributes["args"]
         self.assign: List[str] = attributes["assign"]
         self.start_time: str = attributes["starttime"]
         self.end_time: str = attributes.get("endtime", "")
         self.status: str = attributes.get("status", "")
         self.parent = parent
-        self.messages: List[Dict[str, Any]] = []
+        self.messages: Messages = Messages()
         self.steps: List[Keyword] = []
-        self.type: str = attributes["type"]
+        self.type: str = intern(attributes["type"])
 
         self._rp_item_type: Optional[str] = None
+        # Number of levels below the top level keyword, 0 for top level keywords and fixtures of tests and suites.
+        self.level: int = 0 if not isinstance(parent, Keyword) or self.is_top_level else parent.level + 1
 
     @property
     def rp_item_type(self) -> str:
@@ -118,7 +200,10 @@ class Keyword(object):
             Item type.
         """
         if self._rp_item_type is None:
-            if self.type == "Setup":
+            if isinstance(self.parent, Keyword):
+                # Setup and teardown of keywords are steps of the keyword.
+                self._rp_item_type = "STEP"
+            elif self.type == "Setup":
                 self._rp_item_type = f"BEFORE_{self.parent.type}"
             elif self.type == "Teardown":
                 self._rp_item_type = f"AFTER_{self.parent.type}"
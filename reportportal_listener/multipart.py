@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+import os
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Union
+from uuid import uuid4
+
+# Size of chunks in which attachment files are read while sending.
+CHUNK_SIZE = 65536
+
+
+class MultipartBody(object):
+    """File-like multipart/form-data request body.
+
+    Parts with file paths are not loaded into memory, files are read in chunks while the body is being sent.
+    Length of the body is known in advance, so it is sent with Content-Length header.
+    """
+
+    def __init__(self, parts: List[Dict[str, Any]]) -> None:
+        """Initialization.
+
+        Args:
+            parts: list of parts, each part is a dictionary with keys:
+                name - name of the form field;
+                filename - file name, optional;
+                mime - content type;
+                data - content of the part, or
+                path - path to the file with content of the part.
+        """
+        self.boundary = uuid4().hex
+        self._segments: List[Union[bytes, str]] = []
+        self._length = 0
+        for part in parts:
+            disposition = f'form-data; name="{part["name"]}"'
+            if part.get("filename"):
+                disposition += f'; filename="{part["filename"]}"'
+            self._add(f'--{self.boundary}\r\nContent-Disposition: {disposition}\r\n'
+                      f'Content-Type: {part["mime"]}\r\n\r\n'.encode("utf-8"))
+            if "path" in part:
+                self._segments.append(part["path"])
+                self._length += os.path.getsize(part["path"])
+            else:
+                self._add(part["data"])
+            self._add(b"\r\n")
+        self._add(f"--{self.boundary}--\r\n".encode("utf-8"))
+
+        self._index = 0
+        self._buffer = memoryview(b"")
+        self._file: Optional[BinaryIO] = None
+
+    @property
+    def content_type(self) -> str:
+        """Get value of Content-Type header for the body.
+
+        Returns:
+            Content type with boundary.
+        """
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        """Get length of the body in bytes.
+
+        Returns:
+            Length of the body.
+        """
+        return self._length
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Iterate over body chunks.
+
+        Returns:
+            Iterator over chunks of the body.
+        """
+        return iter(lambda: self.read(CHUNK_SIZE), b"")
+
+    def read(self, size: int = -1) -> bytes:
+        """Read the next chunk of the body.
+
+        Args:
+            size: max size of the chunk, read until the end of the body if it is negative.
+        Returns:
+            Chunk of the body, empty when the body is read completely.
+        """
+        if size is None or size < 0:
+            return b"".join(self)
+
+        while not self._buffer and self._index < len(self._segments):
+            segment = self._segments[self._index]
+            if isinstance(segment, bytes):
+                self._buffer = memoryview(segment)
+                self._index += 1
+            else:
+                if self._file is None:
+                    self._file = open(segment, "rb")
+                self._buffer = memoryview(self._file.read(max(size, CHUNK_SIZE)))
+                if not self._buffer:
+                    self._close_file()
+                    self._index += 1
+
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk.tobytes()
+
+    def seek(self, offset: int) -> None:
+        """Move to the start of the body to send it again.
+
+        Args:
+            offset: position in the body, only 0 is supported.
+        """
+        if offset != 0:
+            raise ValueError("Multipart body can be rewound only to the start.")
+
+        self._close_file()
+        self._index = 0
+        self._buffer = memoryview(b"")
+
+    def close(self) -> None:
+        """Close the file, which is read at the moment."""
+        self._close_file()
+
+    def _add(self, data: bytes) -> None:
+        """Add bytes segment to the body.
+
+        Args:
+            data: content of the segment.
+        """
+        self._segments.append(data)
+        self._length += len(data)
+
+    def _close_file(self) -> None:
+        """Close the current file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -1,12 +1,40 @@
 # -*- coding: utf-8 -*-
 
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import mkstemp
 from typing import Any, Dict, List, Optional, Type
+from xml.sax import parse
+from xml.sax.handler import ContentHandler
+from xml.sax.saxutils import XMLGenerator
+from xml.sax.xmlreader import AttributesImpl
 
 from robot.api import ResultVisitor
 from robot.result.model import TestCase, TestSuite
+from robot.utils import normalize
 
 from .service import RobotService
 
+# Name of the top suite metadata with link to Report Portal launch.
+METADATA_NAME = "Report Portal"
+
+# Max number of pages of items requested from Report Portal in parallel.
+PAGE_REQUESTS_WORKERS = 8
+
+
+def _add_link_to_doc(doc: str, link: str) -> str:
+    """Adds Report Portal link to test documentation.
+
+    Args:
+        doc: test documentation.
+        link: link to test in Report Portal.
+    Returns:
+        Documentation with link.
+    """
+    message = f'[{link} | Report Portal]'
+    return '\n\n'.join([doc, message]) if doc else message
+
 
 class RobotFrameworkReportModifier(ResultVisitor):
     """Class for modifying Robot Framework report."""
@@ -19,6 +47,7 @@ class RobotFrameworkReportModifier(ResultVisitor):
         """
         self._robot_service = robot_service
         self._uri_parts: Optional[Dict[str, str]] = None
+        self._use_item_index: Optional[bool] = None
 
     @property
     def uri_parts(self) -> Dict[str, str]:
@@ -38,7 +67,7 @@ class RobotFrameworkReportModifier(ResultVisitor):
             suite: visited suite.
         """
         if not suite.parent:
-            suite.metadata["Report Portal"] = self.get_link_to_rp_report()
+            suite.metadata[METADATA_NAME] = self.get_link_to_rp_report()
 
     def start_test(self, test: TestCase) -> None:
         """Visits each test in result and adds Report Portal link in documentation.
@@ -46,9 +75,7 @@ class RobotFrameworkReportModifier(ResultVisitor):
         Args:
             test: visited test.
         """
-        link = self.get_link_to_rp_report(test=test)
-        message = f'[{link} | Report Portal]'
-        test.doc = '\n\n'.join([test.doc, message]) if test.doc else message
+        test.doc = _add_link_to_doc(doc=test.doc, link=self.get_link_to_rp_report(test=test))
 
     def _get_rp_uri_parts(self) -> Dict[str, str]:
         """Gets uri parts, for item name.
@@ -75,21 +102,33 @@ class RobotFrameworkReportModifier(ResultVisitor):
     def _get_rp_tests_info(self) -> List[Dict[str, Any]]:
         """Gets information about tests items from Report Portal.
 
+        Pages after the first one are requested in parallel.
+
         Returns:
             Information about tests.
         """
-        params = {"page.size": 300, "filter.eq.type": "STEP"}
-        response = self._robot_service.get_items_info(**params)
-        page_num, page_count, tests = 2, response["page"]["totalPages"], response["content"]
+        response = self._get_rp_tests_page(page_num=1)
+        page_count, tests = response["page"]["totalPages"], response["content"]
 
-        while page_num <= page_count:
-            params["page.page"] = page_num
-            response = self._robot_service.get_items_info(**params)
-            tests.extend(response["content"])
-            page_num += 1
+        if page_count > 1:
+            with ThreadPoolExecutor(max_workers=min(PAGE_REQUESTS_WORKERS, page_count - 1)) as executor:
+                for response in executor.map(lambda page_num: self._get_rp_tests_page(page_num=page_num),
+                                             range(2, page_count + 1)):
+                    tests.extend(response["content"])
 
         return tests
 
+    def _get_rp_tests_page(self, page_num: int) -> Dict[str, Any]:
+        """Gets page of tests items from Report Portal.
+
+        Args:
+            page_num: number of the page, starting from 1.
+        Returns:
+            Response with tests and pages information.
+        """
+        params = {"page.size": 300, "page.page": page_num, "filter.eq.type": "STEP"}
+        return self._robot_service.get_items_info(**params)
+
     def get_link_to_rp_report(self, test: TestCase = None) -> str:
         """Gets link to report in Report Portal.
 
@@ -98,17 +137,219 @@ class RobotFrameworkReportModifier(ResultVisitor):
         Returns:
             Link to report.
         """
+        if test:
+            return self.get_link_to_rp_item(suite_longname=test.parent.longname, test_longname=test.longname)
+        return self.get_link_to_rp_item()
+
+    def get_link_to_rp_item(self, suite_longname: str = None, test_longname: str = None) -> str:
+        """Gets link to test in Report Portal by long names of the test and its suite.
+
+        Args:
+            suite_longname: long name of the test suite.
+            test_longname: long name of the test, link to the launch is returned if it is not specified.
+        Returns:
+            Link to report.
+        """
         if self._robot_service.rp is None:
             raise RuntimeError("RobotFrameworkService is not initialized.")
 
         link = f"{self._robot_service.rp.endpoint}/ui/#{self._robot_service.rp.project}" \
             f"/launches/all/{self._robot_service.rp.launch_id}"
-        if test:
-            suite_uri = self.uri_parts.get(test.parent.longname)
-            test_uri = self.uri_parts.get(test.longname)
+        if test_longname:
+            suite_uri = self._get_uri_part(longname=suite_longname)
+            test_uri = self._get_uri_part(longname=test_longname)
             if suite_uri:
                 link += suite_uri
                 if test_uri:
                     link += test_uri
 
         return link
+
+    def _get_uri_part(self, longname: str) -> Optional[str]:
+        """Gets uri part of the suite or the test.
+
+        Items started by the listener are taken from the index of items,
+        Report Portal is requested only if the index is empty, e.g. for an external launch.
+
+        Args:
+            longname: long name of the suite or the test.
+        Returns:
+            Uri part, None if the item is not found.
+        """
+        if self._use_item_index is None:
+            self._robot_service.flush()
+            self._use_item_index = len(self._robot_service.item_index) > 0
+
+        if self._use_item_index:
+            return self._robot_service.item_index.get_uri_part(longname=longname)
+        return self.uri_parts.get(longname)
+
+
+class OutputFileModifier(ContentHandler):
+    """Class for adding Report Portal links to output file without loading it into memory.
+
+    Output file is parsed as a stream of SAX events, which are written to a temporary file
+    in the same directory. Top suite metadata and test documentation are completed with links on the way,
+    then the temporary file replaces output file.
+    """
+
+    def __init__(self, robot_service: Type[RobotService]) -> None:  # noqa: E951
+        """Initialization.
+
+        Args:
+            robot_service: instance RobotService.
+        """
+        super(OutputFileModifier, self).__init__()
+        self._report_modifier = RobotFrameworkReportModifier(robot_service=robot_service)
+        self._writer: Optional[XMLGenerator] = None
+        self._elements: List[str] = []
+        self._suites: List[str] = []
+        self._test: Optional[str] = None
+        self._doc: Optional[List[str]] = None
+        self._doc_written = False
+        self._metadata_written = False
+        self._metadata_item = False
+
+    def modify(self, path: str) -> None:
+        """Adds Report Portal links to output file.
+
+        Args:
+            path: path to output file.
+        """
+        directory, name = os.path.split(os.path.abspath(path))
+        handle, temp_path = mkstemp(prefix=f".{name}.", dir=directory)
+        try:
+            with os.fdopen(handle, "wb") as output:
+                self._writer = XMLGenerator(output, encoding="UTF-8", short_empty_elements=False)
+                parse(path, self)
+            shutil.copymode(path, temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def startDocument(self) -> None:
+        """Starts output document."""
+        self._writer.startDocument()
+
+    def endDocument(self) -> None:
+        """Ends output document."""
+        self._writer.endDocument()
+
+    def startElement(self, name: str, attrs: AttributesImpl) -> None:
+        """Writes start of the element, adds links before it if needed.
+
+        Args:
+            name: element name.
+            attrs: element attributes.
+        """
+        parent = self._elements[-1] if self._elements else None
+        self._elements.append(name)
+        if name == "suite" and parent in ("robot", "suite"):
+            self._suites.append(f"{self._suites[-1]}.{attrs['name']}" if self._suites else attrs["name"])
+        elif name == "test" and parent == "suite":
+            self._test = f"{self._suites[-1]}.{attrs['name']}"
+            self._doc_written = False
+        elif parent == "test" and self._test and not self._doc_written:
+            if name == "doc":
+                self._doc = []
+            elif name in ("tags", "timeout", "status"):
+                self._write_element(name="doc", text=self._get_test_doc(doc=""))
+                self._doc_written = True
+        elif self._in_top_suite(depth=2) and not self._metadata_written:
+            if name == "status":
+                self._writer.startElement("metadata", AttributesImpl({}))
+                self._writer.characters("\n")
+                self._write_metadata()
+                self._writer.endElement("metadata")
+                self._writer.characters("\n")
+        elif name == "item" and self._in_top_suite(depth=3) and not self._metadata_written:
+            item_name = normalize(attrs.get("name", ""), ignore="_")
+            if item_name == normalize(METADATA_NAME, ignore="_"):
+                self._metadata_item = True
+            elif item_name > normalize(METADATA_NAME, ignore="_"):
+                self._write_metadata()
+
+        self._writer.startElement(name, attrs)
+
+    def endElement(self, name: str) -> None:
+        """Writes end of the element, adds links before it if needed.
+
+        Args:
+            name: element name.
+        """
+        self._elements.pop()
+        if name == "item" and self._metadata_item:
+            self._writer.characters(self._report_modifier.get_link_to_rp_item())
+            self._metadata_item = False
+            self._metadata_written = True
+        elif name == "doc" and self._doc is not None:
+            self._writer.characters(self._get_test_doc(doc="".join(self._doc)))
+            self._doc = None
+            self._doc_written = True
+        elif name == "metadata" and self._in_top_suite(depth=1) and not self._metadata_written:
+            self._write_metadata()
+        elif name == "test" and self._test:
+            self._test = None
+        elif name == "suite" and (not self._elements or self._elements[-1] in ("robot", "suite")):
+            self._suites.pop()
+        self._writer.endElement(name)
+
+    def characters(self, content: str) -> None:
+        """Writes element text.
+
+        Args:
+            content: text.
+        """
+        if self._doc is not None:
+            self._doc.append(content)
+        elif not self._metadata_item:
+            self._writer.characters(content)
+
+    def ignorableWhitespace(self, whitespace: str) -> None:
+        """Writes whitespace between elements.
+
+        Args:
+            whitespace: whitespace characters.
+        """
+        self.characters(whitespace)
+
+    def _in_top_suite(self, depth: int) -> bool:
+        """Checks if the current element is nested in the top suite at the given depth.
+
+        Args:
+            depth: depth of nesting, 1 - the current element is the top suite.
+        Returns:
+            True if the element is in the top suite, otherwise - False.
+        """
+        return len(self._suites) == 1 and len(self._elements) > depth and self._elements[-depth] == "suite"
+
+    def _get_test_doc(self, doc: str) -> str:
+        """Gets documentation of the current test with Report Portal link.
+
+        Args:
+            doc: test documentation.
+        Returns:
+            Documentation with link.
+        """
+        link = self._report_modifier.get_link_to_rp_item(suite_longname=self._suites[-1], test_longname=self._test)
+        return _add_link_to_doc(doc=doc, link=link)
+
+    def _write_metadata(self) -> None:
+        """Writes top suite metadata item with link to Report Portal launch."""
+        self._write_element(name="item", text=self._report_modifier.get_link_to_rp_item(),
+                            attrs={"name": METADATA_NAME})
+        self._metadata_written = True
+
+    def _write_element(self, name: str, text: str, attrs: Dict[str, str] = None) -> None:
+        """Writes the element added to output file.
+
+        Args:
+            name: element name.
+            text: element text.
+            attrs: element attributes.
+        """
+        self._writer.startElement(name, AttributesImpl(attrs or {}))
+        self._writer.characters(text)
+        self._writer.endElement(name)
+        self._writer.characters("\n")
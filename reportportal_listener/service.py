@@ -1,38 +1,106 @@
 # -*- coding: utf-8 -*-
 
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from itertools import count
 from time import time
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 from reportportal_client.errors import ResponseError as ReportPortalResponseError
-from reportportal_client.service import ReportPortalService, uri_join
+from reportportal_client.service import ReportPortalService, _get_data, uri_join
 from requests.exceptions import ConnectionError
+from robot.api import logger
 from robot.libraries.BuiltIn import BuiltIn
 from urllib3.exceptions import ResponseError
 
+from .attachment_cache import AttachmentCache
+from .images import ImageProcessor
+from .index import ItemIndex
+from .message import MESSAGE_MAX_LENGTH, MessageFormatter
+from .metrics import metrics
 from .report import Report
 from .model import Keyword, Suite, Test
+from .multipart import MultipartBody
+from .spool import Journal
+from .transport import GzipBody, ReportPortalAdapter, mount_adapter
+from .uploader import ITEM_REQUESTS, UploaderClient
+from .worker import BackgroundWorker
 
 
-def timestamp(rf_time: str = None) -> str:
-    """Get a timestamp to use when sending logs to Report Portal.
+# Format of timestamps used in RobotFramework.
+RF_TIME_FORMAT = "%Y%m%d %H:%M:%S.%f"
+
+
+@lru_cache(maxsize=1024)
+def _rf_seconds_to_timestamp(rf_seconds: str) -> float:
+    """Convert date and time without fractions of second to POSIX timestamp.
+
+    Args:
+        rf_seconds: time in the format "YYYYMMDD HH:MM:SS".
+    Returns:
+        POSIX timestamp.
+    """
+    return datetime(int(rf_seconds[0:4]), int(rf_seconds[4:6]), int(rf_seconds[6:8]),
+                    int(rf_seconds[9:11]), int(rf_seconds[12:14]), int(rf_seconds[15:17])).timestamp()
+
+
+def _rf_time_to_timestamp(rf_time: str) -> float:
+    """Convert RobotFramework time to POSIX timestamp.
+
+    Time in the usual format "YYYYMMDD HH:MM:SS.fff" is parsed without strptime,
+    converted seconds are cached, as many messages are logged within the same second.
+    Other values are parsed with strptime.
 
     Args:
         rf_time: Time in the format used in RobotFramework.
     Returns:
-        Time stamp for use in the log.
+        POSIX timestamp.
+    """
+    fraction = rf_time[18:]
+    if (19 <= len(rf_time) <= 24 and rf_time[8] == " " and rf_time[11] == ":" and rf_time[14] == ":"
+            and rf_time[17] == "." and rf_time[0:8].isdigit() and rf_time[9:11].isdigit()
+            and rf_time[12:14].isdigit() and rf_time[15:17].isdigit() and fraction.isdigit()):
+        return _rf_seconds_to_timestamp(rf_time[:17]) + int(fraction.ljust(6, "0")) / 1e6
+
+    return datetime.strptime(rf_time, RF_TIME_FORMAT).timestamp()
+
+
+def rf_time_to_milliseconds(rf_time: str = None) -> int:
+    """Convert RobotFramework time to milliseconds since the epoch.
+
+    Args:
+        rf_time: Time in the format used in RobotFramework, current time is used if it is not specified.
+    Returns:
+        Number of milliseconds.
     """
     if rf_time:
-        _timestamp = datetime.strptime(rf_time, "%Y%m%d %H:%M:%S.%f").timestamp()
+        _timestamp = _rf_time_to_timestamp(rf_time)
     else:
         _timestamp = time()
 
-    return str(int(_timestamp * 1000))
+    return int(_timestamp * 1000)
+
+
+def timestamp(rf_time: str = None) -> str:
+    """Get a timestamp to use when sending logs to Report Portal.
+
+    Args:
+        rf_time: Time in the format used in RobotFramework.
+    Returns:
+        Time stamp for use in the log.
+    """
+    return str(rf_time_to_milliseconds(rf_time=rf_time))
 
 
 def ignore_broken_pipe_error(func: Callable[..., Any]) -> Callable[..., Any]:
     """Decorator for ignore BrokenPipeError.
 
+    The failure is written to the console only, as the decorated function may run in the background thread,
+    where the Robot Framework log can not be written to.
+
     Args:
         func: function to decorate.
     Returns:
@@ -47,7 +115,8 @@ def ignore_broken_pipe_error(func: Callable[..., Any]) -> Callable[..., Any]:
             if 'BrokenPipeError' not in message:
                 raise ConnectionError(message)
 
-            RobotService.builtin_lib().log(message=message, level="WARN")
+            logger.console(f"[reportportal-listener] Log request to Report Portal failed after retries: {message}",
+                           stream="stderr")
 
     return d
 
@@ -57,6 +126,27 @@ class RobotService(object):
     rp: Optional[ReportPortalService] = None
     builtin: Optional[BuiltIn] = None
     report: Optional[Report] = None
+    worker: Optional[BackgroundWorker] = None
+    close_timeout: Optional[float] = None
+    log_executor: Optional[ThreadPoolExecutor] = None
+    log_batch_size: int = 0
+    log_batch_max_bytes: int = 0
+    gzip_logs: bool = False
+    output_dir: Optional[str] = None
+    attachment_max_size: int = 0
+    message_max_length: int = MESSAGE_MAX_LENGTH
+    spill_messages: bool = False
+    attachment_cache: Optional[AttachmentCache] = None
+    image_processor: Optional[ImageProcessor] = None
+    adapter: Optional[ReportPortalAdapter] = None
+    start_time: float = 0.0
+    log_statistics: Dict[str, int] = {"records": 0, "calls": 0, "batches": 0}
+    journal: Optional[Journal] = None
+    uploader: Optional[UploaderClient] = None
+    detached_items: Dict[int, str] = {}
+    item_handles = count()
+    item_index = ItemIndex()
+    item_index_file: Optional[str] = None
 
     status_mapping = {"PASS": "PASSED", "FAIL": "FAILED", "SKIP": "SKIPPED"}
 
@@ -92,27 +182,267 @@ class RobotService(object):
         return RobotService.report
 
     @staticmethod
-    def init_service(endpoint: str, project: str, uuid: str) -> None:
+    def init_service(endpoint: str, project: str, uuid: str, async_mode: bool = False, queue_size: int = 1000,
+                     close_timeout: float = None, log_batch_size: int = 0, log_batch_max_bytes: int = 0,
+                     log_batch_workers: int = 1, spool_file: str = None, item_index_file: str = None,
+                     pool_size: int = 10, timeout: float = None, retries: int = 3, gzip_logs: bool = False,
+                     uploader_socket: str = None, output_dir: str = None, attachment_max_size: int = 0,
+                     message_max_length: int = MESSAGE_MAX_LENGTH, spill_messages: bool = False,
+                     deduplicate_attachments: bool = False, image_min_size: int = 0, image_format: str = "JPEG",
+                     image_max_dimension: int = 1920, image_workers: int = 1) -> None:
         """Initialization of the service for working with the Report Portal.
 
         Args:
             endpoint: Report Portal endpoint.
             project: Report Portal project name.
             uuid: Report Portal uuid.
+            async_mode: send requests to Report Portal in the background thread.
+            queue_size: max number of requests waiting for sending in the background.
+            close_timeout: max time in seconds to wait for sending requests on terminating the service.
+            log_batch_size: max number of messages in one log request, 0 - not limited.
+            log_batch_max_bytes: max estimated size of one log request in bytes, 0 - not limited.
+            log_batch_workers: number of log requests of the same item sent in parallel.
+            spool_file: path to the journal, requests are written to it instead of sending to Report Portal.
+            item_index_file: path to JSON file the index of started items is saved to on terminating the service.
+            pool_size: max number of kept connections to Report Portal.
+            timeout: timeout of connecting and reading a response in seconds, requests wait forever if it is None.
+            retries: max number of retries of a request failed with connection error, e.g. broken pipe.
+            gzip_logs: compress bodies of log requests with attachments with gzip.
+            uploader_socket: path to the Unix socket of the uploader, requests are passed to it
+                instead of sending to Report Portal.
+            output_dir: directory screenshot paths in messages are relative to.
+            attachment_max_size: max size of screenshot files in bytes, larger files are not attached, 0 - no limit.
+            message_max_length: max length of log messages, longer messages are truncated.
+            spill_messages: attach the full text of longer messages as gzipped files instead of truncating it.
+            deduplicate_attachments: attach screenshots with the same content once in the launch.
+            image_min_size: min size of screenshots in bytes, which are resized and re-encoded, 0 - screenshots
+                are attached as they are.
+            image_format: format of re-encoded screenshots: JPEG, WEBP or PNG.
+            image_max_dimension: max width and height of re-encoded screenshots in pixels.
+            image_workers: number of processes re-encoding screenshots.
         """
         if RobotService.rp is None:
             RobotService.rp = ReportPortalService(endpoint=endpoint, project=project, token=uuid)
+            RobotService.adapter = mount_adapter(session=RobotService.rp.session, pool_size=pool_size,
+                                                 timeout=timeout, retries=retries)
+            RobotService.start_time = time()
+            if spool_file:
+                RobotService.journal = Journal(path=spool_file)
+            elif uploader_socket:
+                RobotService.uploader = UploaderClient(path=uploader_socket)
+            elif async_mode:
+                RobotService.worker = BackgroundWorker(queue_size=queue_size)
+            if log_batch_workers > 1:
+                RobotService.log_executor = ThreadPoolExecutor(max_workers=log_batch_workers)
+            RobotService.close_timeout = close_timeout
+            RobotService.log_batch_size = log_batch_size
+            RobotService.log_batch_max_bytes = log_batch_max_bytes
+            RobotService.item_index_file = item_index_file
+            RobotService.gzip_logs = gzip_logs
+            RobotService.output_dir = output_dir
+            RobotService.attachment_max_size = attachment_max_size
+            RobotService.message_max_length = message_max_length
+            RobotService.spill_messages = spill_messages
+            if deduplicate_attachments:
+                RobotService.attachment_cache = AttachmentCache()
+            if image_min_size:
+                RobotService.image_processor = ImageProcessor(min_size=image_min_size, image_format=image_format,
+                                                              max_dimension=image_max_dimension,
+                                                              workers=image_workers)
         else:
             raise Exception("RobotFrameworkService is already initialized.")
 
     @staticmethod
     def terminate_service() -> None:
-        """Terminate the service."""
+        """Terminate the service.
+
+        If requests sent in the background are not completed in close timeout, the service is not torn down,
+        as the worker thread still sends them.
+        """
+        if RobotService.journal is not None:
+            RobotService.journal.close()
+            RobotService.journal = None
+
+        if RobotService.uploader is not None:
+            RobotService.uploader.close()
+            RobotService.uploader = None
+
+        if RobotService.worker is not None:
+            if not RobotService.worker.stop(timeout=RobotService.close_timeout):
+                # The worker thread still uses the client, the log executor and processing of screenshots,
+                # so they are left as they are, and the remaining requests are dropped on exit.
+                RobotService.builtin_lib().log_to_console(
+                    f"[reportportal-listener] {RobotService.worker.pending} requests were not sent to Report Portal "
+                    f"in {RobotService.close_timeout} seconds, they are dropped. The launch and its items may "
+                    f"be left unfinished, the index of items is not saved.")
+                return
+            RobotService.worker = None
+
+        if RobotService.log_executor is not None:
+            RobotService.log_executor.shutdown()
+            RobotService.log_executor = None
+
+        if RobotService.log_statistics["batches"] > RobotService.log_statistics["calls"]:
+            # Messages were split into batches by their number or size.
+            RobotService.builtin_lib().log_to_console(
+                f"[reportportal-listener] {RobotService.log_statistics['records']} log messages were sent "
+                f"to Report Portal in {RobotService.log_statistics['batches']} requests.")
+
+        if RobotService.image_processor is not None:
+            RobotService.image_processor.close()
+            if RobotService.image_processor.processed:
+                RobotService.builtin_lib().log_to_console(
+                    f"[reportportal-listener] {RobotService.image_processor.processed} distinct screenshots "
+                    f"were attached re-encoded, {RobotService.image_processor.saved_bytes} bytes were saved.")
+            RobotService.image_processor = None
+
+        if RobotService.attachment_cache is not None:
+            if RobotService.attachment_cache.repeated:
+                RobotService.builtin_lib().log_to_console(
+                    f"[reportportal-listener] {RobotService.attachment_cache.repeated} repeated screenshots "
+                    f"({RobotService.attachment_cache.repeated_bytes} bytes) were not attached again.")
+            RobotService.attachment_cache = None
+
+        if RobotService.item_index_file and RobotService.rp is not None:
+            RobotService.item_index.save(path=RobotService.item_index_file, launch_id=RobotService.rp.launch_id)
+
         if RobotService.rp is not None:
             RobotService.rp.terminate()
 
     @staticmethod
-    def start_launch(launch_name: str, launch_tags: List[str], launch: Suite, mode: str = None) -> str:
+    def get_request_statistics() -> Tuple[int, float]:
+        """Gets number of HTTP requests sent to Report Portal and time from initialization of the service.
+
+        Returns:
+            Number of requests and time in seconds.
+        """
+        requests = RobotService.adapter.requests if RobotService.adapter is not None else 0
+        return requests, time() - RobotService.start_time
+
+    @staticmethod
+    def flush() -> bool:
+        """Wait until all requests sent in the background or passed to the uploader are completed.
+
+        Returns:
+            True if all requests are completed, False if requests sent in the background
+            are not completed in close timeout.
+        """
+        if RobotService.uploader is not None:
+            RobotService.uploader.request(method="flush", kwargs={})
+        if RobotService.worker is not None:
+            return RobotService.worker.flush(timeout=RobotService.close_timeout)
+        return True
+
+    @staticmethod
+    def _call(method: str, **kwargs: Any) -> None:
+        """Send request to Report Portal.
+
+        In async mode the request is sent in the background thread.
+        In offline mode the request is written to the journal.
+        With the uploader the request is passed to it.
+
+        Args:
+            method: name of the request, see execute.
+            kwargs: arguments of the request.
+        """
+        if RobotService.journal is not None:
+            RobotService.journal.write(method=method, kwargs=kwargs)
+        elif RobotService.uploader is not None:
+            RobotService.uploader.write(method=method, kwargs=kwargs)
+        elif RobotService.worker is not None:
+            RobotService.worker.submit(RobotService.execute, method, dependent=method in ITEM_REQUESTS, **kwargs)
+        else:
+            RobotService.execute(method, **kwargs)
+
+    @staticmethod
+    def execute(method: str, **kwargs: Any) -> Any:
+        """Execute request to Report Portal.
+
+        Args:
+            method: name of the request: one of send_log, send_raw_log, detach_item, attach_item, use_launch,
+                start_test_item, or a method of ReportPortalService.
+            kwargs: arguments of the request.
+        Returns:
+            Result of the request.
+        """
+        if RobotService.rp is None:
+            raise RuntimeError("RobotFrameworkService is not initialized.")
+
+        request = getattr(RobotService, f"_{method}", None) or getattr(RobotService.rp, method)
+        return metrics.call(f"request.{method}", request, **kwargs)
+
+    @staticmethod
+    def _start_test_item(longname: str = None, robot_id: str = None, **kwargs: Any) -> str:
+        """Start the item and add it to the index of items.
+
+        Args:
+            longname: long name of the suite or the test, it is not specified for keywords.
+            robot_id: Robot Framework id of the suite or the test.
+            kwargs: arguments of ReportPortalService.start_test_item.
+        Returns:
+            Item id.
+        """
+        if RobotService.rp is None:
+            raise RuntimeError("RobotFrameworkService is not initialized.")
+
+        item_id = RobotService.rp.start_test_item(**kwargs)
+        path = [item for item in RobotService.rp.stack[:-1] if item]
+        RobotService.item_index.add_child(parent_id=path[-1] if path else None)
+        if longname is not None and RobotService.item_index.get(longname=longname, robot_id=robot_id) is None:
+            RobotService.item_index.add(item_id=item_id, path=path, item_type=kwargs["item_type"], longname=longname,
+                                        robot_id=robot_id)
+        return item_id
+
+    @staticmethod
+    def _detach_item(handle: int) -> None:
+        """Remove the current item from the stack of the client and remember it.
+
+        Args:
+            handle: key to remember the item by.
+        """
+        if RobotService.rp is None:
+            raise RuntimeError("RobotFrameworkService is not initialized.")
+
+        RobotService.detached_items[handle] = RobotService.rp.stack.pop()
+
+    @staticmethod
+    def _attach_item(handle: int) -> None:
+        """Return the remembered item to the stack of the client.
+
+        Args:
+            handle: key the item is remembered by.
+        """
+        if RobotService.rp is None:
+            raise RuntimeError("RobotFrameworkService is not initialized.")
+
+        RobotService.rp.stack.append(RobotService.detached_items.pop(handle))
+
+    @staticmethod
+    def _use_launch(launch_id: str) -> None:
+        """Set id of the launch to log items to.
+
+        Args:
+            launch_id: launch id.
+        """
+        if RobotService.rp is None:
+            raise RuntimeError("RobotFrameworkService is not initialized.")
+
+        RobotService.rp.launch_id = launch_id
+
+    @staticmethod
+    def use_launch(launch_id: str) -> None:
+        """Use the launch created outside of the listener.
+
+        Args:
+            launch_id: launch id.
+        """
+        RobotService._call("use_launch", launch_id=launch_id)
+        if RobotService.uploader is not None and RobotService.rp is not None:
+            # The launch is also needed locally for links to Report Portal.
+            RobotService.rp.launch_id = launch_id
+
+    @staticmethod
+    def start_launch(launch_name: str, launch_tags: Sequence[str], launch: Suite, mode: str = None) -> Optional[str]:
         """Register a new launch in Report Portal.
 
         Args:
@@ -122,19 +452,24 @@ class RobotService(object):
             mode: data storage mode.
 
         Returns:
-            Launch id.
+            Launch id, None in offline mode.
         """
         if RobotService.rp is None:
             raise RuntimeError("RobotFrameworkService is not initialized.")
 
         sl_pt = {
             "name": launch_name,
-            "start_time": timestamp(),
+            "start_time": timestamp(rf_time=launch.start_time),
             "description": launch.doc,
             "mode": mode,
-            "tags": launch_tags
+            "tags": list(launch_tags)
         }
-        return RobotService.rp.start_launch(**sl_pt)
+        if RobotService.journal is not None:
+            RobotService._call("start_launch", **sl_pt)
+            return None
+        if RobotService.uploader is not None:
+            return RobotService.uploader.request(method="start_launch", kwargs=sl_pt)
+        return metrics.call("request.start_launch", RobotService.rp.start_launch, **sl_pt)
 
     @staticmethod
     def finish_launch(launch: Suite) -> None:
@@ -146,8 +481,8 @@ class RobotService(object):
         if RobotService.rp is None:
             raise RuntimeError("RobotFrameworkService is not initialized.")
 
-        fl_rq = {"end_time": timestamp(), "status": RobotService.status_mapping[launch.status]}
-        RobotService.rp.finish_launch(**fl_rq)
+        fl_rq = {"end_time": timestamp(rf_time=launch.end_time), "status": RobotService.status_mapping[launch.status]}
+        RobotService._call("finish_launch", **fl_rq)
 
     @staticmethod
     def start_suite(suite: Suite) -> None:
@@ -164,9 +499,11 @@ class RobotService(object):
             "description": suite.doc,
             "tags": [],
             "start_time": timestamp(rf_time=suite.start_time),
-            "item_type": suite.rp_item_type
+            "item_type": suite.rp_item_type,
+            "longname": suite.longname,
+            "robot_id": suite.robot_id
         }
-        RobotService.rp.start_test_item(**start_rq)
+        RobotService._call("start_test_item", **start_rq)
 
     @staticmethod
     def finish_suite(suite: Suite, issue: str = None) -> None:
@@ -184,7 +521,7 @@ class RobotService(object):
             "status": RobotService.status_mapping[suite.status],
             "issue": issue
         }
-        RobotService.rp.finish_test_item(**fta_rq)
+        RobotService._call("finish_test_item", **fta_rq)
 
     @staticmethod
     def start_test(test: Test) -> None:
@@ -206,9 +543,11 @@ class RobotService(object):
             "description": description,
             "tags": test.tags,
             "start_time": timestamp(rf_time=test.start_time),
-            "item_type": test.rp_item_type
+            "item_type": test.rp_item_type,
+            "longname": test.longname,
+            "robot_id": test.robot_id
         }
-        RobotService.rp.start_test_item(**start_rq)
+        RobotService._call("start_test_item", **start_rq)
 
     @staticmethod
     def finish_test(test: Test, issue: str = None) -> None:
@@ -226,7 +565,7 @@ class RobotService(object):
             "status": RobotService.status_mapping[test.status],
             "issue": issue
         }
-        RobotService.rp.finish_test_item(**fta_rq)
+        RobotService._call("finish_test_item", **fta_rq)
 
     @staticmethod
     def start_keyword(keyword: Keyword) -> None:
@@ -245,7 +584,7 @@ class RobotService(object):
             "start_time": timestamp(rf_time=keyword.start_time),
             "item_type": keyword.rp_item_type
         }
-        RobotService.rp.start_test_item(**start_rq)
+        RobotService._call("start_test_item", **start_rq)
 
     @staticmethod
     def finish_keyword(keyword: Keyword, issue: str = None) -> None:
@@ -263,24 +602,204 @@ class RobotService(object):
             "status": RobotService.status_mapping[keyword.status],
             "issue": issue
         }
-        RobotService.rp.finish_test_item(**fta_rq)
+        RobotService._call("finish_test_item", **fta_rq)
+
+    @staticmethod
+    def detach_item() -> int:
+        """Leave the current item unfinished and return to its parent.
+
+        Used for items which have to be finished later, e.g. when their status is not known yet.
+
+        Returns:
+            Handle of the item.
+        """
+        if RobotService.rp is None:
+            raise RuntimeError("RobotFrameworkService is not initialized.")
+
+        handle = next(RobotService.item_handles)
+        RobotService._call("detach_item", handle=handle)
+        return handle
+
+    @staticmethod
+    def attach_item(handle: int) -> None:
+        """Make the detached item current again, so it can be logged to and finished.
+
+        Args:
+            handle: handle of the item returned by detach_item.
+        """
+        if RobotService.rp is None:
+            raise RuntimeError("RobotFrameworkService is not initialized.")
+
+        RobotService._call("attach_item", handle=handle)
 
     @staticmethod
-    @ignore_broken_pipe_error
     def log(log_data: Union[list, dict]) -> None:
         """Send a message in the Report Portal log.
 
+        Messages are formatted when they are sent, in async mode - in the background thread.
+        Messages written to the journal or passed to the uploader are formatted now,
+        as they are sent by another process.
+
         Args:
-            log_data: message, or a list of messages prepared for logging in ReportPortal.
+            log_data: message, or a list of messages captured by the listener.
         """
         if RobotService.rp is None:
             raise RuntimeError("RobotFrameworkService is not initialized.")
 
+        if RobotService.journal is not None or RobotService.uploader is not None:
+            RobotService._call("send_log", log_data=RobotService.format_log(log_data=log_data))
+        else:
+            RobotService._call("send_raw_log", log_data=log_data)
+
+    @staticmethod
+    def format_log(log_data: Union[list, dict]) -> Union[list, dict]:
+        """Format messages captured by the listener for Report Portal.
+
+        Args:
+            log_data: message, or a list of messages with Robot Framework message, level, timestamp
+                in milliseconds, optional html flag, name of the keyword, which logged it, and optional
+                size and modification time of its screenshot.
+        Returns:
+            Message, or a list of messages prepared for logging in ReportPortal.
+        """
+        messages = [log_data] if isinstance(log_data, dict) else log_data
+        formatted = [
+            MessageFormatter.format_message(
+                message={"message": message["message"], "level": RobotService.log_level_mapping[message["level"]],
+                         "timestamp": str(message["timestamp"])},
+                keyword_name=message["keyword"], max_attachment_size=RobotService.attachment_max_size,
+                output_dir=RobotService.output_dir, html=message.get("html") == "yes",
+                max_length=RobotService.message_max_length, spill=RobotService.spill_messages,
+                attachment_cache=RobotService.attachment_cache, image_processor=RobotService.image_processor,
+                file_stamp=message.get("file_stamp"))
+            for message in messages
+        ]
+        return formatted[0] if isinstance(log_data, dict) else formatted
+
+    @staticmethod
+    def _send_raw_log(log_data: Union[list, dict]) -> None:
+        """Format messages captured by the listener and send them in the Report Portal log.
+
+        Args:
+            log_data: message, or a list of messages captured by the listener.
+        """
+        RobotService._send_log(log_data=RobotService.format_log(log_data=log_data))
+
+    @staticmethod
+    def _send_log(log_data: Union[list, dict], rp: ReportPortalService = None) -> None:
+        """Send messages in the Report Portal log, split into batches by number and size of messages.
+
+        Batches are sent in parallel if log batch workers are configured.
+
+        Args:
+            log_data: message, or a list of messages prepared for logging in ReportPortal.
+            rp: client to send messages with, the client of the service is used if it is not specified.
+        """
+        rp = rp or RobotService.rp
+        if rp is None:
+            raise RuntimeError("RobotFrameworkService is not initialized.")
+
+        batches: List[Tuple[Union[list, dict], Optional[List[bytes]]]] = [(log_data, None)]
+        if isinstance(log_data, list):
+            batches = RobotService._split_log_batches(log_data=log_data, item_id=rp.stack[-1])
+        if RobotService.log_executor is not None and len(batches) > 1:
+            # Wait for all batches, as the current item must not be changed until they are sent.
+            list(RobotService.log_executor.map(
+                lambda batch: RobotService._send_log_batch(log_data=batch[0], rp=rp, records=batch[1]), batches))
+        else:
+            for batch, records in batches:
+                RobotService._send_log_batch(log_data=batch, rp=rp, records=records)
+
+        RobotService.log_statistics["records"] += 1 if isinstance(log_data, dict) else len(log_data)
+        RobotService.log_statistics["calls"] += 1
+        RobotService.log_statistics["batches"] += len(batches)
+
+    @staticmethod
+    def _split_log_batches(log_data: List[Dict[str, Any]],
+                           item_id: str) -> List[Tuple[List[Dict[str, Any]], List[bytes]]]:
+        """Split messages into batches by configured max number of messages and max size of the batch.
+
+        Messages are encoded to JSON records of the log request here, so size of a message is the size
+        of its record, which is sent, plus size of its attachment.
+
+        Args:
+            log_data: list of messages prepared for logging in ReportPortal.
+            item_id: id of the item messages are logged to.
+        Returns:
+            List of batches of messages with their encoded records.
+        """
+        batches: List[Tuple[List[Dict[str, Any]], List[bytes]]] = []
+        batch: List[Dict[str, Any]] = []
+        records: List[bytes] = []
+        batch_bytes = 0
+        for message in log_data:
+            attachment = message.get("attachment")
+            # Headers of the multipart part of the file take less than 200 bytes.
+            attachment_bytes = 200 if attachment else 0
+            if attachment and "path" in attachment:
+                try:
+                    attachment_bytes += os.path.getsize(attachment["path"])
+                except OSError:
+                    # Only this message loses its file, e.g. removed after the message was formatted.
+                    text = f"{message['message']}\nFile {attachment['path']} is not attached: it is not found."
+                    message, attachment_bytes = dict(message, attachment=None, message=text), 0
+            elif attachment:
+                attachment_bytes += len(attachment["data"])
+            record = RobotService._encode_log_record(message=message, item_id=item_id)
+            # Records are separated by two bytes in the JSON array.
+            message_bytes = len(record) + 2 + attachment_bytes
+
+            if batch and (len(batch) == RobotService.log_batch_size or
+                          RobotService.log_batch_max_bytes and
+                          batch_bytes + message_bytes > RobotService.log_batch_max_bytes):
+                batches.append((batch, records))
+                batch, records, batch_bytes = [], [], 0
+            batch.append(message)
+            records.append(record)
+            batch_bytes += message_bytes
+
+        if batch:
+            batches.append((batch, records))
+        return batches
+
+    @staticmethod
+    def _encode_log_record(message: Dict[str, Any], item_id: str) -> bytes:
+        """Encode the message to JSON record of the log request.
+
+        Non-ASCII characters are not escaped, so the record is not larger than the message encoded in UTF-8.
+
+        Args:
+            message: message prepared for logging in ReportPortal.
+            item_id: id of the item the message is logged to.
+        Returns:
+            JSON record encoded in UTF-8.
+        """
+        record = {key: value for key, value in message.items() if key != "attachment"}
+        record["item_id"] = item_id
+        attachment = message.get("attachment")
+        if attachment:
+            record["file"] = {"name": attachment["name"]}
+        return json.dumps(record, ensure_ascii=False).encode("utf-8")
+
+    @staticmethod
+    @ignore_broken_pipe_error
+    def _send_log_batch(log_data: Union[list, dict], rp: ReportPortalService = None,
+                        records: List[bytes] = None) -> None:
+        """Send a message or a batch of messages in the Report Portal log.
+
+        Args:
+            log_data: message, or a list of messages prepared for logging in ReportPortal.
+            rp: client to send messages with, the client of the service is used if it is not specified.
+            records: JSON records of the list of messages, they are encoded here if they are not specified.
+        """
+        rp = rp or RobotService.rp
         try:
-            if isinstance(log_data, dict):
-                RobotService.rp.log(**log_data)
+            if isinstance(log_data, dict) and not log_data.get("attachment"):
+                rp.log(**log_data)
+            elif isinstance(log_data, dict):
+                RobotService._log_batch(log_data=[log_data], rp=rp)
             elif isinstance(log_data, list):
-                RobotService.rp.log_batch(log_data)
+                RobotService._log_batch(log_data=log_data, rp=rp, records=records)
         except (ResponseError, ReportPortalResponseError) as e:
             error = str(e)
             message: Union[str, Dict[str, Any]] = f"RobotService.rp.log failed with ResponseError. " \
@@ -288,7 +807,51 @@ class RobotService(object):
             RobotService.builtin_lib().log_to_console(message=message)
             if "Maximum upload size" in error:
                 message = {"message": message, "level": "INFO", "time": timestamp()}
-                RobotService.rp.log(**message)
+                rp.log(**message)
+
+    @staticmethod
+    def _log_batch(log_data: List[Dict[str, Any]], rp: ReportPortalService = None,
+                   records: List[bytes] = None) -> None:
+        """Send a batch of messages with attachments to the current item in one request.
+
+        Attachment files are streamed from disk while the request is being sent.
+
+        Args:
+            log_data: list of messages prepared for logging in ReportPortal.
+            rp: client to send messages with, the client of the service is used if it is not specified.
+            records: JSON records of the messages, they are encoded here if they are not specified.
+        """
+        rp = rp or RobotService.rp
+        if rp is None:
+            raise RuntimeError("RobotFrameworkService is not initialized.")
+
+        if records is None:
+            records = [RobotService._encode_log_record(message=message, item_id=rp.stack[-1])
+                       for message in log_data]
+        files = []
+        for message in log_data:
+            attachment = message.get("attachment")
+            if attachment:
+                file_part = {"name": "file", "filename": attachment["name"], "mime": attachment["mime"]}
+                if "path" in attachment:
+                    file_part["path"] = attachment["path"]
+                else:
+                    file_part["data"] = attachment["data"]
+                files.append(file_part)
+
+        json_part = {"name": "json_request_part", "mime": "application/json",
+                     "data": b"[" + b", ".join(records) + b"]"}
+        body = MultipartBody(parts=[json_part] + files)
+        headers = {"Content-Type": body.content_type}
+        try:
+            data: Union[MultipartBody, GzipBody] = body
+            if RobotService.gzip_logs:
+                data = GzipBody(body=body)
+                headers["Content-Encoding"] = "gzip"
+            response = rp.session.post(url=uri_join(rp.base_url, "log"), data=data, headers=headers)
+        finally:
+            body.close()
+        _get_data(response)
 
     @staticmethod
     def get_items_info(**params: Any) -> Dict[str, Any]:
@@ -302,6 +865,7 @@ class RobotService(object):
         if RobotService.rp is None:
             raise RuntimeError("RobotFrameworkService is not initialized.")
 
+        RobotService.flush()
         params["filter.eq.launch"] = RobotService.rp.launch_id
         url = uri_join(RobotService.rp.base_url, "item")
         response = RobotService.rp.session.get(url=url, params=params)
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import shutil
+import struct
+from argparse import ArgumentParser
+from itertools import count
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+# Format of the length prefix of journal records: 4 bytes unsigned integer, big-endian.
+LENGTH_PREFIX = struct.Struct(">I")
+# Suffix of the directory next to the journal, attachments are kept in.
+ATTACHMENTS_SUFFIX = ".attachments"
+
+
+class Journal(object):
+    """Append-only journal of requests to Report Portal.
+
+    Each record is a JSON object with request name and arguments, prefixed with its length.
+    Attachments are kept in the directory next to the journal and referred to by paths relative
+    to the journal, so the journal can be replayed on another machine together with this directory.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialization.
+
+        Args:
+            path: path to the journal file, it must not exist.
+        Raises:
+            RuntimeError: if the journal or its directory of attachments exists, e.g. after another execution.
+        """
+        self.path = path
+        self.attachments_path = path + ATTACHMENTS_SUFFIX
+        self._attachment_numbers = count(1)
+        if os.path.exists(self.attachments_path):
+            raise RuntimeError(f"Directory of attachments of the journal {self.attachments_path} already exists. "
+                               f"Replay the journal or remove it with the directory before the execution.")
+        try:
+            self._file: Optional[BinaryIO] = open(path, "xb")
+        except FileExistsError:
+            raise RuntimeError(f"Journal {path} already exists, it may contain requests of another execution. "
+                               f"Replay it or remove it before the execution.")
+
+    def write(self, method: str, kwargs: Dict[str, Any]) -> None:
+        """Append request to the journal.
+
+        Args:
+            method: name of the request.
+            kwargs: arguments of the request.
+        """
+        if self._file is None:
+            raise RuntimeError(f"Journal {self.path} is closed.")
+
+        if method == "send_log":
+            log_data = kwargs["log_data"]
+            messages = [log_data] if isinstance(log_data, dict) else log_data
+            stored = [self._store_attachment(message=message) for message in messages]
+            kwargs = dict(kwargs, log_data=stored[0] if isinstance(log_data, dict) else stored)
+        self._file.write(encode_record(record={"method": method, "kwargs": kwargs}))
+
+    def _store_attachment(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Link or copy the attachment file of the message to the directory of attachments of the journal.
+
+        A hard link shares the content with the screenshot, which may be written again in place after the test,
+        so size and modification time of the linked file are kept with the message and checked in replay_journal.
+        The file is copied if it can not be linked, e.g. on another file system.
+
+        Args:
+            message: message prepared for logging in ReportPortal.
+        Returns:
+            Message with the path to the attachment relative to the journal.
+        """
+        attachment = message.get("attachment")
+        if not attachment or "path" not in attachment:
+            return message
+
+        os.makedirs(self.attachments_path, exist_ok=True)
+        name = f"{next(self._attachment_numbers)}-{os.path.basename(attachment['path'])}"
+        target = os.path.join(self.attachments_path, name)
+        path = os.path.join(os.path.basename(self.attachments_path), name)
+        try:
+            try:
+                os.link(attachment["path"], target)
+                status = os.stat(target)
+                return dict(message, attachment=dict(attachment, path=path,
+                                                     stamp=[status.st_size, status.st_mtime_ns]))
+            except OSError:
+                shutil.copyfile(attachment["path"], target)
+        except OSError:
+            return dict(message, attachment=None,
+                        message=f"{message['message']}\nFile {attachment['path']} is not attached: it is not found.")
+        return dict(message, attachment=dict(attachment, path=path))
+
+    def close(self) -> None:
+        """Close the journal file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def encode_record(record: Dict[str, Any]) -> bytes:
+    """Encode record as JSON prefixed with its length.
+
+    Args:
+        record: record to encode.
+    Returns:
+        Encoded record.
+    """
+    data = json.dumps(record).encode("utf-8")
+    return LENGTH_PREFIX.pack(len(data)) + data
+
+
+def read_record(stream: BinaryIO) -> Optional[Dict[str, Any]]:
+    """Read record prefixed with its length from the stream.
+
+    Args:
+        stream: binary stream, e.g. journal file or socket file.
+    Returns:
+        Decoded record, None at the end of the stream or if the record is incomplete.
+    """
+    prefix = stream.read(LENGTH_PREFIX.size)
+    if len(prefix) < LENGTH_PREFIX.size:
+        return None
+    length, = LENGTH_PREFIX.unpack(prefix)
+    data = stream.read(length)
+    if len(data) < length:
+        return None
+    return json.loads(data.decode("utf-8"))
+
+
+def read_journal(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Read requests from the journal.
+
+    Incomplete record at the end of the journal, e.g. after a crash, is ignored.
+
+    Args:
+        path: path to the journal file.
+    Returns:
+        Iterator over names and arguments of requests.
+    """
+    with open(path, "rb") as journal:
+        while True:
+            record = read_record(stream=journal)
+            if record is None:
+                break
+            yield record["method"], record["kwargs"]
+
+
+def _resolve_attachment(message: Dict[str, Any], directory: str) -> Dict[str, Any]:
+    """Resolve the path to the attachment of the message read from the journal.
+
+    A linked attachment, which was written again after it was linked, is not attached.
+
+    Args:
+        message: message prepared for logging in ReportPortal.
+        directory: directory of the journal.
+    Returns:
+        Message with the absolute path to the attachment.
+    """
+    attachment = message.get("attachment")
+    if not attachment or "path" not in attachment:
+        return message
+
+    path = os.path.join(directory, attachment["path"])
+    stamp = attachment.pop("stamp", None)
+    if stamp is not None:
+        try:
+            status = os.stat(path)
+        except OSError:
+            return dict(message, attachment=None,
+                        message=f"{message['message']}\nFile {path} is not attached: it is not found.")
+        if [status.st_size, status.st_mtime_ns] != stamp:
+            return dict(message, attachment=None,
+                        message=f"{message['message']}\nFile {path} is not attached: "
+                                f"it was written again after it was logged.")
+    return dict(message, attachment=dict(attachment, path=path))
+
+
+def replay_journal(path: str, endpoint: str, project: str, uuid: str, log_batch_size: int = 0,
+                   log_batch_max_bytes: int = 0, log_batch_workers: int = 1) -> None:
+    """Send requests from the journal to Report Portal.
+
+    Consecutive log requests of the same item are joined and sent in batches.
+    Relative paths to attachments are resolved against the directory of the journal.
+
+    Args:
+        path: path to the journal file.
+        endpoint: Report Portal endpoint.
+        project: Report Portal project name.
+        uuid: Report Portal uuid.
+        log_batch_size: max number of messages in one log request, 0 - not limited.
+        log_batch_max_bytes: max estimated size of one log request in bytes, 0 - not limited.
+        log_batch_workers: number of log requests of the same item sent in parallel.
+    """
+    from .service import RobotService
+
+    RobotService.init_service(endpoint=endpoint, project=project, uuid=uuid, log_batch_size=log_batch_size,
+                              log_batch_max_bytes=log_batch_max_bytes, log_batch_workers=log_batch_workers)
+    directory = os.path.dirname(os.path.abspath(path))
+    log_data: List[Dict[str, Any]] = []
+    for method, kwargs in read_journal(path):
+        if method == "send_log":
+            messages = [kwargs["log_data"]] if isinstance(kwargs["log_data"], dict) else kwargs["log_data"]
+            log_data.extend(_resolve_attachment(message=message, directory=directory) for message in messages)
+            continue
+
+        if log_data:
+            RobotService.execute("send_log", log_data=log_data)
+            log_data = []
+        RobotService.execute(method, **kwargs)
+
+    if log_data:
+        RobotService.execute("send_log", log_data=log_data)
+    RobotService.terminate_service()
+
+
+def main(args: List[str] = None) -> None:
+    """Entry point of the command replaying the journal to Report Portal.
+
+    Args:
+        args: command line arguments.
+    """
+    parser = ArgumentParser(description="Send requests saved by Report Portal listener in offline mode.")
+    parser.add_argument("journal", help="path to the journal file (RP_SPOOL_FILE)")
+    parser.add_argument("--endpoint", required=True, help="Report Portal endpoint")
+    parser.add_argument("--project", required=True, help="Report Portal project name")
+    parser.add_argument("--uuid", required=True, help="Report Portal user uuid")
+    parser.add_argument("--log-batch-size", type=int, default=0, help="max number of messages in one log request")
+    parser.add_argument("--log-batch-max-bytes", type=int, default=0,
+                        help="max estimated size of one log request in bytes, 0 - not limited")
+    parser.add_argument("--log-batch-workers", type=int, default=1,
+                        help="number of log requests of the same item sent in parallel")
+    options = parser.parse_args(args)
+    replay_journal(path=options.journal, endpoint=options.endpoint, project=options.project, uuid=options.uuid,
+                   log_batch_size=options.log_batch_size, log_batch_max_bytes=options.log_batch_max_bytes,
+                   log_batch_workers=options.log_batch_workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+import random
+import time
+import zlib
+from threading import Lock
+from typing import Any, Iterator
+
+from requests import PreparedRequest, Response, Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError, NewConnectionError, ProtocolError
+
+from .metrics import body_size, metrics
+from .multipart import CHUNK_SIZE
+
+# Compression level of gzip request bodies, fast compression is enough for logs.
+GZIP_LEVEL = 5
+
+
+class ReportPortalAdapter(HTTPAdapter):
+    """Transport adapter for the session of Report Portal client.
+
+    Keeps a pool of connections of the given size, applies default timeout to requests
+    and retries requests failed before Report Portal could process them, with exponential backoff and jitter.
+    """
+
+    def __init__(self, pool_size: int = 10, timeout: float = None, retries: int = 3, backoff_factor: float = 0.5,
+                 backoff_max: float = 30) -> None:
+        """Initialization.
+
+        Args:
+            pool_size: max number of kept connections to Report Portal.
+            timeout: timeout of connecting and reading a response in seconds, requests wait forever if it is None.
+            retries: max number of retries of a request failed with connection error.
+            backoff_factor: max delay before the first retry in seconds, it is doubled for each next retry.
+            backoff_max: max delay before retry in seconds.
+        """
+        super(ReportPortalAdapter, self).__init__(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.requests = 0
+        self._requests_lock = Lock()
+
+    def send(self, request: PreparedRequest, timeout: Any = None, **kwargs: Any) -> Response:  # type: ignore
+        """Send the request, retrying it on connection errors before it is processed by Report Portal.
+
+        Args:
+            request: prepared request.
+            timeout: timeout of the request, default timeout of the adapter is used if it is not specified.
+            kwargs: other arguments of HTTPAdapter.send.
+        Returns:
+            Response.
+        Raises:
+            ConnectionError: if the request failed after all retries.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        with self._requests_lock:
+            self.requests += 1
+        if metrics.enabled:
+            metrics.add_request(body_size=body_size(request.body))
+
+        attempt = 0
+        while True:
+            try:
+                return super(ReportPortalAdapter, self).send(request, timeout=timeout, **kwargs)
+            except ConnectionError as e:
+                if attempt >= self.retries or not self._is_not_processed(error=e) \
+                        or not self._rewind_body(request=request):
+                    raise
+            time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_factor * 2 ** attempt)))
+            attempt += 1
+
+    @staticmethod
+    def _is_not_processed(error: ConnectionError) -> bool:
+        """Check the request failed before Report Portal could process it, so it can be sent again.
+
+        These are failures of connecting and broken pipe while the request is being written.
+        Failures while the response is awaited, e.g. the server closed the connection, are not retried,
+        as the request may be processed already, and requests starting launches and items
+        or logging messages are not idempotent.
+
+        Args:
+            error: error of the request.
+        Returns:
+            True if the request is not processed, otherwise - False.
+        """
+        reason = error.args[0] if error.args else None
+        if isinstance(reason, MaxRetryError):
+            reason = reason.reason
+        if isinstance(reason, ProtocolError) and len(reason.args) > 1:
+            reason = reason.args[1]
+        return isinstance(reason, (ConnectTimeoutError, NewConnectionError, BrokenPipeError))
+
+    @staticmethod
+    def _rewind_body(request: PreparedRequest) -> bool:
+        """Prepare the body of the request for sending again.
+
+        Args:
+            request: prepared request.
+        Returns:
+            True if the body can be sent again, otherwise - False.
+        """
+        if request.body is None or isinstance(request.body, (bytes, str)):
+            return True
+        if hasattr(request.body, "seek"):
+            request.body.seek(0)
+            return True
+        return False
+
+
+def mount_adapter(session: Session, pool_size: int = 10, timeout: float = None,
+                  retries: int = 3) -> ReportPortalAdapter:
+    """Use ReportPortalAdapter for all requests of the session.
+
+    Args:
+        session: session of Report Portal client.
+        pool_size: max number of kept connections to Report Portal.
+        timeout: timeout of connecting and reading a response in seconds, requests wait forever if it is None.
+        retries: max number of retries of a request failed with connection error.
+    Returns:
+        Mounted adapter.
+    """
+    adapter = ReportPortalAdapter(pool_size=pool_size, timeout=timeout, retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return adapter
+
+
+class GzipBody(object):
+    """File-like request body compressed with gzip while it is being sent.
+
+    The source body, e.g. MultipartBody, is read and compressed chunk by chunk, so neither of them is kept
+    in memory. Length of the compressed body is not known in advance, so it is sent with chunked transfer encoding.
+    """
+
+    def __init__(self, body: Any) -> None:
+        """Initialization.
+
+        Args:
+            body: file-like source body, which can be rewound to the start with seek.
+        """
+        self._body = body
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        self._buffer = bytearray()
+        self._finished = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Iterate over compressed chunks.
+
+        Returns:
+            Iterator over chunks of the compressed body.
+        """
+        return iter(lambda: self.read(CHUNK_SIZE), b"")
+
+    def read(self, size: int = -1) -> bytes:
+        """Read the next chunk of the compressed body.
+
+        Args:
+            size: max size of the chunk, read until the end of the body if it is negative.
+        Returns:
+            Chunk of the compressed body, empty when the body is read completely.
+        """
+        if size is None or size < 0:
+            return b"".join(self)
+
+        while len(self._buffer) < size and not self._finished:
+            chunk = self._body.read(CHUNK_SIZE)
+            if chunk:
+                self._buffer += self._compressor.compress(chunk)
+            else:
+                self._buffer += self._compressor.flush()
+                self._finished = True
+
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return chunk
+
+    def seek(self, offset: int) -> None:
+        """Move to the start of the body to send it again.
+
+        Args:
+            offset: position in the body, only 0 is supported.
+        """
+        self._body.seek(offset)
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        self._buffer = bytearray()
+        self._finished = False
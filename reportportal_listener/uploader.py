@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+
+import os
+import signal
+import socket
+import sys
+from argparse import ArgumentParser
+from socketserver import StreamRequestHandler, ThreadingUnixStreamServer
+from typing import Any, Dict, List, Optional
+
+from reportportal_client.service import ReportPortalService
+
+from .spool import encode_record, read_record
+
+# Size of the buffer of requests written to the uploader socket.
+WRITE_BUFFER_SIZE = 65536
+# Requests, which depend on the stack of started items of the connection or of the background worker.
+ITEM_REQUESTS = ("start_test_item", "finish_test_item", "send_log", "send_raw_log", "detach_item", "attach_item")
+
+
+class UploaderClient(object):
+    """Client of the uploader, used by the listener instead of sending requests to Report Portal.
+
+    Requests are written to the Unix socket of the uploader as length-prefixed JSON records,
+    the same as records of the journal in offline mode. Only requests which return a result,
+    e.g. starting of a launch, wait for the uploader.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialization.
+
+        Args:
+            path: path to the Unix socket of the uploader.
+        """
+        self.path = path
+        self._socket: Optional[socket.socket] = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(path)
+        self._writer = self._socket.makefile("wb", buffering=WRITE_BUFFER_SIZE)
+        self._reader = self._socket.makefile("rb")
+
+    def write(self, method: str, kwargs: Dict[str, Any]) -> None:
+        """Pass request to the uploader without waiting for its result.
+
+        Args:
+            method: name of the request.
+            kwargs: arguments of the request.
+        """
+        if self._socket is None:
+            raise RuntimeError(f"Connection to the uploader {self.path} is closed.")
+
+        self._writer.write(encode_record(record={"method": method, "kwargs": kwargs}))
+
+    def request(self, method: str, kwargs: Dict[str, Any]) -> Any:
+        """Pass request to the uploader and wait until it and all previous requests are executed.
+
+        Args:
+            method: name of the request.
+            kwargs: arguments of the request.
+        Returns:
+            Result of the request.
+        Raises:
+            ConnectionError: if the uploader closed the connection.
+            RuntimeError: if the request, or an earlier request of items, failed in the uploader.
+        """
+        if self._socket is None:
+            raise RuntimeError(f"Connection to the uploader {self.path} is closed.")
+
+        self._writer.write(encode_record(record={"method": method, "kwargs": kwargs, "reply": True}))
+        self._writer.flush()
+        reply = read_record(stream=self._reader)
+        if reply is None:
+            raise ConnectionError(f"Uploader {self.path} closed the connection.")
+        if reply.get("failure"):
+            raise RuntimeError(f"Requests of items are not sent to Report Portal by the uploader "
+                               f"after the failure of an earlier request: {reply['failure']}")
+        if reply["error"]:
+            raise RuntimeError(f"Request {method} failed in the uploader: {reply['error']}")
+        return reply["result"]
+
+    def close(self) -> None:
+        """Pass the remaining requests and close the connection.
+
+        The uploader sends the remaining requests after the connection is closed.
+        """
+        if self._socket is not None:
+            self._writer.close()
+            self._reader.close()
+            self._socket.close()
+            self._socket = None
+
+
+class UploaderHandler(StreamRequestHandler):
+    """Handler of a connection of one listener.
+
+    Each connection has its own Report Portal client, as the client keeps the stack of started items,
+    but all clients share one session, so connections to Report Portal are pooled between listeners.
+    Requests of a connection are executed in the order they are received.
+    After a request of items fails, the stack of the client does not match the listener any more,
+    so later requests of items of the connection are not executed, and the failure is replied
+    to each request, which waits for its result.
+    """
+
+    def setup(self) -> None:
+        """Prepare the client of the connection."""
+        from .service import RobotService
+
+        super(UploaderHandler, self).setup()
+        shared = RobotService.rp
+        self.rp = ReportPortalService(endpoint=shared.endpoint, project=shared.project, token=shared.token)
+        self.rp.session = shared.session
+        self.detached_items: Dict[int, str] = {}
+
+    def handle(self) -> None:
+        """Execute requests of the connection until it is closed."""
+        failure: Optional[str] = None
+        skipped = 0
+        while True:
+            record = read_record(stream=self.rfile)
+            if record is None:
+                break
+
+            method = record["method"]
+            result, error = None, None
+            if failure is not None and method in ITEM_REQUESTS:
+                skipped += 1
+            else:
+                try:
+                    result = self.execute(method=method, **record["kwargs"])
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    print(f"[reportportal-uploader] Request {method} failed: {error}", file=sys.stderr)
+                    if method in ITEM_REQUESTS:
+                        failure = f"request {method} failed: {error}"
+            if record.get("reply"):
+                self.wfile.write(encode_record(record={"result": result, "error": error, "failure": failure}))
+                self.wfile.flush()
+
+        if skipped:
+            print(f"[reportportal-uploader] {skipped} requests of items of the connection were not executed "
+                  f"after the failure: {failure}", file=sys.stderr)
+
+    def execute(self, method: str, **kwargs: Any) -> Any:
+        """Execute request with the client of the connection.
+
+        Args:
+            method: name of the request, see RobotService.execute; flush only waits for previous requests.
+            kwargs: arguments of the request.
+        Returns:
+            Result of the request.
+        """
+        from .service import RobotService
+
+        if method == "flush":
+            return None
+        if method == "send_log":
+            return RobotService._send_log(log_data=kwargs["log_data"], rp=self.rp)
+        if method == "detach_item":
+            self.detached_items[kwargs["handle"]] = self.rp.stack.pop()
+            return None
+        if method == "attach_item":
+            self.rp.stack.append(self.detached_items.pop(kwargs["handle"]))
+            return None
+        if method == "use_launch":
+            self.rp.launch_id = kwargs["launch_id"]
+            return None
+        if method == "start_test_item":
+            kwargs.pop("longname", None)
+            kwargs.pop("robot_id", None)
+        return getattr(self.rp, method)(**kwargs)
+
+
+class UploaderServer(ThreadingUnixStreamServer):
+    """Uploader sending requests of listeners of several executions, e.g. pabot processes, to Report Portal.
+
+    Closing of the server waits until requests of all connections are sent.
+    """
+
+    def __init__(self, path: str, endpoint: str, project: str, uuid: str, pool_size: int = 10,
+                 timeout: float = None, retries: int = 3, gzip_logs: bool = False, log_batch_size: int = 0,
+                 log_batch_max_bytes: int = 0, log_batch_workers: int = 1) -> None:
+        """Initialization.
+
+        Args:
+            path: path to the Unix socket, existing file is replaced.
+            endpoint: Report Portal endpoint.
+            project: Report Portal project name.
+            uuid: Report Portal uuid.
+            pool_size: max number of kept connections to Report Portal.
+            timeout: timeout of connecting and reading a response in seconds, requests wait forever if it is None.
+            retries: max number of retries of a request failed with connection error.
+            gzip_logs: compress bodies of log requests with attachments with gzip.
+            log_batch_size: max number of messages in one log request, 0 - not limited.
+            log_batch_max_bytes: max estimated size of one log request in bytes, 0 - not limited.
+            log_batch_workers: number of log requests of the same item sent in parallel.
+        """
+        from .service import RobotService
+
+        RobotService.init_service(endpoint=endpoint, project=project, uuid=uuid, log_batch_size=log_batch_size,
+                                  log_batch_max_bytes=log_batch_max_bytes, log_batch_workers=log_batch_workers,
+                                  pool_size=pool_size, timeout=timeout, retries=retries, gzip_logs=gzip_logs)
+        if os.path.exists(path):
+            os.remove(path)
+        super(UploaderServer, self).__init__(path, UploaderHandler)
+
+    def server_close(self) -> None:
+        """Close the socket and terminate the service."""
+        from .service import RobotService
+
+        super(UploaderServer, self).server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        requests, seconds = RobotService.get_request_statistics()
+        RobotService.terminate_service()
+        print(f"[reportportal-uploader] {requests} requests to Report Portal in {seconds:.1f} seconds.")
+
+
+def main(args: List[str] = None) -> None:
+    """Entry point of the command running the uploader until it is interrupted or terminated.
+
+    Args:
+        args: command line arguments.
+    """
+    parser = ArgumentParser(description="Send requests of Report Portal listeners of several executions "
+                                        "to Report Portal through shared connections.")
+    parser.add_argument("socket", help="path to the Unix socket of the uploader (RP_UPLOADER_SOCKET)")
+    parser.add_argument("--endpoint", required=True, help="Report Portal endpoint")
+    parser.add_argument("--project", required=True, help="Report Portal project name")
+    parser.add_argument("--uuid", required=True, help="Report Portal user uuid")
+    parser.add_argument("--pool-size", type=int, default=10, help="max number of kept connections to Report Portal")
+    parser.add_argument("--timeout", type=float, default=None, help="timeout of requests in seconds")
+    parser.add_argument("--retries", type=int, default=3, help="max number of retries of failed requests")
+    parser.add_argument("--gzip-logs", action="store_true", help="compress log requests with gzip")
+    parser.add_argument("--log-batch-size", type=int, default=0, help="max number of messages in one log request")
+    parser.add_argument("--log-batch-max-bytes", type=int, default=0,
+                        help="max estimated size of one log request in bytes, 0 - not limited")
+    parser.add_argument("--log-batch-workers", type=int, default=1,
+                        help="number of log requests of the same item sent in parallel")
+    options = parser.parse_args(args)
+
+    server = UploaderServer(path=options.socket, endpoint=options.endpoint, project=options.project,
+                            uuid=options.uuid, pool_size=options.pool_size, timeout=options.timeout,
+                            retries=options.retries, gzip_logs=options.gzip_logs,
+                            log_batch_size=options.log_batch_size, log_batch_max_bytes=options.log_batch_max_bytes,
+                            log_batch_workers=options.log_batch_workers)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
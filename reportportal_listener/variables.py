@@ -1,122 +1,204 @@
 # -*- coding: utf-8 -*-
 
-from typing import Any, List, Optional
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
 
-from robot.libraries.BuiltIn import BuiltIn
+from robot.libraries.BuiltIn import BuiltIn, RobotNotRunningError
+from robot.utils import is_truthy
 
+# Values used instead of Robot Framework variables, e.g. when results are imported after the run.
+_preset_variables: Dict[str, Any] = {}
+# Value of variables, which are not set.
+_MISSING = object()
 
-def get_variable(name: str, default: Any = None) -> Any:
-    """Gets the Robot Framework variable.
 
-    Args:
-        name: variable name.
-        default: default value.
+def preset_variables(**variables: Any) -> None:
+    """Sets values to use instead of Robot Framework variables.
 
-    Returns:
-        The value of the variable, otherwise, the default value.
+    Args:
+        variables: variable names and values.
     """
-    return BuiltIn().get_variable_value("${" + name + "}", default=default)
+    _preset_variables.update(variables)
 
 
-class Variables(object):
-    """Class for initializing and storing listener settings."""
+@lru_cache(maxsize=None)
+def _builtin() -> BuiltIn:
+    """Gets BuiltIn library, it is not bound to a context, so one instance is used for all lookups.
 
-    def __init__(self) -> None:
-        """Class initialization."""
-        self._uuid: Optional[str] = None
-        self._endpoint: Optional[str] = None
-        self._launch_name: Optional[str] = None
-        self._project: Optional[str] = None
-        self._launch_doc: Optional[str] = None
-        self._launch_tags: Optional[List[str]] = None
+    Returns:
+        BuiltIn library.
+    """
+    return BuiltIn()
 
-    @property
-    def uuid(self) -> str:
-        """Gets the user uuid for accessing the ReportPortal.
 
-        Raises:
-            AssertionError if RP_UUID variable is empty or does not exist.
+def get_variable(name: str, default: Any = None) -> Any:
+    """Gets the Robot Framework variable.
 
-        Returns:
-            User uuid
-        """
-        self._uuid = self._uuid or get_variable("RP_UUID")
-        if self._uuid is None:
-            raise AssertionError("Missing parameter RP_UUID for robot run\nYou should pass -v RP_UUID:<uuid_value>")
+    Args:
+        name: variable name.
+        default: default value.
 
-        return self._uuid
+    Returns:
+        The value of the variable, otherwise, the default value.
+    """
+    if name in _preset_variables:
+        return _preset_variables[name]
 
-    @property
-    def endpoint(self) -> str:
-        """Gets the ReportPortal endpoint.
+    try:
+        return _builtin().get_variable_value("${" + name + "}", default=default)
+    except RobotNotRunningError:
+        return default
 
-        Raises:
-            AssertionError if RP_ENDPOINT variable is empty or does not exist.
 
-        Returns:
-            ReportPortal endpoint.
-        """
-        self._endpoint = self._endpoint or get_variable("RP_ENDPOINT")
-        if self._endpoint is None:
-            raise AssertionError("Missing parameter RP_ENDPOINT for robot run\n"
-                                 "You should pass -v RP_RP_ENDPOINT:<endpoint_value>")
+def _setting(variable: str, default: Any = _MISSING, converter: Callable[[Any], Any] = str) -> Any:
+    """Declares the setting resolved from the Robot Framework variable.
 
-        return self._endpoint
+    Args:
+        variable: variable name.
+        default: value used if the variable is not set, the setting is required if the default is not specified.
+        converter: function converting the value of the variable, or the default value, to the setting.
+    Returns:
+        Field of Settings.
+    """
+    return field(metadata={"variable": variable, "default": default, "converter": converter})
 
-    @property
-    def launch_name(self) -> str:
-        """Gets the ReportPortal launch name.
 
-        Raises:
-            AssertionError if RP_LAUNCH variable is empty or does not exist.
+def _split(value: str) -> Tuple[str, ...]:
+    """Splits comma-separated values.
 
-        Returns:
-            ReportPortal launch name.
-        """
-        self._launch_name = self._launch_name or get_variable("RP_LAUNCH")
-        if self._launch_name is None:
-            raise AssertionError("Missing parameter RP_LAUNCH for robot run\n"
-                                 "You should pass -v RP_LAUNCH:<launch_name_value>")
+    Args:
+        value: comma-separated values.
+    Returns:
+        Values, empty values are kept.
+    """
+    return tuple(value.split(","))
 
-        return self._launch_name
 
-    @property
-    def project(self) -> str:
-        """Gets the ReportPortal project name.
+def _split_patterns(value: str) -> Tuple[str, ...]:
+    """Splits comma-separated glob patterns.
 
-        Raises:
-            AssertionError if RP_PROJECT variable is empty or does not exist.
+    Args:
+        value: comma-separated patterns.
+    Returns:
+        Patterns, empty patterns are dropped.
+    """
+    return tuple(pattern for pattern in value.split(",") if pattern)
 
-        Returns:
-            ReportPortal project name.
-        """
-        self._project = self._project or get_variable("RP_PROJECT")
-        if self._project is None:
-            raise AssertionError("Missing parameter RP_PROJECT for robot run\n"
-                                 "You should pass -v RP_PROJECT:<project_name_value>")
 
-        return self._project
+def _timeout(value: Any) -> Optional[float]:
+    """Converts timeout in seconds.
 
-    @property
-    def launch_doc(self) -> str:
-        """Gets the ReportPortal launch documentation.
+    Args:
+        value: timeout in seconds, 0 if requests wait forever.
+    Returns:
+        Timeout in seconds, None if requests wait forever.
+    """
+    return float(value) or None
 
-        Returns:
-            ReportPortal launch documentation.
-        """
-        if self._launch_doc is None:
-            self._launch_doc = get_variable("RP_LAUNCH_DOC", "")
 
-        return self._launch_doc
+@dataclass(frozen=True)
+class Settings(object):
+    """Listener settings.
 
-    @property
-    def launch_tags(self) -> List[str]:
-        """Gets the ReportPortal launch tags.
+    Each setting is declared with its Robot Framework variable, default value and converter of the value.
+    All variables are looked up once by resolve, e.g. at the start of the execution, settings do not change
+    after that.
+    """
 
+    uuid: str = _setting("RP_UUID")
+    endpoint: str = _setting("RP_ENDPOINT")
+    # Name of the started launch, None if the listener logs to an existing launch.
+    launch_name: Optional[str] = _setting("RP_LAUNCH")
+    project: str = _setting("RP_PROJECT")
+    launch_doc: str = _setting("RP_LAUNCH_DOC", "")
+    launch_tags: Tuple[str, ...] = _setting("RP_LAUNCH_TAGS", "", _split)
+    # Send requests to Report Portal in the background.
+    async_mode: bool = _setting("RP_ASYNC", False, is_truthy)
+    # Max number of requests waiting for sending in the background.
+    queue_size: int = _setting("RP_QUEUE_SIZE", 1000, int)
+    # Max time to wait for sending requests at the end of the execution in seconds.
+    close_timeout: float = _setting("RP_CLOSE_TIMEOUT", 300, float)
+    # Send test logs at the end of each test.
+    stream_tests: bool = _setting("RP_STREAM_TESTS", False, is_truthy)
+    # Max size of attachment files in bytes, 0 - not limited.
+    attachment_max_size: int = _setting("RP_ATTACHMENT_MAX_SIZE", 0, int)
+    # Max number of messages in one log request, 0 - not limited.
+    log_batch_size: int = _setting("RP_LOG_BATCH_SIZE", 0, int)
+    # Max size of one log request in bytes, 0 - not limited.
+    log_batch_max_bytes: int = _setting("RP_LOG_BATCH_MAX_BYTES", 0, int)
+    # Number of log requests of the same item sent in parallel.
+    log_batch_workers: int = _setting("RP_LOG_BATCH_WORKERS", 1, int)
+    # Path to the journal for offline mode, empty if offline mode is not used.
+    spool_file: str = _setting("RP_SPOOL_FILE", "")
+    # Path to JSON file with ids of suite and test items, empty if the index is not saved.
+    item_index_file: str = _setting("RP_ITEM_INDEX_FILE", "")
+    # Max number of kept connections.
+    pool_size: int = _setting("RP_POOL_SIZE", 10, int)
+    # Timeout of connecting and reading a response in seconds, None if requests wait forever.
+    timeout: Optional[float] = _setting("RP_TIMEOUT", 0, _timeout)
+    # Max number of retries of a request failed with connection error.
+    retries: int = _setting("RP_RETRIES", 3, int)
+    # Compress log requests with gzip.
+    gzip_logs: bool = _setting("RP_GZIP_LOGS", False, is_truthy)
+    # Path to the Unix socket of the uploader, empty if requests are sent by the listener.
+    uploader_socket: str = _setting("RP_UPLOADER_SOCKET", "")
+    # Paths to files with metrics of the listener: JSON, Prometheus textfile and Chrome trace, empty if not saved.
+    metrics_file: str = _setting("RP_METRICS_FILE", "")
+    metrics_prometheus_file: str = _setting("RP_METRICS_PROMETHEUS_FILE", "")
+    metrics_trace_file: str = _setting("RP_METRICS_TRACE_FILE", "")
+    # Minimal level of sent messages.
+    log_level: str = _setting("RP_LOG_LEVEL", "TRACE")
+    # Glob patterns of full names of keywords, only their messages are sent, empty if messages of all keywords are.
+    log_include: Tuple[str, ...] = _setting("RP_LOG_INCLUDE", "", _split_patterns)
+    # Glob patterns of full names of keywords, their messages are not sent.
+    log_exclude: Tuple[str, ...] = _setting("RP_LOG_EXCLUDE", "", _split_patterns)
+    # Number of levels of nested keywords reported as items, 0 if steps are logged as messages of tests.
+    keyword_depth: int = _setting("RP_KEYWORD_DEPTH", 0, int)
+    # Max length of messages, longer messages are truncated or spilled to attachments.
+    message_max_length: int = _setting("RP_MESSAGE_MAX_LENGTH", 8388608, int)
+    # Attach the full text of longer messages as gzipped files.
+    spill_messages: bool = _setting("RP_SPILL_MESSAGES", False, is_truthy)
+    # Attach screenshots with the same content once in the launch.
+    deduplicate_attachments: bool = _setting("RP_DEDUPLICATE_ATTACHMENTS", False, is_truthy)
+    # Min size of screenshots in bytes, which are resized and re-encoded, 0 if screenshots are attached as they are.
+    image_min_size: int = _setting("RP_IMAGE_MIN_SIZE", 0, int)
+    # Format of re-encoded screenshots: JPEG, WEBP or PNG.
+    image_format: str = _setting("RP_IMAGE_FORMAT", "JPEG")
+    # Max width and height of re-encoded screenshots in pixels.
+    image_max_dimension: int = _setting("RP_IMAGE_MAX_DIMENSION", 1920, int)
+    # Number of processes re-encoding screenshots.
+    image_workers: int = _setting("RP_IMAGE_WORKERS", 1, int)
+    # Output directory of the execution, empty if Robot Framework is not running.
+    output_dir: str = _setting("OUTPUT_DIR", "")
+    # URI of PabotLib remote server, empty if pabot is not used.
+    pabotlib_uri: str = _setting("PABOTLIBURI", "")
+
+    @classmethod
+    def resolve(cls, launch_name_required: bool = True) -> "Settings":
+        """Resolve all settings from Robot Framework variables, while they are available.
+
+        Args:
+            launch_name_required: RP_LAUNCH is required, it is not if the listener logs to an existing launch.
         Returns:
-            ReportPortal launch tags.
+            Settings.
+        Raises:
+            AssertionError: if a required variable is empty or does not exist.
+            ValueError: if the value of a variable can not be converted.
         """
-        if self._launch_tags is None:
-            self._launch_tags = get_variable("RP_LAUNCH_TAGS", "").split(",")
-
-        return self._launch_tags
+        values: Dict[str, Any] = {}
+        for setting in fields(cls):
+            variable, default = setting.metadata["variable"], setting.metadata["default"]
+            value = get_variable(variable, default=default)
+            if default is _MISSING and (value is _MISSING or value in ("", None)):
+                if launch_name_required or variable != "RP_LAUNCH":
+                    raise AssertionError(f"Missing parameter {variable} for robot run\n"
+                                         f"You should pass -v {variable}:<value>")
+                values[setting.name] = None
+                continue
+
+            try:
+                values[setting.name] = setting.metadata["converter"](value)
+            except ValueError as e:
+                raise ValueError(f"Invalid value {value!r} of {variable}: {e}")
+        return cls(**values)
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+from queue import Queue
+from threading import Thread
+from time import monotonic
+from typing import Any, Callable, Optional, Tuple
+
+from robot.api import logger
+
+# Task for stopping the worker thread.
+_STOP = None
+
+
+class BackgroundWorker(object):
+    """Class for sending requests to Report Portal in the background.
+
+    Requests are executed by a single thread in the order of submission,
+    because Report Portal client tracks parents of the items in a stack.
+    After a dependent request, e.g. a request of items, fails, the stack of the client does not match
+    the listener any more, so later dependent requests are dropped, as the uploader does.
+    The queue is bounded, so the test execution is slowed down only when Report Portal
+    falls behind by more than queue size requests.
+    """
+
+    def __init__(self, queue_size: int) -> None:
+        """Initialization.
+
+        Args:
+            queue_size: max number of requests waiting for sending.
+        """
+        self._queue: Queue = Queue(maxsize=queue_size)
+        self._failure: Optional[str] = None
+        self._skipped = 0
+        self._thread = Thread(target=self._run, name="reportportal_listener", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        """Get number of requests which are not completed yet.
+
+        Returns:
+            Number of requests.
+        """
+        return self._queue.unfinished_tasks
+
+    def submit(self, func: Callable[..., Any], *args: Any, dependent: bool = False, **kwargs: Any) -> None:
+        """Add request to the queue. Blocks while the queue is full.
+
+        Args:
+            func: function sending request.
+            args: positional arguments of the function.
+            dependent: the request depends on earlier dependent requests, it is dropped after one of them failed.
+            kwargs: keyword arguments of the function.
+        """
+        self._queue.put((func, args, kwargs, dependent))
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until all submitted requests are completed.
+
+        Args:
+            timeout: max time to wait in seconds, wait forever if it is not specified.
+        Returns:
+            True if all requests are completed, otherwise - False.
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stop(self, timeout: float = None) -> bool:
+        """Complete submitted requests and stop the worker thread.
+
+        Args:
+            timeout: max time to wait for submitted requests in seconds.
+        Returns:
+            True if all requests are completed, otherwise - False.
+        """
+        completed = self.flush(timeout=timeout)
+        if completed:
+            self._queue.put(_STOP)
+            self._thread.join()
+            if self._skipped:
+                logger.console(f"[reportportal-listener] {self._skipped} requests of items were not sent "
+                               f"to Report Portal after the failure: {self._failure}", stream="stderr")
+        return completed
+
+    def _run(self) -> None:
+        """Execute requests from the queue until stop task is received."""
+        while True:
+            task: Optional[Tuple[Callable[..., Any], tuple, dict, bool]] = self._queue.get()
+            try:
+                if task is _STOP:
+                    break
+                func, args, kwargs, dependent = task
+                if dependent and self._failure is not None:
+                    self._skipped += 1
+                    continue
+                func(*args, **kwargs)
+            except Exception as e:
+                logger.console(f"[reportportal-listener] Request to Report Portal failed: {e}", stream="stderr")
+                if dependent and self._failure is None:
+                    self._failure = f"{type(e).__name__}: {e}"
+                    logger.console("[reportportal-listener] Later requests of items are not sent to Report Portal, "
+                                   "as their parents may be missing.", stream="stderr")
+            finally:
+                self._queue.task_done()
@@ -34,5 +34,16 @@ setup(
     ],
     keywords='testing,reporting,robot framework,reportportal',
     packages=find_packages(),
-    install_requires=['reportportal-client>=3.0.0', 'robotframework>=3.0.2'],
+    install_requires=['reportportal-client>=3.0.0', 'robotframework>=3.0.2', 'dataclasses; python_version < "3.7"'],
+    extras_require={
+        'images': ['Pillow'],
+        'tests': ['pytest', 'hypothesis', 'Pillow'],
+    },
+    entry_points={
+        'console_scripts': [
+            'reportportal-replay=reportportal_listener.spool:main',
+            'reportportal-import=reportportal_listener.importer:main',
+            'reportportal-uploader=reportportal_listener.uploader:main',
+        ],
+    },
 )
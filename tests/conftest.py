@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import json
+import threading
+from email import message_from_bytes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pytest
+
+from reportportal_listener import variables as variables_module
+from reportportal_listener.index import ItemIndex
+from reportportal_listener.metrics import metrics
+from reportportal_listener.service import RobotService
+
+# Start and end time of synthetic events.
+START_TIME = "20180101 00:00:00.000"
+END_TIME = "20180101 00:00:01.000"
+
+
+class _RecordingHandler(BaseHTTPRequestHandler):
+    """Handler of requests to the recording stub."""
+
+    protocol_version = "HTTP/1.1"
+    server: "RecordingReportPortal"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        """Do not log requests."""
+
+    def do_POST(self) -> None:  # noqa: N802
+        """Start launch or item, or log messages."""
+        body = self._read_body()
+        path = self.path.split(f"/{self.server.project}/", 1)[1]
+        if path == "launch":
+            request = json.loads(body)
+            launch_id = f"launch{next(self.server.ids)}"
+            self._record(("start_launch", request["name"]), response={"id": launch_id})
+        elif path == "log":
+            self._record_log(body=body)
+        else:
+            request = json.loads(body)
+            parent = path.split("/")[1] if "/" in path else None
+            item_id = f"item{next(self.server.ids)}"
+            if request["name"] in self.server.reject:
+                self._record(("rejected", parent, request["name"]), response={"message": "rejected"}, status=400)
+            else:
+                self._record(("start_item", parent, request["name"], request["type"], item_id),
+                             response={"id": item_id})
+
+    def do_PUT(self) -> None:  # noqa: N802
+        """Finish launch or item."""
+        request = json.loads(self._read_body())
+        path = self.path.split(f"/{self.server.project}/", 1)[1]
+        if path.startswith("launch/"):
+            self._record(("finish_launch", request["status"]), response={"msg": "ok"})
+        else:
+            self._record(("finish_item", path.split("/")[1], request["status"]), response={"msg": "ok"})
+
+    def _read_body(self) -> bytes:
+        """Read the body sent with Content-Length or chunked, decompress gzip body.
+
+        Returns:
+            Body of the request.
+        """
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+                if not size:
+                    break
+            body = b"".join(chunks)
+        else:
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return body
+
+    def _record_log(self, body: bytes) -> None:
+        """Record messages of the log request.
+
+        Args:
+            body: JSON or multipart body.
+        """
+        files: List[Tuple[str, bytes]] = []
+        if self.headers.get("Content-Type", "").startswith("multipart/form-data"):
+            form = message_from_bytes(f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body)
+            parts = form.get_payload()
+            records = json.loads(parts[0].get_payload(decode=True))
+            files = [(part.get_filename(), part.get_payload(decode=True)) for part in parts[1:]]
+        else:
+            records = [json.loads(body)]
+        files_by_name = iter(files)
+        messages = [(record["message"], next(files_by_name) if "file" in record else None) for record in records]
+        self._record(("log", records[0]["item_id"], messages), response={"responses": [{"id": "log"}]})
+
+    def _record(self, request: Tuple[Any, ...], response: Dict[str, Any], status: int = 201) -> None:
+        """Record the request and respond.
+
+        Args:
+            request: recorded request.
+            response: JSON response.
+            status: status of the response.
+        """
+        with self.server.lock:
+            self.server.requests.append(request)
+        body = json.dumps(response).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class RecordingReportPortal(ThreadingHTTPServer):
+    """Report Portal stub recording the sequence of requests.
+
+    Items are started with generated ids, starting of items with rejected names fails.
+    """
+
+    daemon_threads = True
+    project = "test"
+
+    def __init__(self) -> None:
+        """Initialization, the stub listens on a free local port."""
+        super(RecordingReportPortal, self).__init__(("127.0.0.1", 0), _RecordingHandler)
+        self.ids = count()
+        self.lock = threading.Lock()
+        self.requests: List[Tuple[Any, ...]] = []
+        self.reject: List[str] = []
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def endpoint(self) -> str:
+        """Gets endpoint of the stub.
+
+        Returns:
+            Endpoint URL.
+        """
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def pop_requests(self) -> List[Tuple[Any, ...]]:
+        """Gets recorded requests and forgets them.
+
+        Returns:
+            Requests in the order they are received.
+        """
+        with self.lock:
+            requests, self.requests = self.requests, []
+        return requests
+
+    def close(self) -> None:
+        """Stop serving requests."""
+        self.shutdown()
+        self.server_close()
+
+
+@pytest.fixture
+def report_portal() -> Iterator[RecordingReportPortal]:
+    """Recording Report Portal stub."""
+    server = RecordingReportPortal()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def service() -> Iterator[None]:
+    """Resets the service of the listener and preset variables after the test.
+
+    The service is initialized once in a process, so it is reset here for the next test.
+    The listener, or the test, terminates the service.
+    """
+    yield
+    reset_service()
+
+
+def reset_service() -> None:
+    """Resets the terminated service of the listener and preset variables, so the service is initialized again."""
+    for name, value in (("rp", None), ("report", None), ("worker", None), ("log_executor", None),
+                        ("journal", None), ("uploader", None), ("attachment_cache", None),
+                        ("image_processor", None), ("adapter", None), ("item_index_file", None)):
+        setattr(RobotService, name, value)
+    RobotService.log_statistics = {"records": 0, "calls": 0, "batches": 0}
+    RobotService.detached_items = {}
+    RobotService.item_handles = count()
+    RobotService.item_index = ItemIndex()
+    variables_module._preset_variables.clear()
+    metrics.enabled = False
+
+
+def suite_events(tests: List[str], test_events: Optional[List[Tuple[str, tuple]]] = None,
+                 setup: bool = False) -> Iterator[Tuple[str, tuple]]:
+    """Generates events of a synthetic execution of one suite.
+
+    Args:
+        tests: names of tests.
+        test_events: events between the start and the end of each test, a log message by default.
+        setup: the suite has a setup logging a message.
+    Returns:
+        Iterator over names of listener callbacks and their arguments.
+    """
+    suite = {"id": "s1", "longname": "Suite", "doc": "", "metadata": {}, "source": "", "suites": [],
+             "tests": tests, "totaltests": len(tests), "starttime": START_TIME}
+    yield "start_suite", ("Suite", suite)
+    if setup:
+        yield from keyword_events(name="Suite Setup", keyword_type="Setup",
+                                  nested=[("log_message", (log_message(text="suite setup"),))])
+    for name in tests:
+        yield "start_test", (name, {"id": f"s1-t{tests.index(name) + 1}", "longname": f"Suite.{name}", "doc": "",
+                                    "tags": [], "starttime": START_TIME, "critical": "yes", "template": ""})
+        for event in test_events or keyword_events(name="Step", nested=[("log_message",
+                                                                         (log_message(text=f"{name} step"),))]):
+            yield event
+        yield "end_test", (name, {"status": "PASS", "message": "", "tags": [], "starttime": START_TIME,
+                                  "endtime": END_TIME})
+    yield "end_suite", ("Suite", dict(suite, endtime=END_TIME, status="PASS", statistics="", message=""))
+
+
+def keyword_events(name: str, nested: List[Tuple[str, tuple]], keyword_type: str = "Keyword",
+                   status: str = "PASS") -> List[Tuple[str, tuple]]:
+    """Generates events of a keyword.
+
+    Args:
+        name: keyword name.
+        nested: events of messages and keywords in the keyword.
+        keyword_type: keyword type: Keyword, Setup or Teardown.
+        status: keyword status.
+    Returns:
+        Names of listener callbacks and their arguments.
+    """
+    attributes = {"kwname": name, "libname": "Library", "doc": "", "tags": [], "args": [], "assign": [],
+                  "starttime": START_TIME, "type": keyword_type}
+    return [("start_keyword", (f"Library.{name}", attributes))] + list(nested) + \
+        [("end_keyword", (f"Library.{name}", dict(attributes, status=status, endtime=END_TIME, message="")))]
+
+
+def log_message(text: str, html: str = "no") -> Dict[str, str]:
+    """Creates log message.
+
+    Args:
+        text: text of the message.
+        html: the message is HTML.
+    Returns:
+        Message passed to log_message.
+    """
+    return {"message": text, "level": "INFO", "timestamp": START_TIME, "html": html}
+
+
+def run_listener(endpoint: str, events: Iterator[Tuple[str, tuple]], **variables: Any) -> None:
+    """Passes events to a new listener and closes it.
+
+    Args:
+        endpoint: Report Portal endpoint.
+        events: names of listener callbacks and their arguments.
+        variables: additional variables of the listener.
+    """
+    from reportportal_listener import reportportal_listener
+    from reportportal_listener.variables import preset_variables
+
+    preset_variables(RP_ENDPOINT=endpoint, RP_UUID="uuid", RP_PROJECT=RecordingReportPortal.project,
+                     RP_LAUNCH="Launch", **variables)
+    listener = reportportal_listener()
+    for callback, args in events:
+        getattr(listener, callback)(*args)
+    listener.close()
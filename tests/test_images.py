@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+import os
+import random
+from typing import Any, Dict, Iterator
+
+import pytest
+
+from reportportal_listener.images import ImageProcessor
+
+pytest.importorskip("PIL")
+
+
+def _write_screenshot(path: str, seed: int) -> int:
+    """Writes a PNG screenshot of random pixels, which is smaller when it is re-encoded to JPEG.
+
+    Args:
+        path: path to the screenshot.
+        seed: seed of pixels.
+    Returns:
+        Size of the screenshot in bytes.
+    """
+    from PIL import Image
+
+    generator = random.Random(seed)
+    pixels = bytes(generator.getrandbits(8) for _ in range(200 * 200 * 3))
+    Image.frombytes("RGB", (200, 200), pixels).save(path, format="PNG")
+    return os.path.getsize(path)
+
+
+def _attachment(path: str) -> Dict[str, str]:
+    """Gets information by attachment of the screenshot.
+
+    Args:
+        path: path to the screenshot.
+    Returns:
+        Information by attachment, see MessageFormatter._get_attachment.
+    """
+    return {"name": os.path.basename(path), "path": path, "mime": "image/png"}
+
+
+@pytest.fixture
+def processor() -> Iterator[ImageProcessor]:
+    """Processor re-encoding all screenshots to JPEG."""
+    processor = ImageProcessor(min_size=1)
+    yield processor
+    processor.close()
+
+
+def test_screenshot_logged_several_times_is_counted_once(tmp_path: Any, processor: ImageProcessor) -> None:
+    path = os.path.join(str(tmp_path), "screenshot.png")
+    size = _write_screenshot(path=path, seed=1)
+
+    processor.submit(path=path)
+    attachments = [processor.process(attachment=_attachment(path=path)) for _ in range(3)]
+
+    assert attachments[0] == attachments[1] == attachments[2]
+    assert attachments[0]["name"] == "screenshot.jpg" and attachments[0]["mime"] == "image/jpeg"
+    assert processor.processed == 1
+    assert processor.saved_bytes == size - os.path.getsize(attachments[0]["path"])
+
+
+def test_screenshot_written_again_while_it_is_processed(tmp_path: Any, monkeypatch: Any,
+                                                        processor: ImageProcessor) -> None:
+    path = os.path.join(str(tmp_path), "screenshot.png")
+    _write_screenshot(path=path, seed=1)
+    stat = os.stat
+
+    def stat_and_write_again(target: Any, *args: Any, **kwargs: Any) -> os.stat_result:
+        result = stat(target, *args, **kwargs)
+        if target == path:
+            monkeypatch.setattr(os, "stat", stat)
+            _write_screenshot(path=path, seed=2)
+        return result
+
+    monkeypatch.setattr(os, "stat", stat_and_write_again)
+    attachment = processor.process(attachment=_attachment(path=path))
+
+    assert attachment["mime"] == "image/jpeg"
+    assert processor.processed == 1
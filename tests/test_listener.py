@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, List, Tuple
+
+from conftest import RecordingReportPortal, keyword_events, log_message, run_listener, suite_events
+
+from reportportal_listener import reportportal_listener
+from reportportal_listener.variables import preset_variables
+
+
+def _step_with_nested_keywords() -> List[Tuple[str, tuple]]:
+    """Events of a step logging a message, a nested keyword with its own nested keyword, and another message."""
+    deepest = keyword_events(name="Deepest", nested=[("log_message", (log_message(text="deepest"),))])
+    nested = keyword_events(name="Nested", nested=[("log_message", (log_message(text="nested"),))] + deepest)
+    return keyword_events(name="Step", nested=[("log_message", (log_message(text="before"),))] + nested +
+                          [("log_message", (log_message(text="after"),))])
+
+
+def _event_name(args: tuple) -> str:
+    """Gets name of the event: name of the suite, test or keyword, or text of the message."""
+    return args[0]["message"] if isinstance(args[0], dict) else args[0]
+
+
+def test_keywords_are_started_and_finished_with_their_events(report_portal: RecordingReportPortal,
+                                                             service: None) -> None:
+    preset_variables(RP_ENDPOINT=report_portal.endpoint, RP_UUID="uuid", RP_PROJECT=report_portal.project,
+                     RP_LAUNCH="Launch", RP_KEYWORD_DEPTH=1)
+    listener = reportportal_listener()
+    requests_by_event = []
+    for callback, args in suite_events(tests=["Test"], test_events=_step_with_nested_keywords()):
+        getattr(listener, callback)(*args)
+        requests_by_event.append((callback, _event_name(args),
+                                  [request[0] for request in report_portal.pop_requests()]))
+    listener.close()
+
+    assert requests_by_event == [
+        ("start_suite", "Suite", ["start_launch", "start_item"]),
+        ("start_test", "Test", ["start_item"]),
+        ("start_keyword", "Library.Step", ["start_item"]),
+        ("log_message", "before", []),
+        ("start_keyword", "Library.Nested", ["log", "start_item"]),
+        ("log_message", "nested", []),
+        ("start_keyword", "Library.Deepest", []),
+        ("log_message", "deepest", []),
+        ("end_keyword", "Library.Deepest", []),
+        ("end_keyword", "Library.Nested", ["log", "finish_item"]),
+        ("log_message", "after", []),
+        ("end_keyword", "Library.Step", ["log", "finish_item"]),
+        ("end_test", "Test", []),
+        ("end_suite", "Suite", ["finish_item", "finish_item", "finish_launch"]),
+    ]
+
+
+def test_keyword_items_are_nested_in_test_items(report_portal: RecordingReportPortal, service: None) -> None:
+    test_events = keyword_events(name="Test Setup", keyword_type="Setup", nested=[]) + \
+        _step_with_nested_keywords() + keyword_events(name="Test Teardown", keyword_type="Teardown", nested=[])
+    run_listener(report_portal.endpoint, suite_events(tests=["Test"], test_events=test_events), RP_KEYWORD_DEPTH=1)
+
+    requests: List[Any] = report_portal.pop_requests()
+    items: Dict[str, str] = {request[4]: request[2] for request in requests if request[0] == "start_item"}
+    assert [(request[0], items.get(request[1]), *request[2:4]) for request in requests
+            if request[0] == "start_item"] == [
+        ("start_item", None, "Suite", "TEST"),
+        ("start_item", "Suite", "Test", "STEP"),
+        ("start_item", "Test", "Library.Test Setup ()", "BEFORE_TEST"),
+        ("start_item", "Test", "Library.Step ()", "STEP"),
+        ("start_item", "Library.Step ()", "Library.Nested ()", "STEP"),
+        ("start_item", "Test", "Library.Test Teardown ()", "AFTER_TEST"),
+    ]
+    assert [(items[request[1]], [text for text, _ in request[2]]) for request in requests
+            if request[0] == "log"] == [
+        ("Library.Step ()", ["before"]),
+        ("Library.Nested ()", ["nested"]),
+        ("Library.Step ()", ["after"]),
+    ]
+    assert [items[request[1]] for request in requests if request[0] == "finish_item"] == [
+        "Library.Test Setup ()", "Library.Nested ()", "Library.Step ()", "Library.Test Teardown ()", "Test", "Suite"]
+
+
+def test_steps_are_logged_as_messages_of_tests_without_keyword_depth(report_portal: RecordingReportPortal,
+                                                                     service: None) -> None:
+    run_listener(report_portal.endpoint, suite_events(tests=["Test"], test_events=_step_with_nested_keywords()))
+
+    requests = report_portal.pop_requests()
+    assert [request[0] for request in requests] == ["start_launch", "start_item", "start_item", "log",
+                                                    "finish_item", "finish_item", "finish_launch"]
+    assert [text for text, _ in requests[3][2]] == ["Library.Step", "before", "after"]
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+import os
+import random
+import re
+from html import unescape
+from typing import Any, Dict
+
+import pytest
+
+from reportportal_listener.message import DETAILS_END, DETAILS_SEPARATOR, DETAILS_START, MessageFormatter
+
+SCREENSHOT_MESSAGE = '</td></tr><tr><td colspan="3"><a href="screenshot.png"><img src="screenshot.png" width="800px">' \
+                     '</a>'
+# Pattern of HTML messages of the first revision, 6b9ab9b, which _strip_html_tags replaced with substring search.
+BASELINE_HTML_MESSAGE_PATTERN = re.compile(r"<details><summary>(?P<summary>.*)</summary><p>(?P<message>.*)</p>"
+                                           r"</details>", re.S)
+# Parts of generated messages, mostly parts of the pattern and characters, which are escaped in HTML.
+MESSAGE_PARTS = [DETAILS_START, DETAILS_SEPARATOR, DETAILS_END, "<details>", "<summary>", "</summary>", "<p>",
+                 "</p>", "</details>", "<", ">", "/", "&amp;", "&lt;", "&gt;", "&quot;", "&#39;", "&", ";", "a", "b",
+                 "summary", " ", "\n", "\r", "é", "✓", "\x00"]
+
+
+def _baseline_strip_html_tags(message: str) -> str:
+    """Unquotes the message and removes html tags: details, summary, p, as the first revision did.
+
+    Args:
+        message: message of the step of keyword.
+    Returns:
+        String, where all quotes and html tags are removing.
+    """
+    match = BASELINE_HTML_MESSAGE_PATTERN.fullmatch(message)
+    if match:
+        summary, message = match.group("summary", "message")
+        if not message.startswith(summary):
+            message = "\n".join([summary, message])
+        message = unescape(message)
+    return message
+
+
+def _capture(output_dir: str) -> Dict[str, Any]:
+    """Captures the message with the screenshot, as the listener does when it is logged.
+
+    Args:
+        output_dir: output directory.
+    Returns:
+        Captured message.
+    """
+    message = {"message": SCREENSHOT_MESSAGE, "level": "INFO", "timestamp": "1514764800000", "html": "yes"}
+    MessageFormatter.stamp_screenshot(message=message, output_dir=output_dir)
+    return message
+
+
+def _format(message: Dict[str, Any], output_dir: str) -> Dict[str, Any]:
+    """Formats the captured message, as it is formatted when it is sent.
+
+    Args:
+        message: captured message.
+        output_dir: output directory.
+    Returns:
+        Message prepared for Report Portal.
+    """
+    return MessageFormatter.format_message(message=dict(message), keyword_name="Capture Page Screenshot",
+                                           output_dir=output_dir, html=True, file_stamp=message.get("file_stamp"))
+
+
+@pytest.fixture
+def screenshot(tmp_path: Any) -> str:
+    """Screenshot in the output directory."""
+    path = os.path.join(str(tmp_path), "screenshot.png")
+    with open(path, "wb") as screenshot_file:
+        screenshot_file.write(b"\x89PNG first")
+    return path
+
+
+def test_screenshot_is_attached_as_file(screenshot: str) -> None:
+    message = _format(message=_capture(output_dir=os.path.dirname(screenshot)),
+                      output_dir=os.path.dirname(screenshot))
+
+    assert message["message"] == 'Screen shot in the keyword "Capture Page Screenshot"'
+    assert message["attachment"] == {"name": "screenshot.png", "path": screenshot, "mime": "image/png"}
+    assert os.listdir(os.path.dirname(screenshot)) == ["screenshot.png"]
+
+
+def test_screenshot_written_again_is_not_attached(screenshot: str) -> None:
+    message = _capture(output_dir=os.path.dirname(screenshot))
+    with open(screenshot, "wb") as screenshot_file:
+        screenshot_file.write(b"\x89PNG second, of another size")
+
+    formatted = _format(message=message, output_dir=os.path.dirname(screenshot))
+
+    assert formatted["attachment"] is None
+    assert formatted["message"].endswith(f"is not attached: screenshot {screenshot} was written again "
+                                         f"after it was logged")
+
+
+def test_missing_screenshot_is_noted(screenshot: str) -> None:
+    message = _capture(output_dir=os.path.dirname(screenshot))
+    os.remove(screenshot)
+
+    formatted = _format(message=message, output_dir=os.path.dirname(screenshot))
+
+    assert formatted["attachment"] is None
+    assert formatted["message"].endswith(f"is not attached: screenshot not found ({screenshot})")
+
+
+def test_screenshot_missing_when_logged_is_noted(tmp_path: Any) -> None:
+    message = _capture(output_dir=str(tmp_path))
+
+    formatted = _format(message=message, output_dir=str(tmp_path))
+
+    assert "file_stamp" not in message
+    assert formatted["message"].endswith("is not attached: screenshot not found "
+                                         f"({os.path.join(str(tmp_path), 'screenshot.png')})")
+
+
+def test_html_tags_are_stripped_as_with_baseline_pattern() -> None:
+    generator = random.Random(20180101)
+    for _ in range(200000):
+        message = "".join(generator.choice(MESSAGE_PARTS) for _ in range(generator.randrange(12)))
+        if generator.random() < 0.5:
+            message = f"{DETAILS_START}{message}{DETAILS_END}"
+
+        assert MessageFormatter._strip_html_tags(message=message) == _baseline_strip_html_tags(message=message), \
+            message
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+import os
+import stat
+from types import SimpleNamespace
+from typing import Any, Dict, List
+from xml.etree import ElementTree
+from xml.sax import SAXParseException
+
+import pytest
+
+from reportportal_listener.index import ItemIndex
+from reportportal_listener.report_modifier import OutputFileModifier
+
+LAUNCH_LINK = "http://reportportal.local/ui/#demo/launches/all/launch1"
+# Links to the launch and to tests of the index of items.
+INDEXED_LINKS = {None: LAUNCH_LINK, "Valid Login": f"{LAUNCH_LINK}/suite1/suite2?log.item=test1",
+                 "Invalid Login": f"{LAUNCH_LINK}/suite1/suite2/test2"}
+
+# Output file of Robot Framework 3.0 with non-ASCII texts, escaped characters and a namespace declaration.
+OUTPUT_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<robot generator="Robot 3.0.2 (Python 3.6.5 on linux)" generated="20180101 00:00:00.000" \
+xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:noNamespaceSchemaLocation="robot.xsd">
+<suite source="/tests" id="s1" name="Tests">
+<suite source="/tests/login.robot" id="s1-s1" name="Login">
+<test id="s1-s1-t1" name="Valid Login">
+<kw name="Log" library="BuiltIn">
+<doc>Logs the given message with the given level.</doc>
+<arguments>
+<arg>Ünïcödé &lt;b&gt; &amp; "quotes" ✓</arg>
+</arguments>
+<msg timestamp="20180101 00:00:00.001" level="INFO">Ünïcödé &lt;b&gt; &amp; "quotes" ✓</msg>
+<status status="PASS" starttime="20180101 00:00:00.000" endtime="20180101 00:00:00.002"></status>
+</kw>
+<doc>Checks &lt;login&gt; &amp; "logout".</doc>
+<tags>
+<tag>smoke</tag>
+</tags>
+<status status="PASS" starttime="20180101 00:00:00.000" endtime="20180101 00:00:00.003" critical="yes"></status>
+</test>
+<test id="s1-s1-t2" name="Invalid Login">
+<kw name="Fail" library="BuiltIn">
+<arguments>
+<arg>Ошибка</arg>
+</arguments>
+<status status="FAIL" starttime="20180101 00:00:00.004" endtime="20180101 00:00:00.005"></status>
+</kw>
+<status status="FAIL" starttime="20180101 00:00:00.004" endtime="20180101 00:00:00.006" critical="yes">Ошибка</status>
+</test>
+<doc>Login tests.</doc>
+<status status="FAIL" starttime="20180101 00:00:00.000" endtime="20180101 00:00:00.006"></status>
+</suite>
+<doc></doc>
+%(metadata)s<status status="FAIL" starttime="20180101 00:00:00.000" endtime="20180101 00:00:00.006"></status>
+</suite>
+<statistics>
+</statistics>
+<errors>
+</errors>
+</robot>
+"""
+METADATA_XML = """<metadata>
+<item name="Owner">QA</item>
+<item name="Version">1.0</item>
+</metadata>
+"""
+
+
+class _Service(object):
+    """Service providing links to Report Portal items, with the index of items or with items requested."""
+
+    rp = SimpleNamespace(endpoint="http://reportportal.local", project="demo", launch_id="launch1")
+    item_index = ItemIndex()
+    pages: List[Dict[str, Any]] = []
+    requested_pages: List[int] = []
+
+    @staticmethod
+    def flush() -> bool:
+        """Requests are sent already."""
+        return True
+
+    @staticmethod
+    def get_items_info(**params: Any) -> Dict[str, Any]:
+        """Gets the page of test items."""
+        _Service.requested_pages.append(params["page.page"])
+        return _Service.pages[params["page.page"] - 1]
+
+
+@pytest.fixture
+def service() -> Any:
+    """Service with an empty index of items."""
+    _Service.item_index = ItemIndex()
+    _Service.pages = []
+    _Service.requested_pages = []
+    return _Service
+
+
+def _write_output(directory: Any, metadata: str = METADATA_XML) -> str:
+    """Writes output file.
+
+    Args:
+        directory: directory of the file.
+        metadata: metadata element of the top suite.
+    Returns:
+        Path to the file.
+    """
+    path = os.path.join(str(directory), "output.xml")
+    with open(path, "w", encoding="utf-8") as output:
+        output.write(OUTPUT_XML % {"metadata": metadata})
+    return path
+
+
+def _expected_tree(original: str, links: Dict[str, str]) -> ElementTree.Element:
+    """Applies changes expected from the modifier to the original output file.
+
+    Args:
+        original: original output file.
+        links: links to tests by test names, and to the launch by None.
+    Returns:
+        Root element of the expected output file.
+    """
+    root = ElementTree.fromstring(original.encode("utf-8"))
+    for test in root.iter("test"):
+        doc = test.find("doc")
+        link = f"[{links[test.get('name')]} | Report Portal]"
+        if doc is None:
+            doc = ElementTree.Element("doc")
+            doc.tail = "\n"
+            test.insert(list(test).index(test.find("status")), doc)
+            doc.text = link
+        else:
+            doc.text = f"{doc.text}\n\n{link}"
+
+    top_suite = root.find("suite")
+    metadata = top_suite.find("metadata")
+    if metadata is None:
+        metadata = ElementTree.Element("metadata")
+        metadata.text = metadata.tail = "\n"
+        top_suite.insert(list(top_suite).index(top_suite.find("status")), metadata)
+    item = ElementTree.Element("item", {"name": "Report Portal"})
+    item.text, item.tail = links[None], "\n"
+    names = [existing.get("name") for existing in metadata]
+    metadata.insert(len([name for name in names if name.lower() < "report portal"]), item)
+    return root
+
+
+def _assert_rewritten(path: str, original: str, links: Dict[str, str]) -> None:
+    """Checks the rewritten output file is the original one with links.
+
+    Args:
+        path: path to the rewritten output file.
+        original: original output file.
+        links: links to tests by test names, and to the launch by None.
+    """
+    with open(path, "rb") as output:
+        rewritten = output.read()
+    assert rewritten.startswith(b'<?xml version="1.0" encoding="UTF-8"?>\n<robot ')
+    expected = ElementTree.tostring(_expected_tree(original=original, links=links), encoding="unicode")
+    assert ElementTree.canonicalize(rewritten.decode("utf-8")) == ElementTree.canonicalize(expected)
+
+
+def _index_items(service: Any) -> None:
+    """Adds items of the output file to the index of the service.
+
+    Args:
+        service: service with an empty index.
+    """
+    service.item_index.add(item_id="suite1", path=[], item_type="SUITE", longname="Tests", robot_id="s1")
+    service.item_index.add(item_id="suite2", path=["suite1"], item_type="TEST", longname="Tests.Login",
+                           robot_id="s1-s1")
+    service.item_index.add(item_id="test1", path=["suite1", "suite2"], item_type="STEP",
+                           longname="Tests.Login.Valid Login", robot_id="s1-s1-t1")
+    service.item_index.add(item_id="test2", path=["suite1", "suite2"], item_type="STEP",
+                           longname="Tests.Login.Invalid Login", robot_id="s1-s1-t2")
+    service.item_index.add_child(parent_id="test2")
+
+
+def test_links_are_added_from_index_of_items(tmp_path: Any, service: Any) -> None:
+    _index_items(service=service)
+    path = _write_output(directory=tmp_path)
+
+    OutputFileModifier(robot_service=service).modify(path=path)
+
+    _assert_rewritten(path=path, original=OUTPUT_XML % {"metadata": METADATA_XML}, links=INDEXED_LINKS)
+    assert service.requested_pages == []
+
+
+def test_links_are_added_from_items_of_report_portal(tmp_path: Any, service: Any) -> None:
+    service.pages = [
+        {"page": {"totalPages": 2}, "content": [{"id": "test1", "name": "Valid Login", "parent": "suite2",
+                                                 "path_names": {"suite2": "Tests.Login"}, "has_childs": False}]},
+        {"page": {"totalPages": 2}, "content": [{"id": "test2", "name": "Invalid Login", "parent": "suite2",
+                                                 "path_names": {"suite2": "Tests.Login"}, "has_childs": True}]}
+    ]
+    path = _write_output(directory=tmp_path)
+
+    OutputFileModifier(robot_service=service).modify(path=path)
+
+    _assert_rewritten(path=path, original=OUTPUT_XML % {"metadata": METADATA_XML}, links={
+        None: LAUNCH_LINK,
+        "Valid Login": f"{LAUNCH_LINK}/suite2?log.item=test1",
+        "Invalid Login": f"{LAUNCH_LINK}/suite2/test2"
+    })
+    assert sorted(service.requested_pages) == [1, 2]
+
+
+def test_metadata_is_added_to_top_suite_without_metadata(tmp_path: Any, service: Any) -> None:
+    _index_items(service=service)
+    path = _write_output(directory=tmp_path, metadata="")
+
+    OutputFileModifier(robot_service=service).modify(path=path)
+
+    _assert_rewritten(path=path, original=OUTPUT_XML % {"metadata": ""}, links=INDEXED_LINKS)
+
+
+def test_existing_metadata_item_is_replaced(tmp_path: Any, service: Any) -> None:
+    _index_items(service=service)
+    metadata = '<metadata>\n<item name="Report_Portal">http://old</item>\n</metadata>\n'
+    path = _write_output(directory=tmp_path, metadata=metadata)
+
+    OutputFileModifier(robot_service=service).modify(path=path)
+
+    root = ElementTree.parse(path).getroot()
+    assert [(item.get("name"), item.text) for item in root.find("suite/metadata")] == [("Report_Portal",
+                                                                                       LAUNCH_LINK)]
+
+
+def test_output_file_is_replaced_with_its_mode(tmp_path: Any, service: Any) -> None:
+    _index_items(service=service)
+    path = _write_output(directory=tmp_path)
+    os.chmod(path, 0o640)
+
+    OutputFileModifier(robot_service=service).modify(path=path)
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    assert os.listdir(str(tmp_path)) == ["output.xml"]
+
+
+def test_output_file_is_kept_if_it_is_not_parsed(tmp_path: Any, service: Any) -> None:
+    _index_items(service=service)
+    path = _write_output(directory=tmp_path)
+    with open(path, "r+", encoding="utf-8") as output:
+        content = output.read()
+        output.seek(0)
+        output.truncate()
+        output.write(content[:len(content) // 2])
+
+    with pytest.raises(SAXParseException):
+        OutputFileModifier(robot_service=service).modify(path=path)
+
+    with open(path, encoding="utf-8") as output:
+        assert output.read() == content[:len(content) // 2]
+    assert os.listdir(str(tmp_path)) == ["output.xml"]
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+import os
+from typing import Any, List, Tuple
+
+from conftest import RecordingReportPortal, keyword_events, log_message, run_listener, suite_events
+
+from reportportal_listener.service import RobotService
+
+
+def _step_events() -> List[Tuple[str, tuple]]:
+    """Events of a step logging three messages."""
+    return keyword_events(name="Step", nested=[("log_message", (log_message(text=text),))
+                                               for text in ("first", "second", "third")])
+
+
+def test_statistics_are_not_printed_without_splitting(capfd: Any, report_portal: RecordingReportPortal,
+                                                      service: None) -> None:
+    run_listener(report_portal.endpoint, suite_events(tests=["Test"], test_events=_step_events()))
+
+    assert "log messages were sent" not in capfd.readouterr().out
+    assert [len(request[2]) for request in report_portal.pop_requests() if request[0] == "log"] == [4]
+
+
+def test_statistics_are_printed_after_splitting(capfd: Any, report_portal: RecordingReportPortal,
+                                                service: None) -> None:
+    run_listener(report_portal.endpoint, suite_events(tests=["Test"], test_events=_step_events()),
+                 RP_LOG_BATCH_SIZE="3")
+
+    assert "4 log messages were sent to Report Portal in 2 requests." in capfd.readouterr().out
+    assert [len(request[2]) for request in report_portal.pop_requests() if request[0] == "log"] == [3, 1]
+
+
+def test_message_with_removed_file_is_split_without_it(tmp_path: Any, monkeypatch: Any) -> None:
+    monkeypatch.setattr(RobotService, "log_batch_max_bytes", 1024)
+    path = os.path.join(str(tmp_path), "screenshot.png")
+    with open(path, "wb") as screenshot:
+        screenshot.write(b"\x89PNG screenshot")
+    attachment = {"name": "screenshot.png", "path": path, "mime": "image/png"}
+    log_data = [{"time": "1514764800000", "message": "Screen shot", "level": "INFO", "attachment": attachment},
+                {"time": "1514764800000", "message": "Removed", "level": "INFO",
+                 "attachment": dict(attachment, path=os.path.join(str(tmp_path), "removed.png"))}]
+
+    batches = RobotService._split_log_batches(log_data=log_data, item_id="item")
+
+    assert [[message["attachment"] for message in batch] for batch, records in batches] == [[attachment, None]]
+    assert batches[0][0][1]["message"] == f"Removed\nFile {os.path.join(str(tmp_path), 'removed.png')} " \
+                                          f"is not attached: it is not found."
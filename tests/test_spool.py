@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+import os
+from typing import Any, List, Tuple
+
+from conftest import (END_TIME, START_TIME, RecordingReportPortal, keyword_events, log_message, reset_service,
+                      run_listener, suite_events)
+
+from reportportal_listener import model
+from reportportal_listener.service import RobotService
+from reportportal_listener.spool import read_journal, replay_journal
+
+
+def _screenshot_events(directory: str, number: int) -> Tuple[str, tuple]:
+    """Writes a screenshot and generates the event of its message.
+
+    Args:
+        directory: output directory.
+        number: number of the screenshot.
+    Returns:
+        Name of the listener callback and its arguments.
+    """
+    name = f"selenium-screenshot-{number}.png"
+    with open(os.path.join(directory, name), "wb") as screenshot:
+        screenshot.write(b"\x89PNG screenshot %d" % number)
+    return "log_message", (log_message(text=f'<a href="{name}"><img src="{name}" width="800px"></a>', html="yes"),)
+
+
+def _record_run(report_portal: RecordingReportPortal, directory: str) -> str:
+    """Records a run of one test with two screenshots to the journal.
+
+    Args:
+        report_portal: Report Portal stub, no requests must be sent to it.
+        directory: output directory of the run.
+    Returns:
+        Path to the journal.
+    """
+    journal = os.path.join(directory, "rp_journal.bin")
+    events = keyword_events(name="First", nested=[("log_message", (log_message(text="first"),)),
+                                                  _screenshot_events(directory=directory, number=1)]) + \
+        keyword_events(name="Second", nested=[_screenshot_events(directory=directory, number=2)])
+    run_listener(report_portal.endpoint, suite_events(tests=["Test"], test_events=events),
+                 RP_SPOOL_FILE=journal, OUTPUT_DIR=directory)
+    assert report_portal.pop_requests() == []
+    reset_service()
+    return journal
+
+
+def _screenshot_message(keyword: str, number: int) -> Tuple[str, Tuple[str, bytes]]:
+    """Gets the recorded message with the screenshot.
+
+    Args:
+        keyword: name of the keyword, which logged the screenshot.
+        number: number of the screenshot.
+    Returns:
+        Message and the attached file.
+    """
+    return (f'Screen shot in the keyword "Library.{keyword}"',
+            (f"selenium-screenshot-{number}.png", b"\x89PNG screenshot %d" % number))
+
+
+def _run_requests(messages: List[Tuple[str, Any]]) -> List[Tuple[Any, ...]]:
+    """Gets requests of the recorded run.
+
+    Args:
+        messages: messages of the log request of the test.
+    Returns:
+        Requests in the order they are sent.
+    """
+    return [("start_launch", "Launch"),
+            ("start_item", None, "Suite", "TEST", "item1"),
+            ("start_item", "item1", "Test", "STEP", "item2"),
+            ("log", "item2", messages),
+            ("finish_item", "item2", "PASSED"),
+            ("finish_item", "item1", "PASSED"),
+            ("finish_launch", "PASSED")]
+
+
+def test_recorded_run_is_replayed(tmp_path: Any, report_portal: RecordingReportPortal, service: None) -> None:
+    journal = _record_run(report_portal=report_portal, directory=str(tmp_path))
+    linked = os.path.join(journal + ".attachments", "1-selenium-screenshot-1.png")
+    assert os.path.samefile(linked, os.path.join(str(tmp_path), "selenium-screenshot-1.png"))
+
+    replay_journal(path=journal, endpoint=report_portal.endpoint, project=report_portal.project, uuid="uuid")
+
+    assert report_portal.pop_requests() == _run_requests(messages=[
+        ("Library.First", None), ("first", None), _screenshot_message(keyword="First", number=1),
+        ("Library.Second", None), _screenshot_message(keyword="Second", number=2)
+    ])
+
+
+def test_attachments_are_copied_if_they_are_not_linked(tmp_path: Any, monkeypatch: Any,
+                                                       report_portal: RecordingReportPortal, service: None) -> None:
+    def link(source: str, target: str) -> None:
+        raise OSError(18, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "link", link)
+    journal = _record_run(report_portal=report_portal, directory=str(tmp_path))
+    monkeypatch.undo()
+    copied = os.path.join(journal + ".attachments", "1-selenium-screenshot-1.png")
+    assert not os.path.samefile(copied, os.path.join(str(tmp_path), "selenium-screenshot-1.png"))
+    # Screenshots written again after the run do not change copies.
+    for number in (1, 2):
+        with open(os.path.join(str(tmp_path), f"selenium-screenshot-{number}.png"), "wb") as screenshot:
+            screenshot.write(b"another screenshot")
+
+    replay_journal(path=journal, endpoint=report_portal.endpoint, project=report_portal.project, uuid="uuid")
+
+    assert report_portal.pop_requests() == _run_requests(messages=[
+        ("Library.First", None), ("first", None), _screenshot_message(keyword="First", number=1),
+        ("Library.Second", None), _screenshot_message(keyword="Second", number=2)
+    ])
+
+
+def test_linked_attachment_written_again_is_not_replayed(tmp_path: Any, report_portal: RecordingReportPortal,
+                                                         service: None) -> None:
+    journal = _record_run(report_portal=report_portal, directory=str(tmp_path))
+    with open(os.path.join(str(tmp_path), "selenium-screenshot-2.png"), "wb") as screenshot:
+        screenshot.write(b"another screenshot")
+
+    replay_journal(path=journal, endpoint=report_portal.endpoint, project=report_portal.project, uuid="uuid")
+
+    linked = os.path.join(os.path.abspath(journal + ".attachments"), "2-selenium-screenshot-2.png")
+    assert report_portal.pop_requests() == _run_requests(messages=[
+        ("Library.First", None), ("first", None), _screenshot_message(keyword="First", number=1),
+        ("Library.Second", None),
+        (f'Screen shot in the keyword "Library.Second"\nFile {linked} is not attached: '
+         f'it was written again after it was logged.', None)
+    ])
+
+
+def test_consecutive_logs_are_joined(tmp_path: Any, report_portal: RecordingReportPortal, service: None) -> None:
+    journal = os.path.join(str(tmp_path), "rp_journal.bin")
+    RobotService.init_service(endpoint=report_portal.endpoint, project=report_portal.project, uuid="uuid",
+                              spool_file=journal, output_dir=str(tmp_path))
+    suite = model.Suite(attributes={"id": "s1", "longname": "Suite", "doc": "", "metadata": {}, "source": "",
+                                    "suites": [], "tests": ["Test"], "totaltests": 1, "starttime": START_TIME})
+    test = model.Test(name="Test", attributes={"id": "s1-t1", "longname": "Suite.Test", "doc": "", "tags": [],
+                                               "starttime": START_TIME, "critical": "yes", "template": ""})
+    RobotService.start_launch(launch_name="Launch", launch_tags=[], launch=suite)
+    RobotService.start_suite(suite=suite)
+    RobotService.start_test(test=test)
+    for texts in (["first", "second"], ["third"]):
+        RobotService.log(log_data=[{"message": text, "level": "INFO", "timestamp": 1514764800000,
+                                    "keyword": "Library.Keyword"} for text in texts])
+    RobotService.log(log_data={"message": "fourth", "level": "WARN", "timestamp": 1514764800000,
+                               "keyword": "Library.Keyword"})
+    test.update(attributes={"status": "PASS", "tags": [], "endtime": END_TIME})
+    RobotService.finish_test(test=test)
+    suite.update(attributes={"status": "PASS", "endtime": END_TIME})
+    RobotService.finish_suite(suite=suite)
+    RobotService.finish_launch(launch=suite)
+    RobotService.terminate_service()
+    reset_service()
+    assert [method for method, kwargs in read_journal(journal)].count("send_log") == 3
+
+    replay_journal(path=journal, endpoint=report_portal.endpoint, project=report_portal.project, uuid="uuid")
+
+    assert report_portal.pop_requests() == _run_requests(messages=[
+        ("first", None), ("second", None), ("third", None), ("fourth", None)
+    ])
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+import os
+import time
+from datetime import datetime
+from typing import Iterator
+
+import pytest
+from hypothesis import example, given, settings, strategies
+
+from reportportal_listener.service import RF_TIME_FORMAT, _rf_seconds_to_timestamp, rf_time_to_milliseconds
+
+# Time zones with and without daylight saving time, with offsets not divisible by an hour.
+TIME_ZONES = ["UTC", "Europe/Moscow", "America/New_York", "Australia/Adelaide", "Asia/Kolkata"]
+
+
+@pytest.fixture(params=TIME_ZONES, autouse=True)
+def time_zone(request: pytest.FixtureRequest) -> Iterator[str]:
+    """Local time zone of the process, converted seconds are cached for it, so the cache is cleared."""
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = request.param
+    time.tzset()
+    _rf_seconds_to_timestamp.cache_clear()
+    yield request.param
+    if previous is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = previous
+    time.tzset()
+    _rf_seconds_to_timestamp.cache_clear()
+
+
+def _strptime_milliseconds(rf_time: str) -> int:
+    """Converts time with strptime, as it was converted before parsing without strptime.
+
+    Args:
+        rf_time: time in the format of Robot Framework.
+    Returns:
+        Number of milliseconds.
+    """
+    return int(datetime.strptime(rf_time, RF_TIME_FORMAT).timestamp() * 1000)
+
+
+@settings(max_examples=300, deadline=None)
+@given(moment=strategies.datetimes(min_value=datetime(1971, 1, 1), max_value=datetime(2099, 12, 31)),
+       digits=strategies.integers(min_value=1, max_value=6))
+@example(moment=datetime(2017, 12, 31, 23, 59, 59, 999000), digits=3)
+@example(moment=datetime(2018, 1, 1, 0, 0, 0, 0), digits=3)
+@example(moment=datetime(2016, 2, 29, 23, 59, 59, 999999), digits=6)
+@example(moment=datetime(2018, 3, 25, 2, 30, 0, 1000), digits=3)
+@example(moment=datetime(2018, 10, 28, 2, 30, 0, 999000), digits=3)
+@example(moment=datetime(2018, 3, 11, 2, 30, 0, 500000), digits=1)
+@example(moment=datetime(2018, 11, 4, 1, 30, 59, 999000), digits=3)
+def test_milliseconds_are_the_same_as_with_strptime(moment: datetime, digits: int) -> None:
+    rf_time = moment.strftime("%Y%m%d %H:%M:%S.") + f"{moment.microsecond:06d}"[:digits]
+
+    assert rf_time_to_milliseconds(rf_time=rf_time) == _strptime_milliseconds(rf_time)
+
+
+@settings(max_examples=100, deadline=None)
+@given(moment=strategies.datetimes(min_value=datetime(1971, 1, 1), max_value=datetime(2099, 12, 31)))
+@example(moment=datetime(2017, 12, 31, 23, 59, 59))
+@example(moment=datetime(2016, 2, 29, 0, 0, 0))
+def test_seconds_are_the_same_as_with_strptime(moment: datetime) -> None:
+    rf_seconds = moment.strftime("%Y%m%d %H:%M:%S")
+
+    assert _rf_seconds_to_timestamp(rf_seconds) == datetime.strptime(rf_seconds, "%Y%m%d %H:%M:%S").timestamp()
+
+
+@pytest.mark.parametrize("rf_time", ["20180101 00:00:00.1234567", "2018-01-01 00:00:00.000", "20180132 00:00:00.000"])
+def test_other_values_are_parsed_with_strptime(rf_time: str) -> None:
+    with pytest.raises(ValueError):
+        datetime.strptime(rf_time, RF_TIME_FORMAT)
+    with pytest.raises(ValueError):
+        rf_time_to_milliseconds(rf_time=rf_time)
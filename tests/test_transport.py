@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import os
+from typing import Any
+
+from conftest import RecordingReportPortal, keyword_events, log_message, run_listener, suite_events
+
+from reportportal_listener.multipart import MultipartBody
+from reportportal_listener.transport import GzipBody
+
+
+def _body(directory: str) -> MultipartBody:
+    """Creates multipart body with a file larger than chunks of the body.
+
+    Args:
+        directory: directory of the file.
+    Returns:
+        Multipart body.
+    """
+    path = os.path.join(directory, "screenshot.png")
+    with open(path, "wb") as screenshot:
+        screenshot.write(os.urandom(100000) + b"\x00" * 200000)
+    return MultipartBody(parts=[{"name": "json_request_part", "mime": "application/json", "data": b"[]"},
+                                {"name": "file", "filename": "screenshot.png", "mime": "image/png", "path": path}])
+
+
+def test_body_is_compressed_while_it_is_read(tmp_path: Any) -> None:
+    multipart = _body(directory=str(tmp_path))
+    source = multipart.read()
+    multipart.seek(0)
+    body = GzipBody(body=multipart)
+
+    chunks = list(iter(lambda: body.read(1000), b""))
+
+    assert gzip.decompress(b"".join(chunks)) == source
+    assert all(len(chunk) == 1000 for chunk in chunks[:-1])
+    # Length is unknown, so the body is sent with chunked transfer encoding.
+    assert not hasattr(body, "__len__")
+
+
+def test_body_is_compressed_again_after_rewinding(tmp_path: Any) -> None:
+    multipart = _body(directory=str(tmp_path))
+    source = multipart.read()
+    multipart.seek(0)
+    body = GzipBody(body=multipart)
+    body.read(1000)
+
+    body.seek(0)
+
+    assert gzip.decompress(body.read()) == source
+
+
+def test_log_with_attachment_is_sent_compressed(tmp_path: Any, report_portal: RecordingReportPortal,
+                                                service: None) -> None:
+    with open(os.path.join(str(tmp_path), "screenshot.png"), "wb") as screenshot:
+        screenshot.write(b"\x89PNG screenshot")
+    events = keyword_events(name="Step", nested=[("log_message", (log_message(text='<img src="screenshot.png">',
+                                                                              html="yes"),))])
+
+    run_listener(report_portal.endpoint, suite_events(tests=["Test"], test_events=events), RP_GZIP_LOGS="True",
+                 OUTPUT_DIR=str(tmp_path))
+
+    assert [request[2] for request in report_portal.pop_requests() if request[0] == "log"] == [[
+        ("Library.Step", None),
+        ('Screen shot in the keyword "Library.Step"', ("screenshot.png", b"\x89PNG screenshot"))
+    ]]
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from reportportal_listener.variables import Settings, preset_variables
+
+# Required variables.
+REQUIRED = {"RP_ENDPOINT": "http://reportportal.local", "RP_UUID": "uuid", "RP_PROJECT": "project",
+            "RP_LAUNCH": "Launch"}
+
+
+def test_settings_are_resolved_with_defaults(service: None) -> None:
+    preset_variables(RP_LAUNCH_TAGS="smoke,ui", RP_ASYNC="True", RP_QUEUE_SIZE="10", RP_LOG_INCLUDE="My*,,Other.*",
+                     **REQUIRED)
+
+    settings = Settings.resolve()
+
+    assert (settings.endpoint, settings.uuid, settings.project, settings.launch_name) == tuple(REQUIRED.values())
+    assert settings.launch_tags == ("smoke", "ui")
+    assert settings.async_mode is True and settings.queue_size == 10
+    assert settings.log_include == ("My*", "Other.*") and settings.log_exclude == ()
+    assert settings.launch_doc == "" and settings.timeout is None and settings.close_timeout == 300.0
+    assert settings.log_batch_max_bytes == 0 and settings.message_max_length == 8388608
+
+
+def test_settings_do_not_change(service: None) -> None:
+    preset_variables(**REQUIRED)
+    settings = Settings.resolve()
+
+    with pytest.raises(FrozenInstanceError):
+        settings.keyword_depth = 1  # type: ignore
+
+
+@pytest.mark.parametrize("variable", sorted(REQUIRED))
+def test_missing_required_variable_fails(variable: str, service: None) -> None:
+    preset_variables(**dict(REQUIRED, **{variable: ""}))
+
+    with pytest.raises(AssertionError, match=f"Missing parameter {variable}"):
+        Settings.resolve()
+
+
+def test_launch_name_is_not_required_for_existing_launch(service: None) -> None:
+    preset_variables(**{name: value for name, value in REQUIRED.items() if name != "RP_LAUNCH"})
+
+    assert Settings.resolve(launch_name_required=False).launch_name is None
+
+
+def test_invalid_value_fails(service: None) -> None:
+    preset_variables(RP_KEYWORD_DEPTH="deep", **REQUIRED)
+
+    with pytest.raises(ValueError, match="Invalid value 'deep' of RP_KEYWORD_DEPTH"):
+        Settings.resolve()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+from typing import List
+
+import pytest
+
+from reportportal_listener.worker import BackgroundWorker
+
+
+def _reject(name: str) -> None:
+    """Request rejected by Report Portal.
+
+    Args:
+        name: name of the request.
+    """
+    raise ValueError(f"{name} is rejected")
+
+
+@pytest.fixture
+def worker() -> BackgroundWorker:
+    """Worker which is stopped after the test."""
+    worker = BackgroundWorker(queue_size=10)
+    yield worker
+    worker.stop(timeout=5)
+
+
+def test_requests_are_executed_in_order(worker: BackgroundWorker) -> None:
+    sent: List[str] = []
+    for name in ("start suite", "start test", "log", "finish test"):
+        worker.submit(sent.append, name, dependent=True)
+
+    assert worker.flush(timeout=5)
+    assert sent == ["start suite", "start test", "log", "finish test"]
+
+
+def test_dependent_requests_are_dropped_after_failure(worker: BackgroundWorker,
+                                                      capfd: pytest.CaptureFixture) -> None:
+    sent: List[str] = []
+    worker.submit(sent.append, "start suite", dependent=True)
+    worker.submit(_reject, "start setup", dependent=True)
+    worker.submit(sent.append, "log setup", dependent=True)
+    worker.submit(sent.append, "finish setup", dependent=True)
+    worker.submit(sent.append, "start test", dependent=True)
+    worker.submit(sent.append, "finish launch")
+
+    assert worker.stop(timeout=5)
+    assert sent == ["start suite", "finish launch"]
+    assert "3 requests of items were not sent to Report Portal after the failure: " \
+           "ValueError: start setup is rejected" in capfd.readouterr().err
+
+
+def test_independent_failure_does_not_drop_requests(worker: BackgroundWorker) -> None:
+    sent: List[str] = []
+    worker.submit(_reject, "get items")
+    worker.submit(sent.append, "start test", dependent=True)
+
+    assert worker.flush(timeout=5)
+    assert sent == ["start test"]